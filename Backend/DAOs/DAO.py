@@ -1,28 +1,116 @@
-from typing import Iterable
-from Backend.dbconfig import pg_config
+from itertools import count
+from typing import Iterable, Iterator
+from Backend.DAOs.connection_pool import get_pool
+from Backend.DAOs import unit_of_work
+from Backend import metrics
 import psycopg2
 
+# Rows fetched per round-trip by the server-side cursors of streaming queries
+STREAM_ITERSIZE = 2000
+_cursor_ids = count()
+
 class DAO:
     """
     Base class for all DAOs.
-    Initializes the connection.
+    While handling a request, every DAO shares the request's unit of work connection.
+    Otherwise the DAO borrows a connection from the process-wide pool the first time it is needed
+    and gives it back to that pool when it is released or garbage collected.
     """
+    def __init_subclass__(cls, **kwargs):
+        # Every public method of a DAO reports its latency to /metrics
+        super().__init_subclass__(**kwargs)
+        for name, attribute in list(vars(cls).items()):
+            if callable(attribute) and not name.startswith("_"):
+                setattr(cls, name, metrics.timed_dao_method(cls.__name__, name, attribute))
+
+
     def __init__(self):
-        connection_url = (
-            f'host = {pg_config["host"]} dbname={(pg_config["dbname"])} '
-            f'user={pg_config["user"]} password={pg_config["password"]}'
-        )
-        print("Connection url:", connection_url)
-        self.conn = psycopg2.connect(connection_url)
+        self._conn = None
+        self._pool = None  # the pool _conn was borrowed from
+
+
+    @property
+    def conn(self):
+        unit = unit_of_work.current(create=True)
+        if unit is not None:
+            return unit.conn
+        if self._conn is None:
+            self._pool = get_pool()
+            self._conn = self._pool.getconn()
+        return self._conn
 
 
-    def _getAllEntries(self, table_name: str, columns: tuple) -> Iterable | None:
+    def _commit(self):
+        """
+        Commits the DAO's own connection.
+        Inside a request this is a no-op: the unit of work commits once when the request finishes.
+        """
+        if unit_of_work.current() is None:
+            self.conn.commit()
+
+
+    def release(self):
+        """
+        Returns the borrowed connection to the pool, if any.
+        Uncommitted work on it is rolled back.
+        """
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+
+    def __del__(self):
+        self.release()
+
+
+    def _getAllEntries(self, table_name: str, columns: tuple, id_name: str = None,
+                       limit: int = None, after: tuple = None) -> Iterable | None:
         """
         Selects the given attributes from the given table.
+        With an `id_name`, the entries are ordered by id and paginated by `limit` and `after` (see _getPage).
         Returns the list of tuples returned from the query or None if the operation failed.
         """
         query = f"SELECT {', '.join(columns)} FROM {table_name}"
-        return self._generic_retrieval_query(query)
+        if id_name is None: return self._generic_retrieval_query(query)
+        return self._getPage(query, key=(id_name,), limit=limit, after=after)
+
+
+    def _getPage(self, query: str, key: tuple, descending: bool = False, limit: int = None,
+                 after: tuple = None, filters: tuple = (), stream: bool = False) -> Iterable | None:
+        """
+        Runs the given SELECT ... FROM ... query (without WHERE or ORDER BY) as one page of a keyset pagination.
+        `key` are the columns the rows are ordered by, the last one being unique, and `after` is the key of
+        the last row of the previous page. Without `limit` every matching row is returned.
+        `filters` are (condition, value) pairs, each condition with a single placeholder; pairs whose value
+        is None are skipped.
+        Returns the list of tuples returned from the query, an iterator over them if `stream` is set
+        (see _stream_query), or None if the operation failed.
+        """
+        query, substitutions = self._pageQuery(query, key, descending, limit, after, filters)
+        if stream: return self._stream_query(query, substitutions=substitutions)
+        return self._generic_retrieval_query(query, substitutions=substitutions)
+
+
+    @staticmethod
+    def _pageQuery(query: str, key: tuple, descending: bool = False, limit: int = None,
+                   after: tuple = None, filters: tuple = ()) -> tuple:
+        """Builds the query of _getPage. Returns the query and its substitutions."""
+        conditions = []
+        substitutions = []
+        for condition, value in filters:
+            if value is None: continue
+            conditions.append(condition)
+            substitutions.append(value)
+        if after is not None:
+            conditions.append(f"({', '.join(key)}) {'<' if descending else '>'} ({', '.join(['%s'] * len(key))})")
+            substitutions.extend(after)
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += f" ORDER BY {', '.join(f'{column} DESC' if descending else column for column in key)}"
+        if limit is not None:
+            query += " LIMIT %s"
+            substitutions.append(limit)
+        return query, substitutions
     
 
   
@@ -56,7 +144,7 @@ class DAO:
             try:
                 cursor.execute(query, values)
                 entry_id = cursor.fetchone()[0]
-                self.conn.commit()
+                self._commit()
                 return entry_id
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -76,7 +164,7 @@ class DAO:
             try:
                 cursor.execute(query, (*values, id_value))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -93,7 +181,7 @@ class DAO:
             try:
                 cursor.execute(query, (id_value,))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -117,3 +205,49 @@ class DAO:
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
                 return None
+
+
+    def _stream_query(self, query: str, substitutions=(), itersize: int = STREAM_ITERSIZE) -> Iterator | None:
+        """
+        Executes the given query on a named (server-side) cursor so the rows are not materialized in memory.
+        Returns an iterator that fetches the rows `itersize` at a time, or None if the operation failed.
+        The cursor only lives inside the current transaction and is closed once the iterator is exhausted.
+        """
+        cursor = self.conn.cursor(name=f"stream_{next(_cursor_ids)}")
+        cursor.itersize = itersize
+        if not isinstance(substitutions, Iterable): substitutions = (substitutions,)
+        try:
+            cursor.execute(query, substitutions)
+        except psycopg2.errors.Error as e:
+            print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+            return None
+        return self._iterate(cursor)
+
+
+    def _iterate(self, cursor) -> Iterator:
+        # Keeps the DAO (and the connection it may own) alive until the rows are consumed
+        try:
+            yield from cursor
+        finally:
+            if not cursor.closed and not cursor.connection.closed:
+                try:
+                    cursor.close()
+                except psycopg2.Error:
+                    pass  # the transaction was aborted, which already dropped the cursor
+
+
+    def _generic_modification_query(self, query: str, substitutions=()) -> tuple | None:
+        """
+        Executes the given write query (or call to a server-side function) and commits it.
+        Returns the first row produced by the query, or None if it produced none or the operation failed.
+        """
+        with self.conn.cursor() as cursor:
+            if not isinstance(substitutions, Iterable): substitutions = (substitutions,)
+            try:
+                cursor.execute(query, substitutions)
+                row = cursor.fetchone() if cursor.description else None
+                self._commit()
+                return row
+            except psycopg2.errors.Error as e:
+                print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+                return None
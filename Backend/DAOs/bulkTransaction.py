@@ -0,0 +1,358 @@
+import csv
+import io
+from Backend.DAOs.DAO import DAO
+import psycopg2
+
+
+class BulkTransactionDAO(DAO):
+    """
+    Posts whole batches of incoming, outgoing or transfer transactions.
+    A batch is loaded with COPY into a temporary staging table, validated set-wise with joins
+    against the live tables, and the accepted rows are applied with one aggregated statement
+    per affected table instead of one round-trip per row.
+
+    Rows are first checked on their own; quantities consumed inside a batch are then checked with running
+    totals in row order over the rows that passed, so a row is rejected when it and the accepted rows before
+    it would overdraw a stock, budget or rack together, and a rejected row never uses up or claims anything.
+    Row locks follow the same order as the single posting functions (sql_data/3_functions.sql).
+    """
+    STAGING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS bulk_staging (
+        row_no INTEGER PRIMARY KEY,
+        tdate DATE,
+        part_amount INTEGER,
+        unit_price DOUBLE PRECISION,
+        pid INTEGER,
+        wid INTEGER,
+        rid INTEGER,
+        sid INTEGER,
+        cid INTEGER,
+        uid INTEGER,
+        to_wid INTEGER,
+        user_requester INTEGER,
+        to_rid INTEGER,
+        error TEXT,
+        new_tid INTEGER,
+        new_id INTEGER
+    ) ON COMMIT DROP;
+    TRUNCATE bulk_staging;
+    """
+
+    VALIDATE_INCOMING = """
+    SELECT 1 FROM supplies WHERE (pid, sid) IN (SELECT pid, sid FROM bulk_staging) ORDER BY sid, pid FOR UPDATE;
+    SELECT 1 FROM racks WHERE rid IN (SELECT rid FROM bulk_staging) ORDER BY rid FOR UPDATE;
+    SELECT 1 FROM stored_in
+    WHERE rid IN (SELECT rid FROM bulk_staging) OR (wid, pid) IN (SELECT wid, pid FROM bulk_staging)
+    ORDER BY rid FOR UPDATE;
+    SELECT 1 FROM warehouse WHERE wid IN (SELECT wid FROM bulk_staging) ORDER BY wid FOR UPDATE;
+
+    -- Checks that only depend on the row itself
+    WITH facts AS (
+        SELECT b.row_no, b.pid, b.wid, b.rid, b.sid, b.uid,
+               su.stock, w.wbudget, u.wid AS user_wid, r.rcapacity,
+               rack.wid AS rack_wid, rack.pid AS rack_pid, assigned.rid AS assigned_rid
+        FROM bulk_staging AS b
+        LEFT JOIN supplies AS su ON su.pid = b.pid AND su.sid = b.sid
+        LEFT JOIN warehouse AS w ON w.wid = b.wid
+        LEFT JOIN users AS u ON u.uid = b.uid
+        LEFT JOIN racks AS r ON r.rid = b.rid
+        LEFT JOIN stored_in AS rack ON rack.rid = b.rid
+        LEFT JOIN stored_in AS assigned ON assigned.wid = b.wid AND assigned.pid = b.pid
+        WHERE b.error IS NULL
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN COALESCE(f.stock, 0) = 0
+            THEN format('Part %s not supplied by supplier %s', f.pid, f.sid)
+        WHEN COALESCE(f.wbudget, 0) = 0
+            THEN format('Warehouse %s not found', f.wid)
+        WHEN f.user_wid IS NULL
+            THEN format('Internal server error: Failed to get user with id %s', f.uid)
+        WHEN f.user_wid <> f.wid
+            THEN format('User (%s) works at warehouse %s, not %s', f.uid, f.user_wid, f.wid)
+        WHEN COALESCE(f.rcapacity, 0) = 0
+            THEN format('Rack %s does not exist', f.rid)
+        WHEN f.rack_wid IS NOT NULL AND NOT (f.rack_wid = f.wid AND f.rack_pid = f.pid)
+            THEN format('Rack (%s) not assigned to warehouse (%s) and part (%s)', f.rid, f.wid, f.pid)
+        WHEN f.assigned_rid IS NOT NULL AND f.assigned_rid <> f.rid
+            THEN format('Warehouse (%s) and part (%s) assigned to rack %s, not %s', f.wid, f.pid, f.assigned_rid, f.rid)
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+
+    -- Running totals and rack claims, over the rows that passed the checks above only
+    WITH facts AS (
+        SELECT b.row_no, b.part_amount, b.unit_price, b.pid, b.wid, b.rid,
+               su.stock, w.wbudget, r.rcapacity, COALESCE(rack.parts_qty, 0) AS current_qty,
+               FIRST_VALUE(b.wid) OVER by_rack AS batch_rack_wid,
+               FIRST_VALUE(b.pid) OVER by_rack AS batch_rack_pid,
+               FIRST_VALUE(b.rid) OVER (PARTITION BY b.wid, b.pid ORDER BY b.row_no) AS batch_assigned_rid,
+               SUM(b.part_amount) OVER (PARTITION BY b.pid, b.sid ORDER BY b.row_no) AS stock_needed,
+               SUM(b.part_amount * b.unit_price) OVER (PARTITION BY b.wid ORDER BY b.row_no) AS cost_needed,
+               SUM(b.part_amount) OVER by_rack AS rack_needed
+        FROM bulk_staging AS b
+        LEFT JOIN supplies AS su ON su.pid = b.pid AND su.sid = b.sid
+        LEFT JOIN warehouse AS w ON w.wid = b.wid
+        LEFT JOIN racks AS r ON r.rid = b.rid
+        LEFT JOIN stored_in AS rack ON rack.rid = b.rid
+        WHERE b.error IS NULL
+        WINDOW by_rack AS (PARTITION BY b.rid ORDER BY b.row_no)
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN f.stock < f.stock_needed
+            THEN format('Not enough stock (%s) for requested amount (%s)',
+                        GREATEST(f.stock - (f.stock_needed - f.part_amount), 0), f.part_amount)
+        WHEN f.wbudget < f.cost_needed
+            THEN format('Warehouse budget ($%s) not enough to buy %s unit(s) at $%s per unit.',
+                        GREATEST(f.wbudget - (f.cost_needed - f.part_amount * f.unit_price), 0),
+                        f.part_amount, f.unit_price)
+        WHEN NOT (f.batch_rack_wid = f.wid AND f.batch_rack_pid = f.pid)
+            THEN format('Rack (%s) not assigned to warehouse (%s) and part (%s)', f.rid, f.wid, f.pid)
+        WHEN f.batch_assigned_rid <> f.rid
+            THEN format('Warehouse (%s) and part (%s) assigned to rack %s, not %s',
+                        f.wid, f.pid, f.batch_assigned_rid, f.rid)
+        WHEN f.rack_needed > f.rcapacity - f.current_qty
+            THEN format('Too many parts (%s). Rack (%s) can hold %s more parts.', f.part_amount, f.rid,
+                        GREATEST(f.rcapacity - f.current_qty - (f.rack_needed - f.part_amount), 0))
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+    """
+
+    APPLY_INCOMING = """
+    UPDATE bulk_staging SET new_tid = nextval(pg_get_serial_sequence('transactions', 'tid')) WHERE error IS NULL;
+
+    INSERT INTO transactions (tid, tdate, part_amount, pid, uid, wid)
+    SELECT new_tid, tdate, part_amount, pid, uid, wid FROM bulk_staging WHERE error IS NULL ORDER BY row_no;
+
+    WITH inserted AS (
+        INSERT INTO incoming_transaction (unit_buy_price, sid, rid, tid)
+        SELECT unit_price, sid, rid, new_tid FROM bulk_staging WHERE error IS NULL ORDER BY row_no
+        RETURNING itid, tid
+    )
+    UPDATE bulk_staging AS b SET new_id = inserted.itid FROM inserted WHERE b.new_tid = inserted.tid;
+
+    UPDATE supplies AS su SET stock = su.stock - d.amount
+    FROM (SELECT pid, sid, SUM(part_amount) AS amount FROM bulk_staging WHERE error IS NULL GROUP BY pid, sid) AS d
+    WHERE su.pid = d.pid AND su.sid = d.sid;
+
+    DELETE FROM supplies WHERE stock = 0 AND (pid, sid) IN (SELECT pid, sid FROM bulk_staging WHERE error IS NULL);
+
+    UPDATE warehouse AS w SET wbudget = w.wbudget - d.cost
+    FROM (SELECT wid, SUM(part_amount * unit_price) AS cost FROM bulk_staging WHERE error IS NULL GROUP BY wid) AS d
+    WHERE w.wid = d.wid;
+
+    INSERT INTO stored_in (wid, pid, rid, parts_qty)
+    SELECT wid, pid, rid, SUM(part_amount) FROM bulk_staging WHERE error IS NULL GROUP BY wid, pid, rid
+    ON CONFLICT (wid, pid) DO UPDATE SET parts_qty = stored_in.parts_qty + EXCLUDED.parts_qty;
+    """
+
+    VALIDATE_OUTGOING = """
+    SELECT 1 FROM stored_in WHERE (wid, pid) IN (SELECT wid, pid FROM bulk_staging) ORDER BY rid FOR UPDATE;
+    SELECT 1 FROM warehouse WHERE wid IN (SELECT wid FROM bulk_staging) ORDER BY wid FOR UPDATE;
+
+    -- Checks that only depend on the row itself
+    WITH facts AS (
+        SELECT b.row_no, b.pid, b.wid, b.cid, b.uid,
+               u.wid AS user_wid, s.rid, c.cid AS customer
+        FROM bulk_staging AS b
+        LEFT JOIN users AS u ON u.uid = b.uid
+        LEFT JOIN stored_in AS s ON s.wid = b.wid AND s.pid = b.pid
+        LEFT JOIN customer AS c ON c.cid = b.cid
+        WHERE b.error IS NULL
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN f.user_wid IS NULL
+            THEN format('Internal server error: Failed to get user with id %s', f.uid)
+        WHEN f.user_wid <> f.wid
+            THEN format('User (%s) works at warehouse %s, not %s', f.uid, f.user_wid, f.wid)
+        WHEN f.rid IS NULL
+            THEN format('No rack assigned to warehouse (%s) and part (%s)', f.wid, f.pid)
+        WHEN f.customer IS NULL
+            THEN format('Customer %s does not exist', f.cid)
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+
+    -- Running totals, over the rows that passed the checks above only
+    WITH facts AS (
+        SELECT b.row_no, b.part_amount, b.wid, s.parts_qty,
+               SUM(b.part_amount) OVER (PARTITION BY b.wid, b.pid ORDER BY b.row_no) AS quantity_needed
+        FROM bulk_staging AS b
+        LEFT JOIN stored_in AS s ON s.wid = b.wid AND s.pid = b.pid
+        WHERE b.error IS NULL
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN f.parts_qty < f.quantity_needed
+            THEN format('Not enough stock (%s) in warehouse (%s)',
+                        GREATEST(f.parts_qty - (f.quantity_needed - f.part_amount), 0), f.wid)
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+    """
+
+    APPLY_OUTGOING = """
+    UPDATE bulk_staging SET new_tid = nextval(pg_get_serial_sequence('transactions', 'tid')) WHERE error IS NULL;
+
+    INSERT INTO transactions (tid, tdate, part_amount, pid, uid, wid)
+    SELECT new_tid, tdate, part_amount, pid, uid, wid FROM bulk_staging WHERE error IS NULL ORDER BY row_no;
+
+    WITH inserted AS (
+        INSERT INTO outgoing_transaction (unit_sale_price, cid, tid)
+        SELECT unit_price, cid, new_tid FROM bulk_staging WHERE error IS NULL ORDER BY row_no
+        RETURNING otid, tid
+    )
+    UPDATE bulk_staging AS b SET new_id = inserted.otid FROM inserted WHERE b.new_tid = inserted.tid;
+
+    UPDATE stored_in AS s SET parts_qty = s.parts_qty - d.amount
+    FROM (SELECT wid, pid, SUM(part_amount) AS amount FROM bulk_staging WHERE error IS NULL GROUP BY wid, pid) AS d
+    WHERE s.wid = d.wid AND s.pid = d.pid;
+
+    UPDATE warehouse AS w SET wbudget = w.wbudget + d.revenue
+    FROM (SELECT wid, SUM(part_amount * unit_price) AS revenue FROM bulk_staging WHERE error IS NULL GROUP BY wid) AS d
+    WHERE w.wid = d.wid;
+    """
+
+    VALIDATE_TRANSFER = """
+    SELECT 1 FROM racks WHERE rid IN (SELECT to_rid FROM bulk_staging) ORDER BY rid FOR UPDATE;
+    SELECT 1 FROM stored_in
+    WHERE (wid, pid) IN (SELECT wid, pid FROM bulk_staging)
+    OR rid IN (SELECT to_rid FROM bulk_staging)
+    OR (wid, pid) IN (SELECT to_wid, pid FROM bulk_staging)
+    ORDER BY rid FOR UPDATE;
+
+    -- Checks that only depend on the row itself
+    WITH facts AS (
+        SELECT b.row_no, b.pid, b.wid, b.to_wid, b.to_rid,
+               sender.wid AS sender_wid, requester.wid AS requester_wid, p.pid AS part,
+               w.wid AS source_warehouse, tw.wid AS destination_warehouse,
+               source.rid AS source_rid, r.rcapacity,
+               rack.wid AS rack_wid, rack.pid AS rack_pid, assigned.rid AS assigned_rid
+        FROM bulk_staging AS b
+        LEFT JOIN users AS sender ON sender.uid = b.uid
+        LEFT JOIN users AS requester ON requester.uid = b.user_requester
+        LEFT JOIN parts AS p ON p.pid = b.pid
+        LEFT JOIN warehouse AS w ON w.wid = b.wid
+        LEFT JOIN warehouse AS tw ON tw.wid = b.to_wid
+        LEFT JOIN stored_in AS source ON source.wid = b.wid AND source.pid = b.pid
+        LEFT JOIN racks AS r ON r.rid = b.to_rid
+        LEFT JOIN stored_in AS rack ON rack.rid = b.to_rid
+        LEFT JOIN stored_in AS assigned ON assigned.wid = b.to_wid AND assigned.pid = b.pid
+        WHERE b.error IS NULL
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN f.sender_wid IS NULL
+            THEN 'Invalid Tranfer. The user who sent the transfer does not exist.'
+        WHEN f.requester_wid IS NULL
+            THEN 'Invalid Transfer. The user who requested the transfer does not exist.'
+        WHEN f.part IS NULL
+            THEN 'Invalid Transfer. The part does not exist.'
+        WHEN f.source_warehouse IS NULL
+            THEN 'Invalid Transfer. The warehouse who sent the transfer does not exist.'
+        WHEN f.destination_warehouse IS NULL
+            THEN 'Invalid Transfer. The warehouse that requested the warehouse does not exist.'
+        WHEN f.sender_wid <> f.wid
+            THEN 'Invalid Transfer. The user who sent the transfer does not work in the '
+                 'warehouse that will be sending the transfer.'
+        WHEN f.requester_wid <> f.to_wid
+            THEN 'Invalid Transfer. The user who requested the transfer does not work in the '
+                 'warehouse that will be receiving the transfer.'
+        WHEN f.source_rid IS NULL
+            THEN format('There is no rack for source warehouse (%s) and part (%s)', f.wid, f.pid)
+        WHEN COALESCE(f.rcapacity, 0) = 0
+            THEN format('Rack %s does not exist', f.to_rid)
+        WHEN f.rack_wid IS NOT NULL AND NOT (f.rack_wid = f.to_wid AND f.rack_pid = f.pid)
+            THEN format('Rack (%s) not assigned to warehouse (%s) and part (%s)', f.to_rid, f.to_wid, f.pid)
+        WHEN f.assigned_rid IS NOT NULL AND f.assigned_rid <> f.to_rid
+            THEN format('Warehouse (%s) and part (%s) assigned to rack %s, not %s',
+                        f.wid, f.pid, f.assigned_rid, f.to_rid)
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+
+    -- Running totals and rack claims, over the rows that passed the checks above only
+    WITH facts AS (
+        SELECT b.row_no, b.part_amount, b.pid, b.wid, b.to_wid, b.to_rid, source.parts_qty AS source_qty,
+               FIRST_VALUE(b.to_wid) OVER by_rack AS batch_rack_wid,
+               FIRST_VALUE(b.pid) OVER by_rack AS batch_rack_pid,
+               FIRST_VALUE(b.to_rid) OVER (PARTITION BY b.to_wid, b.pid ORDER BY b.row_no) AS batch_assigned_rid,
+               SUM(b.part_amount) OVER (PARTITION BY b.wid, b.pid ORDER BY b.row_no) AS quantity_needed
+        FROM bulk_staging AS b
+        LEFT JOIN stored_in AS source ON source.wid = b.wid AND source.pid = b.pid
+        WHERE b.error IS NULL
+        WINDOW by_rack AS (PARTITION BY b.to_rid ORDER BY b.row_no)
+    )
+    UPDATE bulk_staging AS b
+    SET error = CASE
+        WHEN f.source_qty < f.quantity_needed
+            THEN format('Not enough stock (%s) in warehouse (%s)',
+                        GREATEST(f.source_qty - (f.quantity_needed - f.part_amount), 0), f.wid)
+        WHEN NOT (f.batch_rack_wid = f.to_wid AND f.batch_rack_pid = f.pid)
+            THEN format('Rack (%s) not assigned to warehouse (%s) and part (%s)', f.to_rid, f.to_wid, f.pid)
+        WHEN f.batch_assigned_rid <> f.to_rid
+            THEN format('Warehouse (%s) and part (%s) assigned to rack %s, not %s',
+                        f.wid, f.pid, f.batch_assigned_rid, f.to_rid)
+    END
+    FROM facts AS f
+    WHERE f.row_no = b.row_no;
+    """
+
+    APPLY_TRANSFER = """
+    UPDATE bulk_staging SET new_tid = nextval(pg_get_serial_sequence('transactions', 'tid')) WHERE error IS NULL;
+
+    INSERT INTO transactions (tid, tdate, part_amount, pid, uid, wid)
+    SELECT new_tid, tdate, part_amount, pid, uid, wid FROM bulk_staging WHERE error IS NULL ORDER BY row_no;
+
+    WITH inserted AS (
+        INSERT INTO transfer (to_warehouse, user_requester, tid)
+        SELECT to_wid, user_requester, new_tid FROM bulk_staging WHERE error IS NULL ORDER BY row_no
+        RETURNING transferid, tid
+    )
+    UPDATE bulk_staging AS b SET new_id = inserted.transferid FROM inserted WHERE b.new_tid = inserted.tid;
+
+    UPDATE stored_in AS s SET parts_qty = s.parts_qty - d.amount
+    FROM (SELECT wid, pid, SUM(part_amount) AS amount FROM bulk_staging WHERE error IS NULL GROUP BY wid, pid) AS d
+    WHERE s.wid = d.wid AND s.pid = d.pid;
+
+    INSERT INTO stored_in (wid, pid, rid, parts_qty)
+    SELECT to_wid, pid, to_rid, SUM(part_amount) FROM bulk_staging WHERE error IS NULL GROUP BY to_wid, pid, to_rid
+    ON CONFLICT (wid, pid) DO UPDATE SET parts_qty = stored_in.parts_qty + EXCLUDED.parts_qty;
+    """
+
+    STATEMENTS = {
+        "incoming": (VALIDATE_INCOMING, APPLY_INCOMING),
+        "outgoing": (VALIDATE_OUTGOING, APPLY_OUTGOING),
+        "exchange": (VALIDATE_TRANSFER, APPLY_TRANSFER)
+    }
+
+
+    def postTransactions(self, kind: str, columns: tuple, rows: list) -> list | None:
+        """
+        Stages, validates and applies a batch of transactions of the given kind
+        ("incoming", "outgoing" or "exchange").
+        Each row is (row_no, *values) with values in the order of `columns`, the staging columns to load.
+        Returns a list of (row_no, error, new_id) tuples ordered by row_no, where error is None
+        for accepted rows, or None if the operation failed.
+        """
+        validate, apply = self.STATEMENTS[kind]
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with self.conn.cursor() as cursor:
+            try:
+                cursor.execute(self.STAGING_TABLE)
+                cursor.copy_expert(f"COPY bulk_staging (row_no, {', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                                   buffer)
+                cursor.execute(validate)
+                cursor.execute(apply)
+                cursor.execute("SELECT row_no, error, new_id FROM bulk_staging ORDER BY row_no;")
+                result = cursor.fetchall()
+                self._commit()
+                return result
+            except psycopg2.errors.Error as e:
+                print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+                return None
@@ -0,0 +1,189 @@
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+import psycopg2
+from Backend.dbconfig import cache_config
+from Backend import metrics
+from Backend.DAOs import instrumentation
+from Backend.DAOs.connection_pool import get_pool
+
+# Channel of the notifications sent by the triggers of sql_data/migrations/0002_entity_change_notifications.sql,
+# with '<table>:<id>' (or '<table>:*' when the table is truncated) as payload
+CHANNEL = "entity_changes"
+# Seconds between checks that the listening connection is still alive, and before reconnecting after a failure
+LISTENER_HEARTBEAT = 10.0
+LISTENER_RETRY = 5.0
+
+
+class EntityCache:
+    """
+    Rows of one table by id, least recently used evicted first beyond `max_entries`, each kept `ttl` seconds at most.
+    Every invalidation bumps the generation, so a row read before an invalidation is never stored after it.
+    """
+    def __init__(self, table: str, max_entries: int, ttl: float):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = self.misses = self.bypasses = 0
+        self._entries = OrderedDict()  # id -> (row, expiry)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple:
+        """Returns (True, row) if the id is cached and fresh, otherwise (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None: del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, row, generation: int):
+        """Stores a row read while the cache was at `generation`, unless something was invalidated since."""
+        with self._lock:
+            if generation != self.generation: return
+            self._entries[key] = (row, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str = None):
+        """Drops the row with the given id, or every row."""
+        with self._lock:
+            self.generation += 1
+            if key is None: self._entries.clear()
+            else: self._entries.pop(key, None)
+
+    def count_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits,
+                    "misses": self.misses, "bypasses": self.bypasses}
+
+
+CACHES = {table: EntityCache(table, cache_config["max_entries"], cache_config["ttl"])
+          for table in ("parts", "racks", "warehouse", "users")}
+
+
+def invalidate_all():
+    for cache in CACHES.values(): cache.invalidate()
+
+
+class _Listener:
+    """
+    Thread with a connection of its own that LISTENs for entity changes and invalidates the cached rows.
+    Started on the first cached lookup of each process, so every gunicorn worker gets its own after the fork.
+    Rows are only cached while it is connected: every cache is emptied when it (re)connects, since changes
+    made in between went unnoticed. It doesn't count as connected while a cached table lacks the trigger that
+    notifies its changes (migration 0002), as nothing would ever invalidate its rows.
+    """
+    def __init__(self):
+        self.pid = None
+        self.connected = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self.pid == os.getpid(): return
+        with self._lock:
+            if self.pid == os.getpid(): return
+            self.pid = os.getpid()
+            self.connected.clear()  # a listener inherited through a fork didn't survive it
+            threading.Thread(target=self._run, name="cache-listener", daemon=True).start()
+
+    def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(get_pool().dsn)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL};")
+                missing = self._unnotified_tables(conn)
+                if missing:
+                    # Checked again on every retry, so caching starts once the migrations are applied
+                    print(f"\n\nError in file: {__file__}\nNo change notifications for {', '.join(missing)}; "
+                          f"apply the migrations to cache them\n\n")
+                else:
+                    invalidate_all()
+                    self.connected.set()
+                    self._listen(conn)
+            except psycopg2.Error as e:
+                print(f"\n\nError in file: {__file__}\n{e}\n\n")
+            finally:
+                self.connected.clear()
+                invalidate_all()
+                if conn is not None: conn.close()
+            time.sleep(LISTENER_RETRY)
+
+    @staticmethod
+    def _unnotified_tables(conn) -> list:
+        """Returns the cached tables without their <table>_notify_change trigger."""
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT c.relname FROM pg_trigger AS t JOIN pg_class AS c ON c.oid = t.tgrelid
+                WHERE c.relname = ANY(%s) AND t.tgname = c.relname || '_notify_change' AND t.tgenabled <> 'D';
+                """, (list(CACHES),))
+            notified = {row[0] for row in cursor}
+        return [table for table in CACHES if table not in notified]
+
+    @staticmethod
+    def _listen(conn):
+        while True:
+            if not select.select([conn], [], [], LISTENER_HEARTBEAT)[0]:
+                # Nothing for a while: make sure the server is still there, or the failure raises
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1;")
+            conn.poll()
+            while conn.notifies:
+                table, _, key = conn.notifies.pop(0).payload.partition(":")
+                cache = CACHES.get(table)
+                if cache is None: continue
+                cache.invalidate(None if key == "*" else key)
+
+
+_listener = _Listener()
+
+
+def cached(table: str):
+    """
+    Serves a DAO lookup by id (the method's only argument) from the table's cache, reading through on a miss.
+    The cache is bypassed when the listener isn't connected, and for requests that already modified data,
+    which could read their own uncommitted changes. Failed or empty lookups are never cached.
+    """
+    cache = CACHES[table]
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, key):
+            if not cache_config["enabled"]: return method(self, key)
+            _listener.ensure_started()
+            stats = instrumentation.current()
+            if not _listener.connected.is_set() or (stats is not None and stats.writes):
+                cache.count_bypass()
+                metrics.CACHE_LOOKUPS.labels(table, "bypass").inc()
+                return method(self, key)
+
+            hit, row = cache.get(str(key))
+            metrics.CACHE_LOOKUPS.labels(table, "hit" if hit else "miss").inc()
+            if hit: return row
+            generation = cache.generation
+            row = method(self, key)
+            if row: cache.put(str(key), row, generation)
+            return row
+        return wrapper
+    return decorator
+
+
+def stats() -> dict:
+    """Counters of every cache of this process."""
+    return {"listening": _listener.connected.is_set(),
+            "caches": {table: cache.stats() for table, cache in CACHES.items()}}
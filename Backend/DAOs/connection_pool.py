@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from Backend.dbconfig import pg_config, pool_config
+from Backend.DAOs.instrumentation import InstrumentedCursor
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of psycopg2 connections shared by every DAO in the process.
+    Connections are opened lazily up to `max_connections`; once that many are checked out,
+    borrowers block until one is returned or `checkout_timeout` seconds pass.
+
+    The pool is fork-aware: when used from a different pid than the one that created it
+    (e.g. a gunicorn worker forked from a master that already touched the database),
+    it starts over with fresh connections instead of sharing the parent's sockets.
+
+    Borrowers give a connection back to the pool they borrowed it from, which may no longer be the
+    process-wide one after configure_pool().
+    """
+    def __init__(self, dsn: str, max_connections: int, checkout_timeout: float):
+        self.dsn = dsn
+        self.max_connections = max_connections
+        self.checkout_timeout = checkout_timeout
+        self.closed = False
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Condition()
+        self._idle = []  # connections ready to be handed out
+        self._size = 0  # open connections, idle or checked out
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Keep the parent's connections referenced: closing (or garbage collecting) them here
+            # would terminate the sessions the parent process is still using.
+            self._inherited = getattr(self, "_inherited", []) + self._idle
+            self._reset()
+
+    def getconn(self) -> psycopg2.extensions.connection:
+        """
+        Borrows a connection from the pool, opening a new one if the pool isn't full yet.
+        Raises PoolTimeoutError if none becomes available within the checkout timeout.
+        """
+        self._check_fork()
+        start = time.perf_counter()
+        conn = None
+        with self._lock:
+            while not self._idle and self._size >= self.max_connections:
+                remaining = self.checkout_timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.checkout_timeout}s "
+                        f"({self.max_connections} in use)")
+                self._lock.wait(remaining)
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                self._size += 1  # reserve the slot before connecting outside the lock
+            waited = time.perf_counter() - start
+            self._checkouts += 1
+            if waited > 0.001:
+                self._waits += 1
+                self._wait_time += waited
+                self._max_wait_time = max(self._max_wait_time, waited)
+
+        if conn is not None and not conn.closed:
+            return conn
+        if conn is not None:
+            with self._lock:
+                self._discarded += 1
+        try:
+            return psycopg2.connect(self.dsn, cursor_factory=InstrumentedCursor)
+        except psycopg2.Error:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+    def putconn(self, conn: psycopg2.extensions.connection):
+        """
+        Returns a borrowed connection to the pool.
+        Any transaction left open by the borrower is rolled back; broken connections are dropped,
+        and so is every connection returned once the pool is closed.
+        """
+        if self._pid != os.getpid():
+            return  # borrowed before a fork, belongs to the parent's pool
+        if self.closed and not conn.closed:
+            conn.close()  # rolls back whatever the borrower left open
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                conn.close()
+        with self._lock:
+            if conn.closed:
+                self._size -= 1
+                self._discarded += 1
+            else:
+                self._idle.append(conn)
+            self._lock.notify()
+
+    def closeall(self):
+        """
+        Closes the pool: its idle connections are closed now, and the checked out ones when they are returned.
+        """
+        with self._lock:
+            self.closed = True
+            for conn in self._idle:
+                conn.close()
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the pool counters, useful to size `max_connections` under load."""
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "max_connections": self.max_connections,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "total_wait_seconds": round(self._wait_time, 6),
+                "max_wait_seconds": round(self._max_wait_time, 6),
+                "timeouts": self._timeouts,
+                "discarded": self._discarded
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Returns the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                dsn = (
+                    f'host={pg_config["host"]} dbname={pg_config["dbname"]} '
+                    f'user={pg_config["user"]} password={pg_config["password"]}'
+                )
+                _pool = ConnectionPool(dsn,
+                                       max_connections=pool_config["max_connections"],
+                                       checkout_timeout=pool_config["checkout_timeout"])
+    return _pool
+
+
+def configure_pool(dsn: str) -> ConnectionPool:
+    """
+    Replaces the process-wide pool with one connected to the given database (benchmarks and scripts).
+    The previous pool is closed: its idle connections now, the checked out ones when they are returned.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+        _pool = ConnectionPool(dsn,
+                               max_connections=pool_config["max_connections"],
+                               checkout_timeout=pool_config["checkout_timeout"])
+    return _pool
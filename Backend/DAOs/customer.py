@@ -2,9 +2,10 @@ from Backend.DAOs.DAO import DAO
 
 
 class CustomerDAO(DAO):
-    def getAllCustomers(self):
+    def getAllCustomers(self, limit=None, after=None):
         return self._getAllEntries(table_name="customer",
-                                   columns=("cid", "cfname", "clname", "czipcode", "cphone"))
+                                   columns=("cid", "cfname", "clname", "czipcode", "cphone"),
+                                   id_name="cid", limit=limit, after=after)
 
     def searchByPhone(self, cphone, cid=None):
         with self.conn.cursor() as cur:
@@ -0,0 +1,134 @@
+import queue
+import threading
+from typing import Iterator
+import psycopg2
+from Backend.DAOs.DAO import DAO
+from Backend.DAOs.transaction import transaction_filters
+
+# COPY output is handed to the response in chunks of about this many bytes
+COPY_CHUNK = 64 * 1024
+# Chunks buffered between the COPY and a slow client before the COPY waits
+COPY_QUEUE = 16
+
+
+class _CopyWriter:
+    """
+    The file copy_expert writes the COPY output to, from its own thread.
+    Gathers the rows (one write each) into chunks and queues them for the response, at most COPY_QUEUE at a time.
+    """
+    def __init__(self):
+        self.chunks = queue.Queue(maxsize=COPY_QUEUE)
+        self.cancelled = threading.Event()
+        self.buffer = []
+        self.size = 0
+        self.error = None
+
+    def put(self, item):
+        # Waits for room in the queue, unless the response was abandoned and nobody will take it
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.size += len(data)
+        if self.size >= COPY_CHUNK: self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.put(b"".join(self.buffer))
+            self.buffer, self.size = [], 0
+
+
+class ExportDAO(DAO):
+    """Whole tables for analytics clients: as CSV straight from COPY, or as rows for columnar formats."""
+    # Per dataset: its query (without WHERE or ORDER BY), the keyset it is ordered by and its filters
+    DATASETS = {
+        "transactions": ("""
+                         SELECT transactions.tid, tdate, part_amount, pid, uid, wid,
+                             CASE
+                                 WHEN incoming_transaction.tid IS NOT NULL THEN 'INCOMING'
+                                 WHEN outgoing_transaction.tid IS NOT NULL THEN 'OUTGOING'
+                                 WHEN transfer.tid IS NOT NULL THEN 'TRANSFER'
+                                 ELSE 'NOT FOUND'
+                             END AS type
+                         FROM transactions
+                         LEFT OUTER JOIN transfer ON transactions.tid = transfer.tid
+                         LEFT OUTER JOIN incoming_transaction ON transactions.tid = incoming_transaction.tid
+                         LEFT OUTER JOIN outgoing_transaction ON transactions.tid = outgoing_transaction.tid
+                         """, ("tdate", "transactions.tid"), True, transaction_filters),
+        "inventory": ("""
+                      SELECT stored_in.wid, stored_in.pid, stored_in.rid, parts_qty, rcapacity
+                      FROM stored_in
+                      INNER JOIN racks ON racks.rid = stored_in.rid
+                      """, ("stored_in.wid", "stored_in.pid"), False,
+                      lambda wid=None, pid=None: (("stored_in.wid = %s", wid), ("stored_in.pid = %s", pid))),
+        "supplies": ("""
+                     SELECT sid, supplies.pid, stock, msrp
+                     FROM supplies
+                     INNER JOIN parts ON parts.pid = supplies.pid
+                     """, ("sid", "supplies.pid"), False,
+                     lambda sid=None, pid=None: (("sid = %s", sid), ("supplies.pid = %s", pid)))
+    }
+
+    def _exportQuery(self, dataset: str, **filters) -> tuple:
+        query, key, descending, dataset_filters = self.DATASETS[dataset]
+        return self._pageQuery(query, key=key, descending=descending, filters=dataset_filters(**filters))
+
+    def streamRows(self, dataset: str, **filters) -> Iterator | None:
+        """
+        Returns an iterator over the rows of the dataset, matching the given filters, through a server-side cursor,
+        or None if the query failed.
+        """
+        query, substitutions = self._exportQuery(dataset, **filters)
+        return self._stream_query(query, substitutions=substitutions)
+
+    def copyCSV(self, dataset: str, **filters) -> Iterator | None:
+        """
+        Runs COPY (<dataset query>) TO STDOUT as CSV with a header line. Returns an iterator over chunks of the
+        output as the server sends them, or None if the COPY failed to start.
+        The COPY runs on its own thread, so the output never has to fit in memory; if the iterator is closed early
+        the COPY is cancelled on the server.
+        """
+        query, substitutions = self._exportQuery(dataset, **filters)
+        conn = self.conn
+        with conn.cursor() as cursor:
+            statement = cursor.mogrify(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", substitutions)
+        writer = _CopyWriter()
+
+        def copy():
+            try:
+                with conn.cursor() as cursor:
+                    cursor.copy_expert(statement, writer)
+                writer.flush()
+            except psycopg2.errors.Error as e:
+                writer.error = e
+            finally:
+                writer.put(None)
+
+        thread = threading.Thread(target=copy, name=f"copy-{dataset}", daemon=True)
+        thread.start()
+        first = writer.chunks.get()
+        if writer.error is not None:
+            thread.join()
+            print(f"\n\nError in file: {__file__}\n{writer.error.pgerror}\n\n")
+            return None
+        return self._chunks(first, writer, thread, conn)
+
+    def _chunks(self, first, writer: _CopyWriter, thread: threading.Thread, conn) -> Iterator:
+        # Keeps the DAO (and the connection it may own) alive until the COPY is over
+        try:
+            chunk = first
+            while chunk is not None:
+                yield chunk
+                chunk = writer.chunks.get()
+            if writer.error is not None:
+                print(f"\n\nError in file: {__file__}\n{writer.error.pgerror}\n\n")
+        finally:
+            if thread.is_alive():
+                writer.cancelled.set()
+                conn.cancel()  # the COPY fails with query_canceled and the transaction is rolled back
+            thread.join()
@@ -0,0 +1,64 @@
+from Backend.DAOs.DAO import DAO
+
+
+class IdempotencyDAO(DAO):
+    """The responses stored for Idempotency-Key retries (sql_data/migrations/0003_idempotency_keys.sql)."""
+
+    def claim(self, key: str, fingerprint: bytes, ttl: int) -> tuple | None:
+        """
+        Claims the key for the current request, or finds the response stored for it. An expired key is claimed again.
+        The key is first locked for the rest of the transaction with an advisory lock that is never waited for, so a
+        retry sent while another request holds the key gives up at once instead of holding a pooled connection
+        until that request ends. The stored row is then read in a statement of its own, which sees the response
+        committed by a request that held the key before.
+        Returns (claimed, fingerprint, status, body), where the last three are None unless an earlier request with
+        the key committed (and are all None while another request holds the key), or None if a query failed.
+        """
+        locked = self._generic_retrieval_query(query="SELECT pg_try_advisory_xact_lock(hashtext(%s));",
+                                               substitutions=(key,))
+        if locked is None: return None
+        if not locked[0][0]: return False, None, None, None
+
+        stored = self._generic_retrieval_query(query="""
+                                               SELECT fingerprint, status, body
+                                               FROM idempotency_keys
+                                               WHERE key = %s AND expires_at >= now();
+                                               """,
+                                               substitutions=(key,))
+        if stored is None: return None
+        if stored: return (False, *stored[0])
+
+        claimed = self._generic_modification_query(query="""
+                                                   INSERT INTO idempotency_keys (key, fingerprint, expires_at)
+                                                   VALUES (%(key)s, %(fingerprint)s, now() + make_interval(secs => %(ttl)s))
+                                                   ON CONFLICT (key) DO UPDATE
+                                                       SET fingerprint = EXCLUDED.fingerprint, status = NULL,
+                                                           body = NULL, expires_at = EXCLUDED.expires_at
+                                                   RETURNING key;
+                                                   """,
+                                                   substitutions={"key": key, "fingerprint": fingerprint, "ttl": ttl})
+        if claimed is None: return None
+        return True, None, None, None
+
+
+    def record(self, key: str, status: int, body: bytes) -> tuple | None:
+        """Stores the response of the request that claimed the key. Returns the key, or None if the query failed."""
+        return self._generic_modification_query(query="""
+                                                UPDATE idempotency_keys
+                                                SET status = %s, body = %s
+                                                WHERE key = %s
+                                                RETURNING key;
+                                                """,
+                                                substitutions=(status, body, key))
+
+
+    def purgeExpired(self) -> int | None:
+        """Deletes the expired keys. Returns how many were deleted, or None if the query failed."""
+        result = self._generic_modification_query(query="""
+                                                  WITH purged AS (
+                                                      DELETE FROM idempotency_keys WHERE expires_at < now() RETURNING 1
+                                                  )
+                                                  SELECT count(*) FROM purged;
+                                                  """)
+        if result is None: return None
+        return result[0]
@@ -1,13 +1,26 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.transaction import transaction_filters
 
 class IncomingTransactionDAO(DAO):
-    def getAllIncomingTransaction(self):
-        return self._generic_retrieval_query(
-            """
+    def getAllIncomingTransaction(self, limit=None, after=None, start=None, end=None, wid=None, pid=None, uid=None,
+                                  stream=False):
+        """
+        Returns the incoming transactions, newest first, optionally filtered by date range, warehouse, part and user.
+        Paginated by (tdate, tid): `after` is the (tdate, tid) of the last transaction of the previous page.
+        Streamed through a server-side cursor if `stream` is set.
+        """
+        return self._getPage(
+            query="""
             SELECT itid, tdate, unit_buy_price, part_amount, sid, rid, tid, pid, uid, wid
             FROM incoming_transaction
-            NATURAL INNER JOIN transactions;
-            """
+            NATURAL INNER JOIN transactions
+            """,
+            key=("tdate", "tid"),
+            descending=True,
+            limit=limit,
+            after=after,
+            filters=transaction_filters(start, end, wid, pid, uid),
+            stream=stream
         )
     
 
@@ -35,6 +48,22 @@ class IncomingTransactionDAO(DAO):
         return itid
 
 
+    def postIncomingTransaction(self, unit_buy_price, sid, rid, tdate, part_amount, pid, uid, wid):
+        """
+        Validates and records an incoming transaction, updating supplier stock, warehouse budget
+        and rack quantity, in one round-trip through post_incoming_transaction() (see sql_data/3_functions.sql).
+        Returns a tuple (error_code, error_message, itid) where error_code is None on success,
+        or None if the query failed.
+        """
+        return self._generic_modification_query(
+            query="""
+            SELECT error_code, error_message, new_itid
+            FROM post_incoming_transaction(%s, %s, %s, %s, %s, %s, %s, %s);
+            """,
+            substitutions=(tdate, part_amount, unit_buy_price, pid, wid, rid, sid, uid)
+        )
+
+
     def modifyIncomingTransactionById(self, unit_buy_price, sid, rid, tdate, part_amount, pid, uid, wid, itid):
         result = self._generic_retrieval_query(
             query="""
@@ -0,0 +1,175 @@
+import logging
+import re
+import time
+from collections import Counter
+import psycopg2
+import psycopg2.extensions
+from flask import Flask, g, has_request_context, request
+from pythonjsonlogger import jsonlogger
+from Backend.dbconfig import instrumentation_config, slow_query_config
+from Backend import metrics
+from Backend.DAOs import slow_queries
+
+logger = logging.getLogger("sqlytes.queries")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(query) -> str:
+    """
+    Reduces a statement to its shape: literals and placeholders become ?, lists of them collapse to (?)
+    and whitespace is normalized, so the same query run with different values has the same shape.
+    """
+    if isinstance(query, bytes): query = query.decode(errors="replace")
+    shape = _LITERALS.sub("?", query.replace("%s", "?"))
+    shape = _LISTS.sub("(?)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class RequestStats:
+    """Database work done while handling one request."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.acquisitions = 0
+        self.acquire_time = 0.0
+        self.writes = 0  # statements that modified data, whose changes only this request sees until it commits
+        self.shapes = Counter()
+
+    def repeated_shapes(self, threshold: int) -> dict:
+        """Returns the statement shapes that ran more than `threshold` times, a sign of an N+1 access pattern."""
+        return {shape: times for shape, times in self.shapes.items() if times > threshold}
+
+
+def current() -> RequestStats | None:
+    """Returns the stats of the request being handled, or None outside of a request."""
+    if not has_request_context(): return None
+    return g.get("query_stats")
+
+
+def record_acquisition(seconds: float):
+    """Counts a connection checkout made for the current request and the time spent waiting for it."""
+    stats = current()
+    if stats is None: return
+    stats.acquisitions += 1
+    stats.acquire_time += seconds
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """
+    Cursor used by every pooled connection. Counts each statement it runs, its duration and the rows it returned
+    against the request being handled, so queries issued by any DAO method are accounted for.
+    Failed statements are also counted in the process metrics, and slow ones kept in the slow query log.
+    """
+    def _record(self, query, started: float, rows: int = None):
+        stats = current()
+        if stats is None: return
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+        if rows is None:
+            # Server-side cursors report their rows as they are fetched, not when the query runs
+            rows = self.rowcount if self.description is not None and self.name is None else 0
+        stats.rows += max(rows, 0)
+        shape = statement_shape(query)
+        stats.shapes[shape] += 1
+        if slow_queries.WRITES.search(shape): stats.writes += 1
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            super().execute(query, vars)
+        except psycopg2.Error as e:
+            metrics.record_db_error(e)
+            raise
+        finally:
+            self._record(query, started)
+        elapsed = time.perf_counter() - started
+        if elapsed * 1000 >= slow_query_config["threshold_ms"]:
+            slow_queries.capture(self, query, vars, elapsed)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        except psycopg2.Error as e:
+            metrics.record_db_error(e)
+            raise
+        finally:
+            self._record(query, started, rows=0)
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        except psycopg2.Error as e:
+            metrics.record_db_error(e)
+            raise
+        finally:
+            self._record(sql, started, rows=0)
+
+    def callproc(self, procname, parameters=None):
+        started = time.perf_counter()
+        try:
+            return super().callproc(procname, parameters)
+        except psycopg2.Error as e:
+            metrics.record_db_error(e)
+            raise
+        finally:
+            self._record(f"CALL {procname}", started)
+
+
+def _server_timing(stats: RequestStats, total: float) -> str:
+    return (f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries, {stats.rows} rows", '
+            f'db-acquire;dur={stats.acquire_time * 1000:.2f};desc="{stats.acquisitions} connections", '
+            f'app;dur={total * 1000:.2f}')
+
+
+def init_app(app: Flask):
+    """
+    Reports the database work of every request: as a Server-Timing header, as one structured log line
+    and as a warning when a statement shape repeats more than `n_plus_one_threshold` times.
+    """
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = RequestStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop("query_stats", None)
+        if stats is None: return response
+        total = time.perf_counter() - stats.started
+        response.headers.add("Server-Timing", _server_timing(stats, total))
+        if instrumentation_config["log_requests"]:
+            logger.info("request", extra={
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(total * 1000, 2),
+                "queries": stats.queries,
+                "db_ms": round(stats.db_time * 1000, 2),
+                "rows": stats.rows,
+                "connections": stats.acquisitions,
+                "acquire_ms": round(stats.acquire_time * 1000, 2)
+            })
+        threshold = instrumentation_config["n_plus_one_threshold"]
+        for shape, times in stats.repeated_shapes(threshold).items():
+            logger.warning("repeated statement", extra={
+                "method": request.method,
+                "path": request.path,
+                "times": times,
+                "threshold": threshold,
+                "statement": shape
+            })
+        return response
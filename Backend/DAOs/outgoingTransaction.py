@@ -1,13 +1,26 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.transaction import transaction_filters
 
 class OutgoingTransactionDAO(DAO):
-    def getAllOutgoingTransaction(self):
-        return self._generic_retrieval_query(
-            """
+    def getAllOutgoingTransaction(self, limit=None, after=None, start=None, end=None, wid=None, pid=None, uid=None,
+                                  stream=False):
+        """
+        Returns the outgoing transactions, newest first, optionally filtered by date range, warehouse, part and user.
+        Paginated by (tdate, tid): `after` is the (tdate, tid) of the last transaction of the previous page.
+        Streamed through a server-side cursor if `stream` is set.
+        """
+        return self._getPage(
+            query="""
             SELECT otid, tdate, unit_sale_price, part_amount, cid, tid, pid, uid, wid
             FROM outgoing_transaction
-            NATURAL INNER JOIN transactions;
-            """
+            NATURAL INNER JOIN transactions
+            """,
+            key=("tdate", "tid"),
+            descending=True,
+            limit=limit,
+            after=after,
+            filters=transaction_filters(start, end, wid, pid, uid),
+            stream=stream
         )
     
 
@@ -35,6 +48,23 @@ class OutgoingTransactionDAO(DAO):
         return otid
 
 
+    def postOutgoingTransaction(self, unit_sale_price, cid, tdate, part_amount, pid, uid, wid):
+        """
+        Validates and records an outgoing transaction, taking the parts out of the warehouse's rack
+        and adding the revenue to its budget, in one round-trip through post_outgoing_transaction()
+        (see sql_data/3_functions.sql).
+        Returns a tuple (error_code, error_message, otid) where error_code is None on success,
+        or None if the query failed.
+        """
+        return self._generic_modification_query(
+            query="""
+            SELECT error_code, error_message, new_otid
+            FROM post_outgoing_transaction(%s, %s, %s, %s, %s, %s, %s);
+            """,
+            substitutions=(tdate, part_amount, unit_sale_price, pid, wid, cid, uid)
+        )
+
+
     def modifyOutgoingTransactionById(self, unit_sale_price, cid, tdate, part_amount, pid, uid, wid, otid):
         result = self._generic_retrieval_query(
             query="""
@@ -1,18 +1,15 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.cache import cached
 
 
 class PartDAO(DAO):
-    def getAllParts(self):
-        # object utilized to send queries to the DB and to iterate through the results from the query
-        with self.conn.cursor() as cursor:
-            res = []
-            query = "SELECT pid, pname, pcolor, pmaterial, msrp FROM parts"
-            cursor.execute(query)
-
-            for row in cursor:
-                res.append(row)  # adding the rows
-            return res
+    def getAllParts(self, limit=None, after=None):
+        # one page of parts ordered by pid, or all of them without a limit
+        return self._getAllEntries(table_name="parts",
+                                   columns=("pid", "pname", "pcolor", "pmaterial", "msrp"),
+                                   id_name="pid", limit=limit, after=after)
 
+    @cached("parts")
     def searchByID(self, pid):
         with self.conn.cursor() as cursor:
             query = "SELECT pid, pname, pcolor, pmaterial, msrp FROM parts WHERE pid = %s"
@@ -25,7 +22,7 @@ class PartDAO(DAO):
             query = "INSERT INTO parts(pname, pcolor, pmaterial, msrp) VALUES (%s, %s, %s, %s) returning pid;"
             cursor.execute(query, (name, color, material, msrp))  # passing the args so it's more secure
             pid = cursor.fetchone()[0]
-            self.conn.commit()  # to save the changes
+            self._commit()  # to save the changes
             return pid
 
     def deleteByID(self, pid):
@@ -33,7 +30,7 @@ class PartDAO(DAO):
             query = "DELETE FROM parts WHERE pid = %s"
             cursor.execute(query, (pid,))
             count = cursor.rowcount
-            self.conn.commit()  # to save the changes
+            self._commit()  # to save the changes
             return count
 
     def updateByID(self, pid, name, color, material, msrp):
@@ -41,7 +38,7 @@ class PartDAO(DAO):
             query = "UPDATE parts set pname=%s, pcolor=%s, pmaterial=%s, msrp=%s where pid = %s;"
             cursor.execute(query, (name, color, material, msrp, pid,))  # passing the args so it's more secure
             count = cursor.rowcount
-            self.conn.commit()  # to save the changes
+            self._commit()  # to save the changes
             return count
 
     def inStock(self, pid):
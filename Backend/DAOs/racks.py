@@ -1,17 +1,13 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.cache import cached
 import psycopg2
 
 
 class RackDAO(DAO):
-    def getAllRacks(self):
-        with self.conn.cursor() as cur:
-            res = []
-            query = "select rid, rname, rcapacity from racks"
-            cur.execute(query)
-
-            for row in cur:
-                res.append(row)
-            return res
+    def getAllRacks(self, limit=None, after=None):
+        return self._getAllEntries(table_name="racks",
+                                   columns=("rid", "rname", "rcapacity"),
+                                   id_name="rid", limit=limit, after=after)
 
     def addRack(self, rname, rcapacity):
         with self.conn.cursor() as cur:
@@ -22,7 +18,7 @@ class RackDAO(DAO):
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
                 return None
             rid = cur.fetchone()[0]
-            self.conn.commit()
+            self._commit()
             return rid
 
     def getRackById(self, rid):
@@ -40,7 +36,7 @@ class RackDAO(DAO):
             cursor.execute(query, (rname, rcapacity, rid))
             count = cursor.rowcount
             print(count)
-            self.conn.commit()
+            self._commit()
             return count
 
     def deleteRackById(self, rid):
@@ -48,9 +44,10 @@ class RackDAO(DAO):
             query = "DELETE FROM racks WHERE rid = %s"
             cursor.execute(query, (rid,))
             count = cursor.rowcount
-            self.conn.commit()
+            self._commit()
             return count
     
+    @cached("racks")
     def get_capacity(self, rid):
         result = self._generic_retrieval_query(query="""
                                                SELECT rcapacity
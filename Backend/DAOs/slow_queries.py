@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import random
+import re
+import time
+import psycopg2
+import psycopg2.extensions
+from flask import has_request_context, request
+from Backend.dbconfig import slow_query_config
+
+# Propagates to the JSON handler of "sqlytes.queries" (see instrumentation.py)
+logger = logging.getLogger("sqlytes.queries.slow")
+
+_ENTRY_ID = re.compile(r"^\d+-\d+$")
+_SPACES = re.compile(r"\s+")
+# Only read statements are run again under EXPLAIN ANALYZE; calls to the posting and rebuild functions never are
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|post_\w+|rebuild_\w+)\b", re.IGNORECASE)
+
+
+def redact(vars) -> list | dict | None:
+    """Replaces the bound parameters by their type names, so customer and user data never reach the logs."""
+    if vars is None: return None
+    if isinstance(vars, dict):
+        return {name: type(value).__name__ for name, value in vars.items()}
+    if not isinstance(vars, (list, tuple)): vars = (vars,)
+    return [type(value).__name__ for value in vars]
+
+
+def _explainable(cursor, query) -> bool:
+    if not isinstance(query, str) or cursor.name is not None: return False
+    if not _EXPLAINABLE.match(query) or WRITES.search(query): return False
+    conn = cursor.connection
+    return not conn.autocommit and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+
+def _explain(cursor, query, vars) -> list | None:
+    """
+    Runs the statement again under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint, on a plain cursor so the
+    second run isn't instrumented itself. Returns the JSON plan, or None if it could not be captured.
+    """
+    with psycopg2.extensions.cursor(cursor.connection) as explain:
+        explain.execute("SAVEPOINT slow_query_explain;")
+        try:
+            explain.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", vars)
+            plan = explain.fetchone()[0]
+        except psycopg2.Error as e:
+            print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+            plan = None
+        explain.execute("ROLLBACK TO SAVEPOINT slow_query_explain;")
+        explain.execute("RELEASE SAVEPOINT slow_query_explain;")
+    return plan if plan is None or isinstance(plan, list) else json.loads(plan)
+
+
+def _store(entry: dict):
+    """
+    Writes the entry to the ring buffer directory and drops the oldest entries beyond `ring_size`.
+    Each entry is its own file, written atomically, so gunicorn workers can share the directory.
+    """
+    directory = slow_query_config["log_dir"]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{entry['id']}.json")
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(entry, file, default=str)
+    os.replace(f"{path}.tmp", path)
+    for stale in entry_ids()[slow_query_config["ring_size"]:]:
+        try:
+            os.remove(os.path.join(directory, f"{stale}.json"))
+        except FileNotFoundError:
+            pass  # pruned by another worker
+
+
+def capture(cursor, query, vars, seconds: float):
+    """Logs a statement that took longer than the threshold and keeps it, with a sampled plan, in the ring buffer."""
+    if isinstance(query, bytes): query = query.decode(errors="replace")
+    entry = {
+        "id": f"{time.time_ns()}-{os.getpid()}",
+        "duration_ms": round(seconds * 1000, 2),
+        "statement": _SPACES.sub(" ", str(query)).strip(),
+        "parameters": redact(vars),
+        "path": request.path if has_request_context() else None,
+        "plan": None
+    }
+    logger.warning("slow query", extra={key: value for key, value in entry.items() if key != "plan"})
+    try:
+        if random.random() < slow_query_config["explain_sample_rate"] and _explainable(cursor, query):
+            entry["plan"] = _explain(cursor, query, vars)
+        _store(entry)
+    except (psycopg2.Error, OSError) as e:
+        print(f"\n\nError in file: {__file__}\n{e}\n\n")
+
+
+def entry_ids() -> list:
+    """Returns the ids of the stored slow queries, newest first."""
+    try:
+        names = os.listdir(slow_query_config["log_dir"])
+    except FileNotFoundError:
+        return []
+    ids = [name[:-len(".json")] for name in names if name.endswith(".json")]
+    return sorted((i for i in ids if _ENTRY_ID.match(i)), key=lambda i: tuple(map(int, i.split("-"))), reverse=True)
+
+
+def get_entry(entry_id: str) -> dict | None:
+    """Returns the stored slow query with the given id, or None if there is none."""
+    if not _ENTRY_ID.match(entry_id): return None
+    try:
+        with open(os.path.join(slow_query_config["log_dir"], f"{entry_id}.json")) as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
@@ -2,15 +2,10 @@ from Backend.DAOs.DAO import DAO
 
 
 class SupplierDAO(DAO):
-    def getAllSuppliers(self):
-        with self.conn.cursor() as cur:
-            res = []
-            query = "select sid, sname, scountry, scity, sstreet, szipcode, sphone from supplier"
-            cur.execute(query)
-
-            for row in cur:
-                res.append(row)
-            return res
+    def getAllSuppliers(self, limit=None, after=None):
+        return self._getAllEntries(table_name="supplier",
+                                   columns=("sid", "sname", "scountry", "scity", "sstreet", "szipcode", "sphone"),
+                                   id_name="sid", limit=limit, after=after)
 
     def insertSupplier(self, name, country, city, street, zipcode, phone):
         with self.conn.cursor() as cur:
@@ -18,7 +13,7 @@ class SupplierDAO(DAO):
                     "%s) returning sid; "
             cur.execute(query, (name, country, city, street, zipcode, phone))
             sid = cur.fetchone()[0]
-            self.conn.commit()
+            self._commit()
             return sid
 
     def searchByID(self, sid):
@@ -57,7 +52,7 @@ class SupplierDAO(DAO):
 
             cur.execute(query, (sid,))
             count = cur.rowcount
-            self.conn.commit()
+            self._commit()
             return count
 
     def updateByID(self, sid, name, country, city, street, zipcode, phone):
@@ -66,7 +61,7 @@ class SupplierDAO(DAO):
                     "WHERE sid = %s; "
             cur.execute(query, (name, country, city, street, zipcode, phone, sid,))
             count = cur.rowcount
-            self.conn.commit()
+            self._commit()
             return count
 
     def suppliesParts(self, sid):
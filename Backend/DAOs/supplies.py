@@ -31,7 +31,7 @@ class SuppliesDao(DAO):
             try:
                 cursor.execute(query, (delta, pid, sid, delta))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -48,7 +48,7 @@ class SuppliesDao(DAO):
             try:
                 cursor.execute(query, (pid, sid))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -1,22 +1,43 @@
 from Backend.DAOs.DAO import DAO
 
+
+def transaction_filters(start=None, end=None, wid=None, pid=None, uid=None) -> tuple:
+    """Filters on the transactions table shared by every transaction list, for DAO._getPage."""
+    return (("transactions.tdate >= %s", start),
+            ("transactions.tdate <= %s", end),
+            ("transactions.wid = %s", wid),
+            ("transactions.pid = %s", pid),
+            ("transactions.uid = %s", uid))
+
+
 class TransactionDAO(DAO):
-    def getAllTransactions(self):
-        return self._generic_retrieval_query(query="""
-                                            SELECT transactions.tid, tdate, part_amount, pid, uid, wid,
-                                                CASE
-                                                    WHEN incoming_transaction.tid IS NOT NULL THEN 'INCOMING'
-                                                    WHEN outgoing_transaction.tid IS NOT NULL THEN 'OUTGOING'
-                                                    WHEN transfer.tid IS NOT NULL THEN 'TRANSFER'
-                                                    ELSE 'NOT FOUND'
-                                                END AS type
-                                            FROM transactions
-                                            LEFT OUTER JOIN transfer ON transactions.tid = transfer.tid
-                                            LEFT OUTER JOIN incoming_transaction ON transactions.tid = incoming_transaction.tid
-                                            LEFT OUTER JOIN outgoing_transaction ON transactions.tid = outgoing_transaction.tid
-                                            ORDER BY tdate DESC
-                                             """)
- 
+    def getAllTransactions(self, limit=None, after=None, start=None, end=None, wid=None, pid=None, uid=None,
+                           stream=False):
+        """
+        Returns the transactions, newest first, optionally filtered by date range, warehouse, part and user.
+        Paginated by (tdate, tid): `after` is the (tdate, tid) of the last transaction of the previous page.
+        Streamed through a server-side cursor if `stream` is set.
+        """
+        return self._getPage(query="""
+                            SELECT transactions.tid, tdate, part_amount, pid, uid, wid,
+                                CASE
+                                    WHEN incoming_transaction.tid IS NOT NULL THEN 'INCOMING'
+                                    WHEN outgoing_transaction.tid IS NOT NULL THEN 'OUTGOING'
+                                    WHEN transfer.tid IS NOT NULL THEN 'TRANSFER'
+                                    ELSE 'NOT FOUND'
+                                END AS type
+                            FROM transactions
+                            LEFT OUTER JOIN transfer ON transactions.tid = transfer.tid
+                            LEFT OUTER JOIN incoming_transaction ON transactions.tid = incoming_transaction.tid
+                            LEFT OUTER JOIN outgoing_transaction ON transactions.tid = outgoing_transaction.tid
+                             """,
+                             key=("tdate", "transactions.tid"),
+                             descending=True,
+                             limit=limit,
+                             after=after,
+                             filters=transaction_filters(start, end, wid, pid, uid),
+                             stream=stream)
+
     def getTransactionByID(self, tid):
         return self._generic_retrieval_query(query="""
                                             SELECT transactions.tid, tdate, part_amount, pid, uid, wid,
@@ -52,4 +73,36 @@ class TransactionDAO(DAO):
                                             OR transfer.to_warehouse = %s
                                             ORDER BY tdate DESC
                                              """,
-                                             substitutions=(wid, wid))
\ No newline at end of file
+                                             substitutions=(wid, wid))
+
+    def getValidationFacts(self, keys: list):
+        """
+        Loads what the transaction validations check, in one query, for each (uid, wid, pid, sid, rid) of `keys`
+        (any of them may be None): whether the user exists and its warehouse, whether the warehouse exists and its
+        budget, whether the part exists, the supplier's stock of the part, the rack's capacity, the (wid, pid) the
+        rack is assigned to, the quantity in the rack for the warehouse and part (0 if none), and the rack
+        assigned to the warehouse and part.
+        Returns one row per key, in order, or None if the query failed.
+        """
+        values = ", ".join(["(%s, %s::integer, %s::integer, %s::integer, %s::integer, %s::integer)"] * len(keys))
+        substitutions = [value for position, key in enumerate(keys) for value in (position, *key)]
+        return self._generic_retrieval_query(query=f"""
+                                             SELECT users.uid IS NOT NULL, users.wid,
+                                                 warehouse.wid IS NOT NULL, warehouse.wbudget,
+                                                 parts.pid IS NOT NULL,
+                                                 supplies.stock,
+                                                 racks.rcapacity, rack_entry.wid, rack_entry.pid,
+                                                 CASE WHEN part_entry.rid = ids.rid THEN part_entry.parts_qty ELSE 0 END,
+                                                 part_entry.rid
+                                             FROM (VALUES {values}) AS ids(position, uid, wid, pid, sid, rid)
+                                             LEFT OUTER JOIN users ON users.uid = ids.uid
+                                             LEFT OUTER JOIN warehouse ON warehouse.wid = ids.wid
+                                             LEFT OUTER JOIN parts ON parts.pid = ids.pid
+                                             LEFT OUTER JOIN supplies ON supplies.sid = ids.sid AND supplies.pid = ids.pid
+                                             LEFT OUTER JOIN racks ON racks.rid = ids.rid
+                                             LEFT OUTER JOIN stored_in AS rack_entry ON rack_entry.rid = ids.rid
+                                             LEFT OUTER JOIN stored_in AS part_entry
+                                                 ON part_entry.wid = ids.wid AND part_entry.pid = ids.pid
+                                             ORDER BY ids.position
+                                             """,
+                                             substitutions=substitutions)
@@ -1,13 +1,26 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.transaction import transaction_filters
 
 class TransferTransactionDAO(DAO):
-    def getAllTransferTransaction(self):
-        return self._generic_retrieval_query(
-            """
+    def getAllTransferTransaction(self, limit=None, after=None, start=None, end=None, wid=None, pid=None, uid=None,
+                                  stream=False):
+        """
+        Returns the transfer transactions, newest first, optionally filtered by date range, warehouse, part and user.
+        Paginated by (tdate, tid): `after` is the (tdate, tid) of the last transaction of the previous page.
+        Streamed through a server-side cursor if `stream` is set.
+        """
+        return self._getPage(
+            query="""
             SELECT transferid, tdate, part_amount, to_warehouse, user_requester, tid, pid, uid, wid
             FROM transfer
-            NATURAL INNER JOIN transactions;
-            """
+            NATURAL INNER JOIN transactions
+            """,
+            key=("tdate", "tid"),
+            descending=True,
+            limit=limit,
+            after=after,
+            filters=transaction_filters(start, end, wid, pid, uid),
+            stream=stream
         )
     
 
@@ -35,6 +48,22 @@ class TransferTransactionDAO(DAO):
         return transferid
 
 
+    def postTransferTransaction(self, to_warehouse, user_requester, to_rack, tdate, part_amount, pid, uid, wid):
+        """
+        Moves the parts between the source and destination racks and records the transfer
+        in one round-trip through post_transfer_transaction() (see sql_data/3_functions.sql).
+        Returns a tuple (error_code, error_message, transferid) where error_code is None on success,
+        or None if the query failed.
+        """
+        return self._generic_modification_query(
+            query="""
+            SELECT error_code, error_message, new_transferid
+            FROM post_transfer_transaction(%s, %s, %s, %s, %s, %s, %s, %s);
+            """,
+            substitutions=(tdate, part_amount, pid, wid, uid, to_warehouse, user_requester, to_rack)
+        )
+
+
     def modifyTransferTransactionById(self, to_warehouse, user_requester, tdate, part_amount, pid, uid, wid, transferid):
         tid = self._generic_retrieval_query(
             query="""
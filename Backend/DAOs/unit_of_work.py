@@ -0,0 +1,149 @@
+import time
+import psycopg2
+import psycopg2.extensions
+from flask import Flask, g, has_request_context
+from Backend.DAOs.connection_pool import get_pool
+from Backend.DAOs import instrumentation
+
+
+class UnitOfWork:
+    """
+    A single pooled connection, and therefore a single database transaction,
+    shared by every DAO used while handling one HTTP request.
+    DAO level commits are deferred: the unit commits once when the request succeeds
+    and rolls everything back if the request fails.
+    """
+    def __init__(self):
+        started = time.perf_counter()
+        self.pool = get_pool()  # the connection goes back to it even if the process-wide pool is replaced
+        self.conn = self.pool.getconn()
+        instrumentation.record_acquisition(time.perf_counter() - started)
+        self.finished = False
+
+
+    def commit(self):
+        self.finished = True
+        self.conn.commit()
+
+
+    def rollback(self):
+        self.finished = True
+        self.conn.rollback()
+
+
+    def finish(self, success: bool):
+        """
+        Commits if the request succeeded and the transaction is still usable, otherwise rolls back.
+        Raises the psycopg2 error if the commit itself fails.
+        """
+        if self.finished: return
+        in_error = self.conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INERROR
+        if success and not in_error:
+            self.commit()
+        else:
+            self.rollback()
+
+
+    def close(self):
+        """Rolls back anything left uncommitted and returns the connection to the pool."""
+        try:
+            if not self.finished and not self.conn.closed:
+                self.rollback()
+        finally:
+            self.pool.putconn(self.conn)
+
+
+class Savepoint:
+    """
+    The unit of work of one operation of a batch request (see Backend/handler/batch.py): it shares the batch's
+    connection and transaction, held in the batch request's `g`, and runs inside a savepoint taken when the
+    operation first uses the connection. Finishing releases the savepoint or rolls the operation back to it;
+    committing and releasing the connection are left to the batch.
+    """
+    def __init__(self, batch, name: str):
+        self.batch = batch
+        self.name = name
+        self.started = False
+        self.finished = False
+
+
+    @property
+    def conn(self):
+        unit = self.batch.get("unit_of_work")
+        if unit is None:
+            unit = self.batch.unit_of_work = UnitOfWork()
+        if not self.started:
+            with unit.conn.cursor() as cursor:
+                cursor.execute(f"SAVEPOINT {self.name};")
+            self.started = True
+        return unit.conn
+
+
+    def commit(self):
+        self.finished = True
+        if not self.started: return
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"RELEASE SAVEPOINT {self.name};")
+
+
+    def rollback(self):
+        self.finished = True
+        if not self.started: return
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {self.name}; RELEASE SAVEPOINT {self.name};")
+
+
+    def finish(self, success: bool):
+        """Releases the savepoint if the operation succeeded and the transaction is still usable, otherwise rolls back to it."""
+        if self.finished: return
+        in_error = self.started and self.conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INERROR
+        if success and not in_error:
+            self.commit()
+        else:
+            self.rollback()
+
+
+    def close(self):
+        """Rolls back to the savepoint anything the operation left unfinished. The connection stays with the batch."""
+        if self.finished: return
+        try:
+            self.rollback()
+        except psycopg2.Error as e:  # the batch's transaction is in error then, and is rolled back as a whole
+            print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+
+
+def current(create: bool = False) -> UnitOfWork | None:
+    """
+    Returns the unit of work of the request being handled, starting one if `create` is set.
+    Outside of a request (scripts, CLI commands) there is no unit of work and DAOs manage their own connection.
+    """
+    if not has_request_context(): return None
+    unit = g.get("unit_of_work")
+    if unit is None and create:
+        unit = g.unit_of_work = UnitOfWork()
+    return unit
+
+
+def init_app(app: Flask):
+    """Registers the request hooks that commit/roll back and release the request's unit of work."""
+
+    @app.after_request
+    def _finish_unit_of_work(response):
+        unit = current()
+        if unit is None: return response
+        # Streamed bodies are still reading from server-side cursors, which a commit would close.
+        # They are read-only: the transaction is rolled back when the stream ends and the request is torn down.
+        if response.is_streamed: return response
+        try:
+            unit.finish(success=response.status_code < 400)
+        except psycopg2.Error as e:
+            print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
+            response = app.json.response(Error="Failed to commit transaction")
+            response.status_code = 500
+        return response
+
+    @app.teardown_request
+    def _release_unit_of_work(exc):
+        unit = g.pop("unit_of_work", None)
+        if unit is not None:
+            unit.close()
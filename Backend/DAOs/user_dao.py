@@ -1,17 +1,21 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.cache import cached
 from typing import Iterable
 
 
 class UserDAO(DAO):
 
-    def getAllUsers(self) -> list:
+    def getAllUsers(self, limit=None, after=None) -> list:
         """Execute a query to get all the users from the Users Table in the database.
 
-        Return: all records from the Users Table in the database.
+        Return: all records from the Users Table in the database, ordered by uid
+        and paginated by `limit` and `after` (the uid of the last user of the previous page).
         """
         return self._getAllEntries(table_name="users",
-                                   columns=["uid", "ufname", "ulname", "username", "uemail", "upassword", "wid"])
+                                   columns=["uid", "ufname", "ulname", "username", "uemail", "upassword", "wid"],
+                                   id_name="uid", limit=limit, after=after)
 
+    @cached("users")
     def getUserByID(self, uid: int) -> list:
         """Execute a query to get a user from the Users Table in the database.
 
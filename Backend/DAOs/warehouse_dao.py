@@ -1,4 +1,5 @@
 from Backend.DAOs.DAO import DAO
+from Backend.DAOs.cache import cached
 import psycopg2
 
 
@@ -15,10 +16,11 @@ class WarehouseDAO(DAO):
         if not count: return None
         return count[0][0] > 0
 
-    def getAllWarehouses(self):
+    def getAllWarehouses(self, limit=None, after=None):
         """Execute a query to get all the warehouses from the Warehouses Table in the database.
         
-        Return: all records from the Warehouses Table in the database.
+        Return: all records from the Warehouses Table in the database, ordered by wid
+        and paginated by `limit` and `after` (the wid of the last warehouse of the previous page).
         """
         return self._getAllEntries(table_name="warehouse",
                                    columns=("wid",
@@ -28,7 +30,8 @@ class WarehouseDAO(DAO):
                                             "wcity",
                                             "wstreet",
                                             "wzipcode",
-                                            "wbudget"))
+                                            "wbudget"),
+                                   id_name="wid", limit=limit, after=after)
 
     def insertWarehouse(self, warehouse_name: str,
                         warehouse_country: str,
@@ -62,6 +65,7 @@ class WarehouseDAO(DAO):
                                       warehouse_zipcode,
                                       warehouse_budget])
 
+    @cached("warehouse")
     def getWarehouseByID(self, wid: int):
         """Execute a query to get a warehouse from the Warehouses Table in the database.
         
@@ -160,7 +164,7 @@ class WarehouseDAO(DAO):
             try:
                 cursor.execute(query, (delta, wid, delta))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -180,7 +184,7 @@ class WarehouseDAO(DAO):
             try:
                 cursor.execute(query, (delta, wid))
                 count = cursor.rowcount
-                self.conn.commit()
+                self._commit()
                 return count
             except psycopg2.errors.Error as e:
                 print(f"\n\nError in file: {__file__}\n{e.pgerror}\n\n")
@@ -259,11 +263,14 @@ class WarehouseDAO(DAO):
         return res is not None and res != []
 
     # For Global/Local statistics
+    # The global statistics read the rollups kept by the triggers in sql_data/4_statistics.sql.
+    # Only warehouses/users with a non-zero counter are ranked, like the inner joins they replace.
+
     def get_top_racks(self):
         """Part of the global statistics. Gets the top 10 warehouses with the most racks."""
-        query = """SELECT wname as warehouse, COUNT(rid) as rack_count
-                    FROM warehouse NATURAL INNER JOIN stored_in
-                    GROUP BY wname
+        query = """SELECT wname as warehouse, rack_count
+                    FROM warehouse_rack_stats NATURAL INNER JOIN warehouse
+                    WHERE rack_count > 0
                     ORDER BY rack_count DESC
                     LIMIT 10;"""
         return self._generic_retrieval_query(query)
@@ -271,81 +278,77 @@ class WarehouseDAO(DAO):
     def get_most_exchanges(self):
         """Part of the global statistics. Gets the top 5 warehouses
         with the most exchanges/transfers."""
-        query = """SELECT wname as warehouse, COUNT(*) as total_transfers
-                    FROM warehouse
-                    NATURAL INNER JOIN transactions
-                    NATURAL INNER JOIN transfer
-                    GROUP BY wname
-                    ORDER BY total_transfers DESC
+        query = """SELECT wname as warehouse, transfer_count as total_transfers
+                    FROM warehouse_stats NATURAL INNER JOIN warehouse
+                    WHERE transfer_count > 0
+                    ORDER BY transfer_count DESC
                     LIMIT 5;"""
         return self._generic_retrieval_query(query)
 
     def get_top_user_transactions(self):
         """Part of the global statistics. Gets the top 3 users that made the most transactions."""
-        query = """SELECT ufname as first_name, ulname as last_name, COUNT(*) as transaction_count
-                    FROM users
-                    NATURAL INNER JOIN transactions
-                    GROUP BY ufname, ulname
-                    ORDER BY transaction_count DESC
+        query = """SELECT ufname as first_name, ulname as last_name, user_stats.transaction_count
+                    FROM user_stats INNER JOIN users ON users.uid = user_stats.uid
+                    WHERE user_stats.transaction_count > 0
+                    ORDER BY user_stats.transaction_count DESC
                     LIMIT 3;"""
         return self._generic_retrieval_query(query)
 
     def get_least_outgoing(self):
         """Part of the global statistics. Gets the top 3 warehouses
         with the least outgoing transactions."""
-        query = """SELECT wname as warehouse, COUNT(otid) as total_outgoing_transactions
-                    FROM warehouse
-                    NATURAL INNER JOIN transactions
-                    NATURAL INNER JOIN outgoing_transaction
-                    GROUP BY wname
-                    ORDER BY total_outgoing_transactions ASC
+        query = """SELECT wname as warehouse, outgoing_count as total_outgoing_transactions
+                    FROM warehouse_stats NATURAL INNER JOIN warehouse
+                    WHERE outgoing_count > 0
+                    ORDER BY outgoing_count ASC
                     LIMIT 3;"""
         return self._generic_retrieval_query(query)
 
     def get_most_incoming(self):
         """Part of the global statistics. Top 5 warehouses with the most incoming transactions."""
-        query = """SELECT wname as warehouse, COUNT(*) as total_incoming_transactions
-                    FROM warehouse
-                    NATURAL INNER JOIN transactions
-                    NATURAL INNER JOIN incoming_transaction
-                    GROUP BY wname
-                    ORDER BY total_incoming_transactions DESC
+        query = """SELECT wname as warehouse, incoming_count as total_incoming_transactions
+                    FROM warehouse_stats NATURAL INNER JOIN warehouse
+                    WHERE incoming_count > 0
+                    ORDER BY incoming_count DESC
                     LIMIT 5;"""
         return self._generic_retrieval_query(query)
 
     def get_most_city(self):
-        """Part of the global statistics. Top 3 warehouse cities with the most transactions."""
-        query = """SELECT wcity as warehouse_city, COUNT(*) as total_transactions
-                    FROM warehouse
-                    NATURAL INNER JOIN transactions
+        """Part of the global statistics. Top 3 warehouse cities with the most transactions.
+        Aggregates one counter per warehouse rather than every transaction."""
+        query = """SELECT wcity as warehouse_city, SUM(transaction_count) as total_transactions
+                    FROM warehouse_stats NATURAL INNER JOIN warehouse
+                    WHERE transaction_count > 0
                     GROUP BY wcity
                     ORDER BY total_transactions DESC
                     LIMIT 3;
                     """
         return self._generic_retrieval_query(query)
 
-    def get_profit_yearly(self, wid: int):
-        """Part of the local statistics. Returns specified warehouse's profit by year."""
-        query = """WITH net_expenses AS (
-                    SELECT t.tid,
-                    COALESCE(SUM(ot.unit_sale_price * t.part_amount), 0) AS total_earnings,
-                    COALESCE(SUM(it.unit_buy_price * t.part_amount), 0) AS total_costs
-                    FROM transactions as t
-                    LEFT JOIN outgoing_transaction as ot ON t.tid = ot.tid
-                    LEFT JOIN incoming_transaction as it ON t.tid = it.tid
-                    GROUP BY t.tid
-                )
-                
-                SELECT EXTRACT(YEAR FROM tdate) AS year,
-                wname AS warehouse,
-                SUM(ne.total_earnings - ne.total_costs) AS net_profit
-                FROM warehouse
-                NATURAL INNER JOIN transactions
-                NATURAL INNER JOIN net_expenses as ne
-                WHERE wid = %s
-                GROUP BY year, wname
-                ORDER BY year DESC;"""
-        return self._generic_retrieval_query(query, substitutions=wid)
+    def get_profit(self, wid: int, monthly: bool = False, start: tuple = None, end: tuple = None):
+        """Part of the local statistics. Returns specified warehouse's profit by year, or by month,
+        from its ledger (see sql_data/5_ledger.sql). `start` and `end` are optional inclusive
+        (year, month) bounds."""
+        period = "year, month" if monthly else "year"
+        conditions = ["wid = %s"]
+        substitutions = [wid]
+        if start is not None:
+            conditions.append("(year, month) >= (%s, %s)")
+            substitutions.extend(start)
+        if end is not None:
+            conditions.append("(year, month) <= (%s, %s)")
+            substitutions.extend(end)
+        query = f"""SELECT {period}, wname AS warehouse, SUM(earnings - costs) AS net_profit
+                    FROM warehouse_ledger
+                    NATURAL INNER JOIN warehouse
+                    WHERE {' AND '.join(conditions)}
+                    GROUP BY {period}, wname
+                    ORDER BY {period} DESC;"""
+        return self._generic_retrieval_query(query, substitutions=substitutions)
+
+    def rebuild_ledger(self):
+        """Recomputes every warehouse's ledger from the transactions. Returns None if the operation failed."""
+        return self._generic_modification_query("SELECT rebuild_ledger();")
 
     def get_bottom_racks(self, wid: int):
         """Part of the local statistics. Returns bottom 3 racks by material/type in a warehouse."""
@@ -0,0 +1,299 @@
+import glob
+import math
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+import psycopg2
+from Backend import datagen, migrations
+from Backend.DAOs.connection_pool import configure_pool
+from Backend.DAOs.bulkTransaction import BulkTransactionDAO
+from Backend.DAOs.incomingTransaction import IncomingTransactionDAO
+from Backend.DAOs.outgoingTransaction import OutgoingTransactionDAO
+from Backend.DAOs.transferTransaction import TransferTransactionDAO
+from Backend.DAOs.warehouse_dao import WarehouseDAO
+
+SQL_DATA = Path(__file__).parent.parent / "sql_data"
+# The schema and the server-side functions, statistics and ledger the DAOs rely on; 2_data.sql is not loaded
+SCHEMA_FILES = ("1_schema.sql", "3_functions.sql", "4_statistics.sql", "5_ledger.sql")
+SIZES = (10000, 100000, 1000000)
+# Rows per bulk posting
+BULK_ROWS = 100
+
+GLOBAL_STATISTICS = ("get_top_racks", "get_most_exchanges", "get_top_user_transactions", "get_least_outgoing",
+                     "get_most_incoming", "get_most_city")
+LOCAL_STATISTICS = ("get_bottom_racks", "get_most_user_exchanges", "get_most_expensive_racks", "get_least_daily_cost",
+                    "get_least_rack_stock", "get_most_suppliers")
+
+
+def find_pg_bin(explicit: str = None) -> str:
+    """Returns the directory with initdb and pg_ctl: the given one, PATH, pg_config or the Debian layout."""
+    candidates = [explicit] if explicit else []
+    if shutil.which("initdb"):
+        candidates.append(os.path.dirname(shutil.which("initdb")))
+    try:
+        candidates.append(subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True,
+                                         check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), key=lambda path: int(path.split("/")[-2]),
+                         reverse=True)
+    for directory in candidates:
+        if directory and os.path.exists(os.path.join(directory, "initdb")):
+            return directory
+    raise RuntimeError("PostgreSQL server binaries (initdb, pg_ctl) not found; pass their directory with --pg-bin")
+
+
+class DisposablePostgres:
+    """
+    A throwaway PostgreSQL cluster in a temporary directory, reachable only through a unix socket in that
+    directory. Stopped and deleted on exit.
+    """
+    USER = "bench"
+
+    def __init__(self, pg_bin: str = None, log=print):
+        self.bin = find_pg_bin(pg_bin)
+        self.log = log
+        self.directory = None
+        self.port = None
+
+    def _run(self, program: str, *args):
+        subprocess.run([os.path.join(self.bin, program), *args], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="sqlytes-pg-")
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        data = os.path.join(self.directory, "data")
+        try:
+            self._run("initdb", "-D", data, "-U", self.USER, "-A", "trust", "-E", "UTF8", "--no-sync")
+            self._run("pg_ctl", "-D", data, "-l", os.path.join(self.directory, "server.log"), "-w", "start",
+                      "-o", f"-p {self.port} -k {self.directory} -c listen_addresses=''")
+        except subprocess.CalledProcessError:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            raise
+        self.log(f"Started PostgreSQL in {self.directory}")
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._run("pg_ctl", "-D", os.path.join(self.directory, "data"), "-m", "fast", "-w", "stop")
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def dsn(self, dbname: str = "postgres") -> str:
+        return f"host={self.directory} port={self.port} user={self.USER} dbname={dbname}"
+
+    def create_database(self, dbname: str) -> str:
+        """Creates a database with the schema, functions and migrations applied. Returns its DSN."""
+        conn = psycopg2.connect(self.dsn())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {dbname};")
+            cursor.execute(f"CREATE DATABASE {dbname};")
+        conn.close()
+        conn = psycopg2.connect(self.dsn(dbname))
+        with conn.cursor() as cursor:
+            for name in SCHEMA_FILES:
+                cursor.execute((SQL_DATA / name).read_text())
+        conn.commit()
+        conn.close()
+        return self.dsn(dbname)
+
+    def drop_database(self, dbname: str):
+        conn = psycopg2.connect(self.dsn())
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {dbname};")
+        conn.close()
+
+    def version(self) -> str:
+        conn = psycopg2.connect(self.dsn())
+        with conn.cursor() as cursor:
+            cursor.execute("SHOW server_version;")
+            version = cursor.fetchone()[0]
+        conn.close()
+        return version
+
+
+def _time(call, repeat: int) -> dict:
+    """Runs `call` once to warm up, then `repeat` times. Returns the timings in ms and any error."""
+    error = call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        error = call() or error
+        timings.append((time.perf_counter() - started) * 1000)
+    result = {"min_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3),
+              "max_ms": round(max(timings), 3)}
+    if error: result["error"] = error
+    return result
+
+
+def _fixtures(dsn: str, uses: int) -> dict:
+    """
+    Finds BULK_ROWS valid argument sets per posting path, each able to take `uses` postings of one part:
+    racks with room and a supplier with stock, racks with stock, and pairs of racks of the same part.
+    """
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT * FROM (
+                SELECT s.wid, s.pid, s.rid,
+                       (SELECT sid FROM supplies WHERE pid = s.pid AND stock >= %(uses)s ORDER BY sid LIMIT 1),
+                       (SELECT uid FROM users WHERE wid = s.wid ORDER BY uid LIMIT 1)
+                FROM stored_in AS s JOIN racks AS r ON r.rid = s.rid
+                WHERE r.rcapacity - s.parts_qty >= %(uses)s
+            ) AS f WHERE sid IS NOT NULL AND uid IS NOT NULL ORDER BY wid, pid LIMIT %(rows)s;
+            """, {"uses": uses, "rows": BULK_ROWS})
+        incoming = cursor.fetchall()
+        cursor.execute("""
+            SELECT * FROM (
+                SELECT s.wid, s.pid, (SELECT uid FROM users WHERE wid = s.wid ORDER BY uid LIMIT 1) AS uid,
+                       (SELECT MIN(cid) FROM customer)
+                FROM stored_in AS s WHERE s.parts_qty >= %(uses)s
+            ) AS f WHERE uid IS NOT NULL ORDER BY wid, pid LIMIT %(rows)s;
+            """, {"uses": uses, "rows": BULK_ROWS})
+        outgoing = cursor.fetchall()
+        cursor.execute("""
+            SELECT * FROM (
+                SELECT a.wid, a.pid, (SELECT uid FROM users WHERE wid = a.wid ORDER BY uid LIMIT 1) AS uid,
+                       b.wid AS to_wid, (SELECT uid FROM users WHERE wid = b.wid ORDER BY uid LIMIT 1) AS requester,
+                       b.rid
+                FROM stored_in AS a
+                JOIN stored_in AS b ON b.pid = a.pid AND b.wid <> a.wid
+                JOIN racks AS r ON r.rid = b.rid
+                WHERE a.parts_qty >= %(uses)s AND r.rcapacity - b.parts_qty >= %(uses)s
+            ) AS f WHERE uid IS NOT NULL AND requester IS NOT NULL ORDER BY wid, pid LIMIT %(rows)s;
+            """, {"uses": uses, "rows": BULK_ROWS})
+        transfers = cursor.fetchall()
+    conn.close()
+    return {"incoming": incoming, "outgoing": outgoing, "exchange": transfers}
+
+
+def _posting_error(result) -> str | None:
+    if result is None: return "query failed"
+    return result[1] if result[0] else None
+
+
+def _bulk_error(result) -> str | None:
+    if result is None: return "query failed"
+    errors = [error for row_no, error, new_id in result if error]
+    return errors[0] if errors else None
+
+
+def _benchmark_postings(dsn: str, repeat: int) -> dict:
+    """Times the single and bulk posting paths, one part per posting, committing each like a request would."""
+    fixtures = _fixtures(dsn, uses=2 * (repeat + 1))
+    today = date.today()
+    results = {}
+    if fixtures["incoming"]:
+        wid, pid, rid, sid, uid = fixtures["incoming"][0]
+        dao = IncomingTransactionDAO()
+        results["post_incoming"] = _time(lambda: _posting_error(
+            dao.postIncomingTransaction(1.0, sid, rid, today, 1, pid, uid, wid)), repeat)
+        dao.release()
+        rows = [(n, today, 1, 1.0, pid, wid, rid, sid, uid) for n, (wid, pid, rid, sid, uid)
+                in enumerate(fixtures["incoming"], start=1)]
+        dao = BulkTransactionDAO()
+        results[f"bulk_incoming_{len(rows)}"] = _time(lambda: _bulk_error(dao.postTransactions(
+            "incoming", ("tdate", "part_amount", "unit_price", "pid", "wid", "rid", "sid", "uid"), rows)), repeat)
+        dao.release()
+    if fixtures["outgoing"]:
+        wid, pid, uid, cid = fixtures["outgoing"][0]
+        dao = OutgoingTransactionDAO()
+        results["post_outgoing"] = _time(lambda: _posting_error(
+            dao.postOutgoingTransaction(1.0, cid, today, 1, pid, uid, wid)), repeat)
+        dao.release()
+        rows = [(n, today, 1, 1.0, pid, wid, cid, uid) for n, (wid, pid, uid, cid)
+                in enumerate(fixtures["outgoing"], start=1)]
+        dao = BulkTransactionDAO()
+        results[f"bulk_outgoing_{len(rows)}"] = _time(lambda: _bulk_error(dao.postTransactions(
+            "outgoing", ("tdate", "part_amount", "unit_price", "pid", "wid", "cid", "uid"), rows)), repeat)
+        dao.release()
+    if fixtures["exchange"]:
+        wid, pid, uid, to_wid, requester, to_rid = fixtures["exchange"][0]
+        dao = TransferTransactionDAO()
+        results["post_transfer"] = _time(lambda: _posting_error(
+            dao.postTransferTransaction(to_wid, requester, to_rid, today, 1, pid, uid, wid)), repeat)
+        dao.release()
+        rows = [(n, today, 1, pid, wid, uid, to_wid, requester, to_rid)
+                for n, (wid, pid, uid, to_wid, requester, to_rid) in enumerate(fixtures["exchange"], start=1)]
+        dao = BulkTransactionDAO()
+        results[f"bulk_transfer_{len(rows)}"] = _time(lambda: _bulk_error(dao.postTransactions(
+            "exchange", ("tdate", "part_amount", "pid", "wid", "uid", "to_wid", "user_requester", "to_rid"), rows)),
+            repeat)
+        dao.release()
+    return results
+
+
+def _busiest_warehouse(dsn: str) -> int:
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT wid FROM transactions GROUP BY wid ORDER BY COUNT(*) DESC LIMIT 1;")
+        row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 1
+
+
+def _benchmark_statistics(dsn: str, repeat: int) -> dict:
+    """Times every global statistic and every local statistic of the warehouse with the most transactions."""
+    wid = _busiest_warehouse(dsn)
+    dao = WarehouseDAO()
+    results = {}
+    for name in GLOBAL_STATISTICS:
+        results[name] = _time(lambda: None if getattr(dao, name)() is not None else "query failed", repeat)
+    for name in LOCAL_STATISTICS + ("get_profit",):
+        results[name] = _time(lambda: None if getattr(dao, name)(wid) is not None else "query failed", repeat)
+    dao.release()
+    return results
+
+
+def _scaling(results: dict, sizes: tuple) -> dict:
+    """
+    Per query, the exponent k of time ~ size^k between the smallest and largest size:
+    about 0 means flat, about 1 linear and more than 1 worse than linear.
+    """
+    small, large = str(min(sizes)), str(max(sizes))
+    exponents = {}
+    for name, by_size in results.items():
+        if small not in by_size or large not in by_size or small == large: continue
+        before, after = by_size[small]["median_ms"], by_size[large]["median_ms"]
+        if before <= 0 or after <= 0: continue
+        exponents[name] = round(math.log(after / before) / math.log(int(large) / int(small)), 2)
+    return exponents
+
+
+def run(sizes: tuple = SIZES, repeat: int = 5, workers: int = None, pg_bin: str = None, log=print) -> dict:
+    """
+    For every size (a number of transactions), loads a fresh database of that scale in a disposable cluster
+    and times the statistics queries and the posting paths.
+    Returns {"postgres", "repeat", "sizes", "results": {query: {size: timings}}, "scaling": {query: exponent}}.
+    """
+    results = {}
+    with DisposablePostgres(pg_bin, log) as server:
+        version = server.version()
+        for size in sizes:
+            dbname = f"sqlytes_bench_{size}"
+            dsn = server.create_database(dbname)
+            configure_pool(dsn)
+            migrations.migrate(log)
+            datagen.generate(datagen.Scale(warehouses=max(10, size // 5000), parts=max(100, size // 1000),
+                                           transactions=size), workers, log)
+            log(f"Timing {size} transactions")
+            timings = _benchmark_statistics(dsn, repeat)
+            timings.update(_benchmark_postings(dsn, repeat))
+            for name, timing in timings.items():
+                results.setdefault(name, {})[str(size)] = timing
+                log(f"{name:<28} {size:>9} {timing['median_ms']:>10.2f} ms {timing.get('error', '')}")
+            configure_pool(server.dsn())  # closes the pooled connections to the benchmark database
+            server.drop_database(dbname)
+    return {"postgres": version, "repeat": repeat, "sizes": list(sizes), "results": results,
+            "scaling": _scaling(results, sizes)}
@@ -0,0 +1,217 @@
+import gc
+import json
+import platform
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable
+from flask import current_app
+from Backend.DAOs.DAO import DAO
+from Backend.DAOs.transaction import TransactionDAO
+from Backend.handler.customer import CustomerHandler
+from Backend.handler.incomingTransaction import IncomingTransactionHandler
+from Backend.handler.outgoingTransaction import OutgoingTransactionHandler
+from Backend.handler.parts import PartHandler
+from Backend.handler.racks import RackHandler
+from Backend.handler.serialization import RowMapper
+from Backend.handler.suppliers import SupplierHandler
+from Backend.handler.supplies import SuppliesHandler
+from Backend.handler.transaction import TransactionHandler
+from Backend.handler.transferTransaction import TransferTransactionHandler
+from Backend.handler.user_handler import UserHandler
+from Backend.handler.warehouse_handler import WarehouseHandler
+
+BASELINE = Path(__file__).parent / "baseline.json"
+SIZES = (1000, 100000, 1000000)
+FIRST_DATE = date(2019, 1, 1)
+
+
+class StubCursor:
+    """Stands in for a psycopg2 cursor: every query "returns" the prepared rows, without a database."""
+    def __init__(self, rows: list, name: str = None):
+        self.rows = rows
+        self.name = name
+        self.itersize = 2000
+        self.closed = False
+        self.connection = None
+        self.description = None
+
+    def execute(self, query, vars=None):
+        self.description = ()
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class StubConnection:
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.closed = False
+
+    def cursor(self, name: str = None):
+        cursor = StubCursor(self.rows, name)
+        cursor.connection = self
+        return cursor
+
+    def commit(self):
+        pass
+
+
+@dataclass
+class Benchmark:
+    name: str
+    row: Callable  # builds the i-th synthetic row
+    run: Callable  # does the measured work over the rows
+
+
+def _day(i: int) -> date:
+    return FIRST_DATE + timedelta(days=i % 1825)
+
+
+def _serialize(mapper: RowMapper) -> Callable:
+    """The handler path of a list response: the rows mapped to dicts, then the list encoded as JSON."""
+    return lambda rows: current_app.json.dumps(mapper.many(rows))
+
+
+def _dao_query(rows: list):
+    dao = DAO()
+    dao._conn = StubConnection(rows)
+    try:
+        return len(dao._generic_retrieval_query("SELECT 1;"))
+    finally:
+        dao._conn = None
+
+
+def _dao_page(rows: list):
+    dao = TransactionDAO()
+    dao._conn = StubConnection(rows)
+    try:
+        return len(dao.getAllTransactions(wid=1))
+    finally:
+        dao._conn = None
+
+
+def _dao_stream(rows: list):
+    dao = TransactionDAO()
+    dao._conn = StubConnection(rows)
+    try:
+        return sum(1 for _ in dao.getAllTransactions(wid=1, stream=True))
+    finally:
+        dao._conn = None
+
+
+def _transaction_row(i: int) -> tuple:
+    return i, _day(i), i % 50 + 1, i % 5000 + 1, i % 5000 + 1, i % 1000 + 1, "incoming"
+
+
+PROFIT_COLUMNS = ("Year", "Month", "Warehouse", "Net Profit")
+
+BENCHMARKS = (
+    Benchmark("serialize.part", lambda i: (i, f"Part {i}", "Red", "Metal", 129.99),
+              _serialize(PartHandler().mapToDict)),
+    Benchmark("serialize.part_quantity", lambda i: (i, f"Part {i}", "Red", "Metal", 129.99, i % 300),
+              _serialize(PartHandler().mapToDictAllParts)),
+    Benchmark("serialize.supplier", lambda i: (i, f"Supplier {i}", "USA", "San Juan", "Calle 1", "00901", f"{i:010d}"),
+              _serialize(SupplierHandler.mapToDict)),
+    Benchmark("serialize.supplies", lambda i: (i % 500 + 1, i, i % 1000), _serialize(SuppliesHandler().mapToDict)),
+    Benchmark("serialize.customer", lambda i: (i, "Eren", "Yaeger", "00901", f"{i:010d}"),
+              _serialize(CustomerHandler().mapToDict)),
+    Benchmark("serialize.rack", lambda i: (i, f"Rack {i}", 120), _serialize(RackHandler().mapToDict)),
+    Benchmark("serialize.user", lambda i: (i, "Sofia", "Martinez", f"user{i}", f"user{i}@upr.edu", "secret", i % 1000),
+              _serialize(UserHandler().build_user_dict)),
+    Benchmark("serialize.warehouse",
+              lambda i: (i, f"Warehouse {i}", "USA", "Caribbean", "San Juan", "Calle 1", "00901", 750000.0),
+              _serialize(WarehouseHandler().build_warehouse_dict)),
+    Benchmark("serialize.transaction", _transaction_row, _serialize(TransactionHandler().mapToDictWithType)),
+    Benchmark("serialize.incoming", lambda i: (i, _day(i), 90.5, 3, i % 500 + 1, i % 20000 + 1, i, i % 5000 + 1,
+                                               i % 5000 + 1, i % 1000 + 1),
+              _serialize(IncomingTransactionHandler().mapToDict)),
+    Benchmark("serialize.outgoing", lambda i: (i, _day(i), 120.0, 2, i % 10000 + 1, i, i % 5000 + 1, i % 5000 + 1,
+                                               i % 1000 + 1),
+              _serialize(OutgoingTransactionHandler().mapToDict)),
+    Benchmark("serialize.transfer", lambda i: (i, _day(i), 2, i % 1000 + 1, i % 5000 + 1, i, i % 5000 + 1,
+                                               i % 5000 + 1, i % 1000 + 1),
+              _serialize(TransferTransactionHandler().mapToDict)),
+    Benchmark("serialize.statistics", lambda i: (2019 + i % 5, i % 12 + 1, f"Warehouse {i % 1000}", 1234.5),
+              lambda rows: current_app.json.dumps(
+                  WarehouseHandler._build_statistics_dict(rows, "Monthly Profit", PROFIT_COLUMNS))),
+    Benchmark("dao.generic_retrieval", _transaction_row, _dao_query),
+    Benchmark("dao.transaction_page", _transaction_row, _dao_page),
+    Benchmark("dao.transaction_stream", _transaction_row, _dao_stream),
+)
+
+
+def _measure(benchmark: Benchmark, size: int, repeat: int) -> float:
+    """Best of `repeat` runs in seconds; the rows are built beforehand and the collector is paused while timing."""
+    rows = [benchmark.row(i) for i in range(size)]
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            benchmark.run(rows)
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(sizes: tuple = SIZES, repeat: int = 3, only: str = None, log=print) -> dict:
+    """
+    Runs every benchmark (or those whose name starts with `only`) at every size.
+    Must run inside an application context, so serialization goes through the app's JSON provider.
+    Returns {"python": ..., "results": {name: {size: seconds}}}.
+    """
+    results = {}
+    for benchmark in BENCHMARKS:
+        if only and not benchmark.name.startswith(only): continue
+        for size in sizes:
+            seconds = _measure(benchmark, size, repeat)
+            results.setdefault(benchmark.name, {})[str(size)] = round(seconds, 6)
+            log(f"{benchmark.name:<28} {size:>9} rows {seconds * 1000:>11.2f} ms {size / seconds:>14,.0f} rows/s")
+    return {"python": platform.python_version(), "results": results}
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Returns (name, size, baseline seconds, seconds, change) for every result more than `threshold`
+    (a fraction, 0.1 = 10%) slower than the baseline. Results missing from either side are skipped.
+    """
+    regressions = []
+    for name, sizes in report["results"].items():
+        for size, seconds in sizes.items():
+            before = baseline.get("results", {}).get(name, {}).get(size)
+            if not before: continue
+            change = seconds / before - 1
+            if change > threshold:
+                regressions.append((name, size, before, seconds, change))
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE) -> dict | None:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(report: dict, path: Path = BASELINE):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,301 @@
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from multiprocessing import get_context
+import psycopg2
+from Backend.DAOs.connection_pool import get_pool
+
+# Rows buffered per COPY statement
+COPY_BATCH = 50000
+FIRST_DATE = date(2019, 1, 1)
+
+# Tables whose serial ids are assigned by the generator: (table, id column)
+ID_COLUMNS = (("warehouse", "wid"), ("racks", "rid"), ("parts", "pid"), ("supplier", "sid"), ("customer", "cid"),
+              ("users", "uid"), ("transactions", "tid"), ("incoming_transaction", "itid"),
+              ("outgoing_transaction", "otid"), ("transfer", "transferid"))
+
+COLORS = ("Red", "Blue", "Green", "Black", "White", "Yellow", "Gray", "Orange")
+MATERIALS = ("Metal", "Plastic", "Wood", "Rubber", "Glass", "Fabric", "Ceramic")
+
+
+@dataclass
+class Scale:
+    warehouses: int = 1000
+    racks_per_warehouse: int = 20  # one (part, rack) slot of stored_in per rack
+    parts: int = 5000
+    suppliers: int = 500
+    suppliers_per_part: int = 3
+    customers: int = 10000
+    users_per_warehouse: int = 5
+    transactions: int = 1000000
+    days: int = 5 * 365
+    mix: tuple = (0.5, 0.35, 0.15)  # share of incoming, outgoing and transfer transactions
+    seed: int = 42
+
+
+@dataclass
+class Bases:
+    """Last id of every table before the load; the generated ids follow them."""
+    wid: int
+    rid: int
+    pid: int
+    sid: int
+    cid: int
+    uid: int
+    tid: int
+    itid: int
+    otid: int
+    transferid: int
+
+
+class CopyBuffer:
+    """Buffers tab separated rows for one table and sends them with COPY every COPY_BATCH rows."""
+    def __init__(self, cursor, table: str, columns: tuple):
+        self.cursor = cursor
+        self.statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        self.rows = []
+        self.total = 0
+
+    def add(self, *values):
+        self.rows.append("\t".join(map(str, values)))
+        if len(self.rows) >= COPY_BATCH:
+            self.flush()
+
+    def flush(self):
+        if not self.rows: return
+        self.cursor.copy_expert(self.statement, io.StringIO("\n".join(self.rows) + "\n"))
+        self.total += len(self.rows)
+        self.rows = []
+
+
+def _connect(dsn: str):
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cursor:
+        # Skips the foreign key checks and the statistics/ledger triggers while loading,
+        # the generator keeps the rows consistent and the rollups are rebuilt once at the end
+        cursor.execute("SET session_replication_role = replica;")
+    return conn
+
+
+def part_suppliers(pid: int, scale: Scale, bases: Bases) -> list:
+    """The suppliers of a generated part; the same for the main process and every worker."""
+    first = (pid * 7919) % scale.suppliers
+    count = min(scale.suppliers_per_part, scale.suppliers)
+    return [bases.sid + 1 + (first + i) % scale.suppliers for i in range(count)]
+
+
+def warehouse_users(wid: int, scale: Scale, bases: Bases) -> range:
+    start = bases.uid + (wid - bases.wid - 1) * scale.users_per_warehouse + 1
+    return range(start, start + scale.users_per_warehouse)
+
+
+def _load_dimensions(conn, scale: Scale, bases: Bases, rng: random.Random) -> tuple:
+    """
+    Writes warehouses, racks, parts, suppliers, customers, users and supplies.
+    Returns the stored_in slots (pid, wid, rid, capacity) and the MSRP of every part.
+    Budgets are set once the transactions are known.
+    """
+    with conn.cursor() as cursor:
+        warehouses = CopyBuffer(cursor, "warehouse",
+                                ("wid", "wname", "wcountry", "wregion", "wcity", "wstreet", "wzipcode", "wbudget"))
+        users = CopyBuffer(cursor, "users", ("uid", "ufname", "ulname", "username", "uemail", "upassword", "wid"))
+        for wid in range(bases.wid + 1, bases.wid + scale.warehouses + 1):
+            warehouses.add(wid, f"Warehouse {wid}", "USA", "Caribbean", f"City {wid % 78}", f"Street {wid}",
+                           f"{rng.randint(600, 988):05d}", 0)
+            for uid in warehouse_users(wid, scale, bases):
+                users.add(uid, f"First{uid}", f"Last{uid}", f"user{uid}", f"user{uid}@sqlytes.example", "password", wid)
+
+        msrp = {}
+        parts = CopyBuffer(cursor, "parts", ("pid", "pname", "pcolor", "pmaterial", "msrp"))
+        for pid in range(bases.pid + 1, bases.pid + scale.parts + 1):
+            msrp[pid] = round(rng.uniform(5, 500), 2)
+            parts.add(pid, f"Part {pid}", rng.choice(COLORS), rng.choice(MATERIALS), msrp[pid])
+
+        suppliers = CopyBuffer(cursor, "supplier", ("sid", "sname", "scountry", "scity", "sstreet", "szipcode", "sphone"))
+        for sid in range(bases.sid + 1, bases.sid + scale.suppliers + 1):
+            suppliers.add(sid, f"Supplier {sid}", "USA", f"City {sid % 78}", f"Street {sid}",
+                          f"{rng.randint(600, 988):05d}", f"+1-555-{sid:07d}")
+        supplies = CopyBuffer(cursor, "supplies", ("sid", "pid", "stock"))
+        for pid in msrp:
+            for sid in part_suppliers(pid, scale, bases):
+                supplies.add(sid, pid, rng.randint(100, 100000))
+
+        customers = CopyBuffer(cursor, "customer", ("cid", "cfname", "clname", "czipcode", "cphone"))
+        for cid in range(bases.cid + 1, bases.cid + scale.customers + 1):
+            customers.add(cid, f"First{cid}", f"Last{cid}", f"{rng.randint(600, 988):05d}", f"+1-556-{cid:07d}")
+
+        slots = []
+        racks = CopyBuffer(cursor, "racks", ("rid", "rname", "rcapacity"))
+        rid = bases.rid
+        for wid in range(bases.wid + 1, bases.wid + scale.warehouses + 1):
+            for pid in rng.sample(range(bases.pid + 1, bases.pid + scale.parts + 1), scale.racks_per_warehouse):
+                rid += 1
+                capacity = rng.randint(50, 500)
+                racks.add(rid, f"Rack {rid}", capacity)
+                slots.append((pid, wid, rid, capacity))
+
+        for buffer in (warehouses, users, parts, suppliers, supplies, customers, racks):
+            buffer.flush()
+    conn.commit()
+    return slots, msrp
+
+
+def _generate_transactions(dsn: str, scale: Scale, bases: Bases, worker: int, slots: list, msrp: dict,
+                           count: int, tid: int) -> dict:
+    """
+    Generates `count` transactions over the given slots, in date order so every incoming transaction fits its rack
+    and every outgoing transaction and transfer has the stock it takes. Transfers stay within the worker's parts.
+    Writes transactions, their subtype rows and the final stored_in quantities.
+    Returns the earnings and costs of every warehouse.
+    """
+    rng = random.Random(scale.seed * 1000 + worker)
+    stock = {slot: 0 for slot in slots}
+    by_part = {}
+    for slot in slots:
+        by_part.setdefault(slot[0], []).append(slot)
+    ledger = {}
+    incoming_share, outgoing_share = scale.mix[0], scale.mix[0] + scale.mix[1]
+    customers = (bases.cid + 1, bases.cid + scale.customers)
+    days = sorted(rng.randrange(scale.days) for _ in range(count))
+    dates = [str(FIRST_DATE + timedelta(days=n)) for n in range(scale.days)]
+
+    conn = _connect(dsn)
+    try:
+        with conn.cursor() as cursor:
+            transactions = CopyBuffer(cursor, "transactions", ("tid", "tdate", "part_amount", "pid", "uid", "wid"))
+            incoming = CopyBuffer(cursor, "incoming_transaction", ("itid", "unit_buy_price", "sid", "rid", "tid"))
+            outgoing = CopyBuffer(cursor, "outgoing_transaction", ("otid", "unit_sale_price", "cid", "tid"))
+            transfers = CopyBuffer(cursor, "transfer", ("transferid", "to_warehouse", "user_requester", "tid"))
+            for day in days:
+                tid += 1
+                slot = rng.choice(slots)
+                pid, wid, rid, capacity = slot
+                current = stock[slot]
+                kind = rng.random()
+                if current == 0 or (kind < incoming_share and current < capacity):
+                    amount = rng.randint(1, max(1, min(capacity - current, capacity // 4)))
+                    price = round(msrp[pid] * rng.uniform(0.4, 0.8), 2)
+                    sid = rng.choice(part_suppliers(pid, scale, bases))
+                    incoming.add(bases.itid + tid - bases.tid, price, sid, rid, tid)
+                    stock[slot] += amount
+                    ledger.setdefault(wid, [0.0, 0.0])[1] += price * amount
+                else:
+                    amount = rng.randint(1, max(1, current // 2))
+                    destination = rng.choice(by_part[pid]) if kind >= outgoing_share else slot
+                    if destination is not slot and stock[destination] + amount <= destination[3]:
+                        to_wid = destination[1]
+                        requester = rng.choice(warehouse_users(to_wid, scale, bases))
+                        transfers.add(bases.transferid + tid - bases.tid, to_wid, requester, tid)
+                        stock[destination] += amount
+                    else:
+                        price = round(msrp[pid] * rng.uniform(1.0, 1.5), 2)
+                        outgoing.add(bases.otid + tid - bases.tid, price, rng.randint(*customers), tid)
+                        ledger.setdefault(wid, [0.0, 0.0])[0] += price * amount
+                    stock[slot] -= amount
+                transactions.add(tid, dates[day], amount, pid, rng.choice(warehouse_users(wid, scale, bases)), wid)
+
+            stored_in = CopyBuffer(cursor, "stored_in", ("wid", "pid", "rid", "parts_qty"))
+            for (pid, wid, rid, capacity), quantity in stock.items():
+                stored_in.add(wid, pid, rid, quantity)
+            for buffer in (transactions, incoming, outgoing, transfers, stored_in):
+                buffer.flush()
+        conn.commit()
+    finally:
+        conn.close()
+    return ledger
+
+
+def _last_ids(conn) -> Bases:
+    values = {}
+    with conn.cursor() as cursor:
+        for table, column in ID_COLUMNS:
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table};")
+            values[column] = cursor.fetchone()[0]
+    return Bases(**values)
+
+
+def _finish(conn, scale: Scale, bases: Bases, ledger: dict, rng: random.Random, log):
+    """Sets the budgets, moves the id sequences past the generated ids and rebuilds the rollups."""
+    with conn.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE generated_budget (wid INTEGER PRIMARY KEY, wbudget DOUBLE PRECISION);")
+        budgets = CopyBuffer(cursor, "generated_budget", ("wid", "wbudget"))
+        for wid in range(bases.wid + 1, bases.wid + scale.warehouses + 1):
+            earnings = ledger.get(wid, (0.0, 0.0))[0]
+            # The opening budget covered every purchase, so the budget never went negative
+            budgets.add(wid, round(rng.uniform(10000, 1000000) + earnings, 2))
+        budgets.flush()
+        cursor.execute("UPDATE warehouse SET wbudget = b.wbudget FROM generated_budget AS b WHERE b.wid = warehouse.wid;")
+        for table, column in ID_COLUMNS:
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                           f"(SELECT GREATEST(MAX({column}), 1) FROM {table}));")
+        conn.commit()
+        for function in ("rebuild_statistics", "rebuild_ledger"):
+            cursor.execute("SELECT 1 FROM pg_proc WHERE proname = %s;", (function,))
+            if cursor.fetchone() is None: continue
+            log(f"Running {function}()")
+            cursor.execute(f"SELECT {function}();")
+            conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        log("Analyzing")
+        cursor.execute("ANALYZE;")
+
+
+def generate(scale: Scale, workers: int = None, log=print) -> dict:
+    """
+    Loads a referentially valid synthetic dataset of the given scale on top of whatever the database holds.
+    The transactions are generated and copied by `workers` processes in parallel, each one owning a share of the
+    parts so stock and transfers can be kept consistent without coordination.
+    Returns the number of rows written per table.
+    """
+    if scale.racks_per_warehouse > scale.parts:
+        raise ValueError("racks_per_warehouse can't exceed the number of parts")
+    if min(scale.warehouses, scale.racks_per_warehouse, scale.parts, scale.suppliers, scale.customers,
+           scale.users_per_warehouse, scale.days) < 1 or scale.transactions < 0:
+        raise ValueError("Every count must be positive")
+    workers = max(1, min(workers or os.cpu_count() or 1, scale.parts))
+    dsn = get_pool().dsn
+    rng = random.Random(scale.seed)
+    started = time.perf_counter()
+
+    conn = _connect(dsn)
+    try:
+        bases = _last_ids(conn)
+        log(f"Loading {scale.warehouses} warehouses, {scale.parts} parts and "
+            f"{scale.warehouses * scale.racks_per_warehouse} racks")
+        slots, msrp = _load_dimensions(conn, scale, bases, rng)
+
+        shares = [[] for _ in range(workers)]
+        for slot in slots:
+            shares[slot[0] % workers].append(slot)
+        counts = [scale.transactions * len(share) // len(slots) for share in shares]
+        counts[max(range(workers), key=lambda worker: len(shares[worker]))] += scale.transactions - sum(counts)
+        log(f"Generating {scale.transactions} transactions with {workers} workers")
+        ledger = {}
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+            futures = []
+            tid = bases.tid
+            for worker, (share, count) in enumerate(zip(shares, counts)):
+                if not share: continue
+                share_msrp = {slot[0]: msrp[slot[0]] for slot in share}
+                futures.append(executor.submit(_generate_transactions, dsn, scale, bases, worker, share,
+                                               share_msrp, count, tid))
+                tid += count
+            for future in futures:
+                # A warehouse's parts are spread over the workers
+                for wid, (earnings, costs) in future.result().items():
+                    total = ledger.setdefault(wid, [0.0, 0.0])
+                    total[0] += earnings
+                    total[1] += costs
+
+        _finish(conn, scale, bases, ledger, rng, log)
+    finally:
+        conn.close()
+    log(f"Done in {time.perf_counter() - started:.1f}s")
+    return {"warehouses": scale.warehouses, "racks": len(slots), "parts": scale.parts,
+            "suppliers": scale.suppliers, "customers": scale.customers,
+            "users": scale.warehouses * scale.users_per_warehouse, "transactions": scale.transactions}
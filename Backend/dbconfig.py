@@ -11,3 +11,40 @@ pg_config = {
 #     'password': 'postgresadmin',
 #     'dbname': 'sqlytes-inventory-app'
 # }
+
+# Connection pool settings, applied per process (each gunicorn worker gets its own pool).
+# max_connections * number of workers must stay below the server's max_connections.
+pool_config = {
+    'max_connections': 10,
+    'checkout_timeout': 30.0  # seconds a DAO waits for a free connection before giving up
+}
+
+# Per-request query instrumentation (Backend/DAOs/instrumentation.py)
+instrumentation_config = {
+    'log_requests': True,  # one structured log line per request with its query count, DB time and rows
+    'n_plus_one_threshold': 5  # warn when the same statement shape runs more than this many times in a request
+}
+
+# Slow query log (Backend/DAOs/slow_queries.py), browsable at /sqlytes/admin/slow-queries
+slow_query_config = {
+    'threshold_ms': 200,  # statements taking at least this long are logged
+    'explain_sample_rate': 0.1,  # share of slow SELECTs run again under EXPLAIN (ANALYZE, BUFFERS) to keep their plan
+    'log_dir': '/tmp/sqlytes-slow-queries',  # ring buffer shared by the workers, one JSON file per slow query
+    'ring_size': 500  # slow queries kept, older ones are deleted
+}
+
+# Cache of parts, racks, warehouses and users by id (Backend/DAOs/cache.py), per process.
+# Kept coherent across workers by the notifications of sql_data/migrations/0002_entity_change_notifications.sql:
+# apply the migrations before enabling it.
+cache_config = {
+    'enabled': False,
+    'max_entries': 10000,  # per table, least recently used entries are evicted first
+    'ttl': 300  # seconds an entry is served at most, in case a notification is ever missed
+}
+
+# Idempotency-Key support of the transaction POSTs (Backend/handler/idempotency.py).
+# Needs the table of sql_data/migrations/0003_idempotency_keys.sql.
+idempotency_config = {
+    'ttl': 86400,  # seconds a response is replayed for retries with the same key
+    'max_key_length': 255
+}
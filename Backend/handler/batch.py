@@ -0,0 +1,114 @@
+from flask import current_app, g, jsonify, request
+import inspect
+from werkzeug.test import EnvironBuilder
+from Backend.DAOs import instrumentation, unit_of_work
+from Backend.handler.schemas import PayloadSchema
+
+# Most operations one batch may carry
+MAX_OPERATIONS = 100
+
+
+class BatchHandler:
+    """
+    Runs an ordered list of requests to the other routes in-process, in one HTTP call. Every operation goes through
+    the same hooks and handlers as if it was sent on its own, on the batch's connection and transaction, each inside
+    a savepoint so a failed operation only rolls back its own changes.
+    """
+    SCHEMA = PayloadSchema({
+        "type": "object",
+        "properties": {
+            "requests": {
+                "type": "array",
+                "minItems": 1,
+                "maxItems": MAX_OPERATIONS,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "method": {"enum": ["GET", "POST", "PUT", "DELETE"]},
+                        "path": {"type": "string", "pattern": "^/"},
+                        "body": {},
+                        "headers": {"type": "object", "additionalProperties": {"type": "string"}}
+                    },
+                    "required": ["method", "path"],
+                    "additionalProperties": False
+                }
+            },
+            "atomic": {"type": "boolean"}
+        },
+        "required": ["requests"],
+        "additionalProperties": False
+    })
+
+    def runBatch(self, data):
+        """
+        Runs the requests in order and returns their status, body and Link header (for paginated lists) in order.
+        Without `atomic`, each request's changes are kept if it succeeds, whatever happens to the others.
+        With `atomic`, the batch stops at the first failed request and none of the changes are kept; the batch
+        then answers with that request's status.
+        """
+        response = self.SCHEMA.validate(data)
+        if not response.isValid(): return response.value
+        atomic = data.get("atomic", False)
+
+        batch = g._get_current_object()
+        writes = 0
+        results = []
+        for position, operation in enumerate(data["requests"]):
+            response, writes = self._run(batch, position, operation, writes)
+            result = {"status": response.status_code,
+                      "body": response.get_json() if response.is_json else response.get_data(as_text=True)}
+            if "Link" in response.headers: result["headers"] = {"Link": response.headers["Link"]}
+            results.append(result)
+            if atomic and response.status_code >= 400:
+                # The batch's unit of work rolls everything back on an error status
+                return jsonify(Result=results, Completed=False), response.status_code
+        return jsonify(Result=results, Completed=True), 200
+
+
+    @staticmethod
+    def _run(batch, position: int, operation: dict, writes: int) -> tuple:
+        """
+        Dispatches one operation like Flask dispatches a request, in a request context (and `g`) of its own whose
+        unit of work is a savepoint of the batch's.
+        `writes` counts the statements earlier operations modified data with: they are uncommitted, so this
+        operation must not cache what it reads (see Backend/DAOs/cache.py).
+        Returns the response and the updated count.
+        """
+        app = current_app._get_current_object()
+        path, _, query_string = operation["path"].partition("?")
+        builder = EnvironBuilder(path=path, query_string=query_string, method=operation["method"],
+                                 json=operation.get("body"), headers=operation.get("headers"),
+                                 base_url=request.host_url)
+        try:
+            environ = builder.get_environ()
+        finally:
+            builder.close()
+
+        batch_endpoint = request.endpoint
+        with app.app_context():
+            g.unit_of_work = unit_of_work.Savepoint(batch, f"batch_{position}")
+            with app.request_context(environ):
+                if request.endpoint == batch_endpoint:
+                    response = jsonify(Error="Batches can't contain batches")
+                    response.status_code = 400
+                    return response, writes
+                try:
+                    try:
+                        rv = app.preprocess_request()
+                        if rv is None:
+                            stats = instrumentation.current()
+                            if stats is not None: stats.writes = writes
+                            rv = app.dispatch_request()
+                            if stats is not None: writes = stats.writes
+                    except Exception as e:
+                        rv = app.handle_user_exception(e)
+                    response = app.finalize_request(rv)
+                except Exception as e:
+                    response = app.handle_exception(e)
+
+                # Generators are bodies streamed from the database; other iterables (HTTP errors) are buffered
+                if inspect.isgenerator(response.response):
+                    response.close()  # its savepoint is rolled back when the context is torn down
+                    response = jsonify(Error="Streamed responses can't be part of a batch")
+                    response.status_code = 400
+                return response, writes
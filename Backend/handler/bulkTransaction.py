@@ -0,0 +1,82 @@
+import json
+from Backend.DAOs.bulkTransaction import BulkTransactionDAO
+from Backend.handler.schemas import INCOMING_TRANSACTION, OUTGOING_TRANSACTION, TRANSFER_TRANSACTION
+from flask import jsonify
+
+
+class BulkTransactionHandler:
+    # Request attribute -> staging column for each kind of transaction, in COPY order
+    FIELDS = {
+        "incoming": (("transactionDate", "tdate"), ("partAmount", "part_amount"), ("unitBuyPrice", "unit_price"),
+                     ("partID", "pid"), ("warehouseID", "wid"), ("rackID", "rid"), ("supplierID", "sid"),
+                     ("userID", "uid")),
+        "outgoing": (("transactionDate", "tdate"), ("partAmount", "part_amount"), ("unitSalePrice", "unit_price"),
+                     ("partID", "pid"), ("warehouseID", "wid"), ("customerID", "cid"), ("userID", "uid")),
+        "exchange": (("transactionDate", "tdate"), ("partAmount", "part_amount"), ("partID", "pid"),
+                     ("warehouseID", "wid"), ("userID", "uid"), ("toWarehouse", "to_wid"),
+                     ("userRequester", "user_requester"), ("toRack", "to_rid"))
+    }
+    # Payload schema of each kind of transaction, the same as its single transaction endpoint
+    SCHEMAS = {"incoming": INCOMING_TRANSACTION, "outgoing": OUTGOING_TRANSACTION, "exchange": TRANSFER_TRANSACTION}
+    # Key of the id of the created transaction in each accepted row
+    ID_KEYS = {"incoming": "itid", "outgoing": "otid", "exchange": "transferid"}
+    NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+    def parseNDJSON(self, stream) -> list:
+        """
+        Reads one JSON object per line from the request stream without buffering the whole body.
+        Lines that are not valid JSON (NaN and Infinity included) are kept as None so they are rejected with their
+        row number.
+        """
+        rows = []
+        for line in stream:
+            line = line.strip()
+            if not line: continue
+            try:
+                rows.append(json.loads(line, parse_constant=self._reject_constant))
+            except ValueError:
+                rows.append(None)
+        return rows
+
+
+    def addTransactions(self, kind, rows):
+        """
+        Validates and posts a batch of transactions of the given kind in a single database transaction.
+        Every row is either accepted, with the id of the new transaction, or rejected with the reason,
+        which is the same message the single transaction endpoint would have returned.
+        """
+        if kind not in self.FIELDS: return jsonify(Error=f"Unknown transaction type '{kind}'"), 404
+        if not isinstance(rows, list): return jsonify(Error="Expected a JSON array or NDJSON body"), 400
+        if not rows: return jsonify(Error="No transactions to add"), 400
+
+        fields = self.FIELDS[kind]
+        errors = self.SCHEMAS[kind].errors(rows)
+        staged = [(row_no, *self._values(fields, row)) for row_no, row in enumerate(rows) if row_no not in errors]
+
+        ids = {}
+        if staged:
+            result = BulkTransactionDAO().postTransactions(kind, tuple(column for _, column in fields), staged)
+            if result is None: return jsonify(Error="Failed to add transactions"), 500
+            for row_no, error, new_id in result:
+                if error: errors[row_no] = error
+                else: ids[row_no] = new_id
+
+        id_key = self.ID_KEYS[kind]
+        results = []
+        for row_no in range(len(rows)):
+            if row_no in errors:
+                results.append({"row": row_no, "status": "rejected", "Error": errors[row_no]})
+            else:
+                results.append({"row": row_no, "status": "accepted", id_key: ids[row_no]})
+        return jsonify(Result=results, Accepted=len(ids), Rejected=len(errors)), 200
+
+
+    @staticmethod
+    def _reject_constant(constant):
+        raise ValueError(f"{constant} is not a valid value")
+
+
+    @staticmethod
+    def _values(fields, row) -> list:
+        """The attributes of a row that passed its schema (which converted its integers to int), in COPY order."""
+        return [row[attr] for attr, _ in fields]
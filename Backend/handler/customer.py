@@ -1,16 +1,11 @@
 from Backend.DAOs.customer import CustomerDAO
 from flask import jsonify
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.serialization import RowMapper
 
 
 class CustomerHandler:
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict["id"] = tup[0]
-        my_dict["FirstName"] = tup[1]
-        my_dict["LastName"] = tup[2]
-        my_dict["Zipcode"] = tup[3]
-        my_dict["Phone"] = tup[4]
-        return my_dict
+    mapToDict = RowMapper("id", "FirstName", "LastName", "Zipcode", "Phone")
 
     @staticmethod
     def customer_exists(cphone, cid=None, dao=CustomerDAO()):
@@ -21,13 +16,14 @@ class CustomerHandler:
         return {}
 
     def getAllCustomers(self):
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
         dao = CustomerDAO()
-        dbtuples = dao.getAllCustomers()
-        if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDict(tup))
-            return jsonify(result)
+        dbtuples = dao.getAllCustomers(**page.arguments())
+        if dbtuples is not None:
+            result = self.mapToDict.many(dbtuples)
+            return page.respond(jsonify(result), dbtuples, key=lambda tup: (tup[0],))
         else:
             return jsonify(Error="Internal Server Error: Failed to load customers"), 500
 
@@ -65,9 +61,7 @@ class CustomerHandler:
         dao = CustomerDAO()
         dbtuples = dao.getCustomerById(cid)
         if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDict(tup))
+            result = self.mapToDict.many(dbtuples)
             return jsonify(result)
         else:
             return jsonify(Error="Customer does not exist"), 500
@@ -0,0 +1,122 @@
+from typing import Iterable, Iterator
+from flask import Response, jsonify, request, stream_with_context
+from Backend.DAOs.export import ExportDAO
+from Backend.handler.pagination import parse_filters, TRANSACTION_FILTERS
+from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # only CSV can be exported
+    pyarrow = None
+
+# Export formats accepted in ?format=<format> or the Accept header, and their mimetype
+EXPORT_FORMATS = {"csv": "text/csv", "arrow": "application/vnd.apache.arrow.stream",
+                  "parquet": "application/vnd.apache.parquet"}
+# Rows per Arrow record batch, and per Parquet row group
+ARROW_BATCH = 65536
+
+
+class _Sink:
+    """Collects what an Arrow or Parquet writer writes until the response takes it."""
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+class ExportHandler:
+    # Per dataset: the filters of the query string and the Arrow type of every column, in query order
+    DATASETS = {
+        "transactions": (TRANSACTION_FILTERS,
+                         (("tid", "int32"), ("tdate", "date32"), ("part_amount", "int32"), ("pid", "int32"),
+                          ("uid", "int32"), ("wid", "int32"), ("type", "string"))),
+        "inventory": ((("wid", int, "wid"), ("pid", int, "pid")),
+                      (("wid", "int32"), ("pid", "int32"), ("rid", "int32"), ("parts_qty", "int32"),
+                       ("rcapacity", "int32"))),
+        "supplies": ((("sid", int, "sid"), ("pid", int, "pid")),
+                     (("sid", "int32"), ("pid", "int32"), ("stock", "int32"), ("msrp", "float64")))
+    }
+
+    @staticmethod
+    def _requested_format() -> ValidationResponse:
+        """
+        Reads the format asked for through ?format=csv|arrow|parquet, or else the Accept header; CSV by default.
+        Returns the format if the response is valid.
+        """
+        fmt = request.args.get("format")
+        if fmt is None:
+            best = request.accept_mimetypes.best_match(list(EXPORT_FORMATS.values()))
+            fmt = next((name for name, mimetype in EXPORT_FORMATS.items() if mimetype == best), "csv")
+        if fmt not in EXPORT_FORMATS:
+            return InvalidResponse(jsonify(Error=f"Invalid format ({fmt}). Expected one of {list(EXPORT_FORMATS)}"), 400)
+        if fmt != "csv" and pyarrow is None:
+            return InvalidResponse(jsonify(Error=f"The {fmt} format needs pyarrow, which is not installed"), 406)
+        return ValidResponse(fmt)
+
+    @staticmethod
+    def _columnar(rows: Iterable, columns: tuple, fmt: str) -> Iterator:
+        """Encodes the rows as an Arrow IPC stream or a Parquet file, ARROW_BATCH rows at a time."""
+        schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in columns])
+        sink = _Sink()
+        file = pyarrow.PythonFile(sink, mode="w")
+        if fmt == "arrow": writer = pyarrow.ipc.new_stream(file, schema)
+        else: writer = pyarrow.parquet.ParquetWriter(file, schema)
+
+        def write(batch: list):
+            # The rows transposed into one array per column
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(values, field.type) for values, field in zip(zip(*batch), schema)], schema=schema))
+
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == ARROW_BATCH:
+                write(batch)
+                batch = []
+                yield sink.drain()
+        if batch: write(batch)
+        writer.close()
+        yield sink.drain()
+
+    def getExport(self, dataset: str):
+        """
+        Streams a whole dataset, optionally filtered like its list route, as CSV (from COPY), an Arrow IPC
+        stream or a Parquet file.
+        """
+        if dataset not in self.DATASETS:
+            return jsonify(Error=f"Unknown dataset '{dataset}'. Expected one of {list(self.DATASETS)}"), 404
+        filters, columns = self.DATASETS[dataset]
+        response = parse_filters(filters)
+        if response.isValid(): filters = response.value
+        else: return response.value
+        response = self._requested_format()
+        if response.isValid(): fmt = response.value
+        else: return response.value
+
+        dao = ExportDAO()
+        if fmt == "csv": body = dao.copyCSV(dataset, **filters)
+        else:
+            rows = dao.streamRows(dataset, **filters)
+            body = None if rows is None else self._columnar(rows, columns, fmt)
+        if body is None: return jsonify(Error=f"Failed to export {dataset}"), 500
+
+        extension = "arrows" if fmt == "arrow" else fmt
+        # The request context (and with it the unit of work's connection) stays open until the export ends
+        response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt])
+        response.headers["Content-Disposition"] = f"attachment; filename={dataset}.{extension}"
+        return response
@@ -0,0 +1,48 @@
+import hashlib
+from functools import wraps
+from flask import current_app, jsonify, request
+from Backend.dbconfig import idempotency_config
+from Backend.DAOs.idempotency import IdempotencyDAO
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Set on responses replayed from the store instead of being produced again
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+def idempotent(route):
+    """
+    Makes the POSTs of a route safe to retry: a request sent with an Idempotency-Key header claims the key in its
+    unit of work, and its response is stored with it if the request succeeds. A retry with the same key and body
+    gets the stored response back without running the route again, and a retry sent while the key is still held
+    gets a 409 at once. The claim is rolled back with a failed request, so the retry of a failure runs again.
+    """
+    @wraps(route)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method != "POST": return route(*args, **kwargs)
+        if not 0 < len(key) <= idempotency_config["max_key_length"]:
+            return jsonify(Error=f"{IDEMPOTENCY_HEADER} must have between 1 and "
+                                 f"{idempotency_config['max_key_length']} characters"), 400
+
+        fingerprint = hashlib.sha256(request.path.encode() + b"\0" + request.get_data()).digest()
+        dao = IdempotencyDAO()
+        result = dao.claim(key, fingerprint, idempotency_config["ttl"])
+        if result is None: return jsonify(Error=f"Failed to check the {IDEMPOTENCY_HEADER}"), 500
+        claimed, stored_fingerprint, status, body = result
+
+        if not claimed:
+            if status is None:
+                return jsonify(Error=f"A request with this {IDEMPOTENCY_HEADER} is still being processed"), 409
+            if bytes(stored_fingerprint) != fingerprint:
+                return jsonify(Error=f"{IDEMPOTENCY_HEADER} already used for a different request"), 422
+            response = current_app.response_class(bytes(body), status=status, mimetype="application/json")
+            response.headers[REPLAYED_HEADER] = "true"
+            return response
+
+        response = current_app.make_response(route(*args, **kwargs))
+        # Failures are rolled back with the claim; streamed bodies are never stored
+        if response.status_code < 400 and not response.is_streamed:
+            if dao.record(key, response.status_code, response.get_data()) is None:
+                return jsonify(Error=f"Failed to store the response for the {IDEMPOTENCY_HEADER}"), 500
+        return response
+    return wrapper
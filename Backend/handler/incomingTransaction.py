@@ -1,25 +1,28 @@
 from Backend.DAOs.incomingTransaction import IncomingTransactionDAO
-from Backend.DAOs.stored_in import StoredInDAO
-from Backend.DAOs.supplies import SuppliesDao
-from Backend.DAOs.warehouse_dao import WarehouseDAO
-from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse, ValidatableTransaction
+from Backend.handler.pagination import parse_page, TRANSACTION_KEY, TRANSACTION_FILTERS
+from Backend.handler.streaming import requested_stream_format, stream_response
+from Backend.handler.validation import ValidResponse, ValidationResponse, ValidatableTransaction
+from Backend.handler.schemas import INCOMING_TRANSACTION
 from flask import jsonify
+from Backend.handler.serialization import RowMapper
 
 
 class IncomingTransactionHandler(ValidatableTransaction):
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict["itid"] = tup[0]
-        my_dict["tdate"] = tup[1]
-        my_dict["unit_buy_price"] = tup[2]
-        my_dict["part_amount"] = tup[3]
-        my_dict["sid"] = tup[4]
-        my_dict["rid"] = tup[5]
-        my_dict["tid"] = tup[6]
-        my_dict["pid"] = tup[7]
-        my_dict["uid"] = tup[8]
-        my_dict["wid"] = tup[9]
-        return my_dict
+    # HTTP status for each error code returned by post_incoming_transaction()
+    POSTING_ERROR_STATUS = {
+        "PART_NOT_SUPPLIED": 400,
+        "NOT_ENOUGH_STOCK": 400,
+        "WAREHOUSE_NOT_FOUND": 404,
+        "NOT_ENOUGH_BUDGET": 400,
+        "USER_NOT_FOUND": 500,
+        "USER_NOT_IN_WAREHOUSE": 400,
+        "RACK_NOT_FOUND": 500,
+        "RACK_IN_USE": 400,
+        "PART_IN_OTHER_RACK": 400,
+        "RACK_FULL": 400
+    }
+
+    mapToDict = RowMapper("itid", "tdate", "unit_buy_price", "part_amount", "sid", "rid", "tid", "pid", "uid", "wid")
 
 
     def addIncomingTransaction(self, data):
@@ -31,59 +34,19 @@ class IncomingTransactionHandler(ValidatableTransaction):
             transactionDate, partAmount, unitBuyPrice, partID, warehouseID, rackID, supplierID, userID = response.value
         else: return response.value
 
-        response = self._validate_enough_supplier_stock(partID, supplierID, partAmount)
-        if response.isValid(): stock = response.value
-        else: return response.value
-
-        cost = unitBuyPrice*partAmount
-        response = self._validate_enough_budget_in_warehouse(unitBuyPrice, partAmount, warehouseID, cost)
-        if not response.isValid(): return response.value
-
-        response = self._validate_user_in_warehouse(userID, warehouseID)
-        if not response.isValid(): return response.value
-
-        response = self._validate_rack_exists(rackID)
-        if response.isValid(): rack_capacity = response.value
-        else: return response.value
-        
-        response = self._validate_rack_is_not_in_use_for_different_part(rackID, warehouseID, partID)
-        if not response.isValid(): return response.value
+        # Validate and record the transaction, stock, budget and rack quantity in one round-trip
+        result = IncomingTransactionDAO().postIncomingTransaction(unit_buy_price=unitBuyPrice,
+                                                                  sid=supplierID,
+                                                                  rid=rackID,
+                                                                  tdate=transactionDate,
+                                                                  part_amount=partAmount,
+                                                                  pid=partID,
+                                                                  uid=userID,
+                                                                  wid=warehouseID)
+        if not result: return jsonify(Error="Failed to add transaction"), 500
+        error_code, error_message, itid = result
+        if error_code: return jsonify(Error=error_message), self.POSTING_ERROR_STATUS.get(error_code, 400)
 
-        response = self._validate_amount_fits_in_rack(warehouseID, partID, rackID, rack_capacity, partAmount)
-        if response.isValid(): current_amount_in_rack = response.value
-        else: return response.value
-        
-        # Add transaction
-        itid = IncomingTransactionDAO().addIncomingTransaction(unit_buy_price=unitBuyPrice,
-                                                               sid=supplierID,
-                                                               rid=rackID,
-                                                               tdate=transactionDate,
-                                                               part_amount=partAmount,
-                                                               pid=partID,
-                                                               uid=userID,
-                                                               wid=warehouseID)
-        if not itid: return jsonify(Error="Failed to add transaction"), 500
-
-        # Update available stock
-        supplies_DAO = SuppliesDao()
-        count = supplies_DAO.decrease_stock(pid=partID, sid=supplierID, delta=partAmount)
-        if not count: return jsonify(Error="Failed to update stock"), 500
-        elif stock - partAmount == 0: supplies_DAO.delete_entry(pid=partID, sid=supplierID)
-
-        # Update available budget
-        new_budget = WarehouseDAO().decrease_budget(wid=warehouseID, delta=cost)
-        if not new_budget: return jsonify(Error="Failed to update warehouse budget"), 500
-
-        # Add to stored_in
-        count = StoredInDAO().modify_quantity(wid=warehouseID,
-                                              pid=partID,
-                                              rid=rackID,
-                                              new_quantity=current_amount_in_rack+partAmount)
-        if not count:
-            return jsonify(Error=
-                f"Failed to modify quantity of part ({partID}) in warehouse ({warehouseID})"
-                ), 500
-        
         data["itid"] = itid
         return jsonify(Result=data), 201
     
@@ -92,13 +55,22 @@ class IncomingTransactionHandler(ValidatableTransaction):
         """
         Returns all incoming transactions.
         """
+        response = parse_page(TRANSACTION_KEY, TRANSACTION_FILTERS)
+        if response.isValid(): page = response.value
+        else: return response.value
+        response = requested_stream_format()
+        if response.isValid(): stream_format = response.value
+        else: return response.value
+
         dao = IncomingTransactionDAO()
-        dbtuples = dao.getAllIncomingTransaction()
-        if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDict(tup))
-            return jsonify(Result=result)
+        if stream_format:
+            rows = dao.getAllIncomingTransaction(stream=True, **page.arguments())
+            if rows is None: return jsonify(Error="Failed to load transactions"), 500
+            return stream_response(rows, self.mapToDict, stream_format, envelope="Result")
+        dbtuples = dao.getAllIncomingTransaction(**page.arguments())
+        if dbtuples is not None:
+            result = self.mapToDict.many(dbtuples)
+            return page.respond(jsonify(Result=result), dbtuples, key=lambda tup: (tup[1], tup[6]))
         else:
             return jsonify(Error="Failed to load transactions"), 500
 
@@ -125,13 +97,17 @@ class IncomingTransactionHandler(ValidatableTransaction):
             transactionDate, partAmount, unitBuyPrice, partID, warehouseID, rackID, supplierID, userID = response.value
         else: return response.value
 
-        response = self._validate_user_in_warehouse(userID, warehouseID)
+        response = self._load_facts(dict(uid=userID, wid=warehouseID, pid=partID, rid=rackID))
+        if response.isValid(): facts = response.value
+        else: return response.value
+
+        response = self._validate_user_in_warehouse(facts, userID, warehouseID)
         if not response.isValid(): return response.value
 
-        response = self._validate_rack_exists(rackID)
+        response = self._validate_rack_exists(facts, rackID)
         if not response.isValid(): return response.value
         
-        response = self._validate_rack_is_not_in_use_for_different_part(rackID, warehouseID, partID)
+        response = self._validate_rack_is_not_in_use_for_different_part(facts, rackID, warehouseID, partID)
         if not response.isValid(): return response.value
 
         dao = IncomingTransactionDAO()
@@ -155,30 +131,7 @@ class IncomingTransactionHandler(ValidatableTransaction):
         Checks whether the data is valid.
         Returns the data if the response is valid.
         """
-        try:
-            transactionDate = data["transactionDate"]
-            partAmount = data["partAmount"]
-            unitBuyPrice = data["unitBuyPrice"]
-            partID = data["partID"]
-            warehouseID = data["warehouseID"]
-            rackID = data["rackID"]
-            supplierID = data["supplierID"]
-            userID = data["userID"]
-        except KeyError as e:
-            return InvalidResponse(jsonify(Error={"Unexpected parameter names": e.args}), 400)
-        # Verify nulls
-        if not (transactionDate and partAmount and unitBuyPrice and partID
-                and warehouseID and rackID and supplierID and userID):
-            return InvalidResponse(jsonify(Error="Attributes cannot contain null fields."), 400)
-        # Verify types
-        for attr in (partID, warehouseID, rackID, supplierID, userID, partAmount):
-            if not isinstance(attr, int):
-                return InvalidResponse(jsonify(Error=f"Invalid attritube for type 'int' ({attr})"), 400)
-        if not isinstance(unitBuyPrice, float) and not isinstance(unitBuyPrice, int):
-            return InvalidResponse(jsonify(Error=f"Invalid type for unitBuyPrice ({unitBuyPrice})"), 400)
-        if not isinstance(transactionDate, str):
-            return InvalidResponse(jsonify(Error=f"Invalid type for transaction date ({transactionDate})"), 400)
-        # Verify values are valid
-        if unitBuyPrice < 0: return InvalidResponse(jsonify(Error="unitBuyPrice must be a positive number"), 400)
-        if partAmount < 0: return InvalidResponse(jsonify(Error="partAmount must be a positive number"), 400)
-        return ValidResponse(transactionDate, partAmount, unitBuyPrice, partID, warehouseID, rackID, supplierID, userID)
\ No newline at end of file
+        response = INCOMING_TRANSACTION.validate(data)
+        if not response.isValid(): return response
+        return ValidResponse(data["transactionDate"], data["partAmount"], data["unitBuyPrice"], data["partID"],
+                             data["warehouseID"], data["rackID"], data["supplierID"], data["userID"])
\ No newline at end of file
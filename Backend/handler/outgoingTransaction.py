@@ -1,24 +1,22 @@
 from Backend.DAOs.outgoingTransaction import OutgoingTransactionDAO
-from Backend.DAOs.stored_in import StoredInDAO
-from Backend.DAOs.warehouse_dao import WarehouseDAO
-from Backend.DAOs.user_dao import UserDAO
-from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse, ValidatableTransaction
+from Backend.handler.pagination import parse_page, TRANSACTION_KEY, TRANSACTION_FILTERS
+from Backend.handler.streaming import requested_stream_format, stream_response
+from Backend.handler.validation import ValidResponse, ValidationResponse, ValidatableTransaction
+from Backend.handler.schemas import OUTGOING_TRANSACTION
 from flask import jsonify
+from Backend.handler.serialization import RowMapper
 
 
 class OutgoingTransactionHandler(ValidatableTransaction):
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict["otid"] = tup[0]
-        my_dict["tdate"] = tup[1]
-        my_dict["unit_sale_price"] = tup[2]
-        my_dict["part_amount"] = tup[3]
-        my_dict["cid"] = tup[4]
-        my_dict["tid"] = tup[5]
-        my_dict["pid"] = tup[6]
-        my_dict["uid"] = tup[7]
-        my_dict["wid"] = tup[8]
-        return my_dict
+    # HTTP status for each error code returned by post_outgoing_transaction()
+    POSTING_ERROR_STATUS = {
+        "USER_NOT_FOUND": 500,
+        "USER_NOT_IN_WAREHOUSE": 400,
+        "NO_RACK": 400,
+        "NOT_ENOUGH_STOCK": 400
+    }
+
+    mapToDict = RowMapper("otid", "tdate", "unit_sale_price", "part_amount", "cid", "tid", "pid", "uid", "wid")
 
 
     def addOutgoingTransaction(self, data):
@@ -30,41 +28,17 @@ class OutgoingTransactionHandler(ValidatableTransaction):
             transactionDate, partAmount, unitSalePrice, partID, warehouseID, customerID, userID = response.value
         else: return response.value
         
-        response = self._validate_user_in_warehouse(userID, warehouseID)
-        if not response.isValid(): return response.value
-
-        # Get the rid for the warehouse and part
-        stored_in_DAO = StoredInDAO()
-        rackID = stored_in_DAO.get_rack_with_pid_wid(wid=warehouseID, pid=partID)
-        if not rackID:
-            return jsonify(Error=f"No rack assigned to warehouse ({warehouseID}) and part ({partID})"), 400
-
-        response = self._validate_enough_quantity_in_warehouse(warehouseID, partID, rackID, partAmount)
-        if response.isValid(): available_quantity = response.value
-        else: return response.value
-
-        # Add transaction
-        otid = OutgoingTransactionDAO().addOutgoingTransaction(unit_sale_price=unitSalePrice,
-                                                               cid=customerID,
-                                                               tdate=transactionDate,
-                                                               part_amount=partAmount,
-                                                               pid=partID,
-                                                               uid=userID,
-                                                               wid=warehouseID)
-        if not otid: return jsonify(Error="Failed to add transaction"), 500
-
-        # Update available budget
-        revenue = partAmount*unitSalePrice
-        new_budget = WarehouseDAO().increase_budget(wid=warehouseID, delta=revenue)
-        if not new_budget: return jsonify(Error="Failed to update warehouse budget"), 500
-
-        # Update stored_in
-        quantity_delta = available_quantity - partAmount
-        count = stored_in_DAO.modify_quantity(wid=warehouseID, pid=partID, rid=rackID, new_quantity=quantity_delta)
-        if not count:
-            return jsonify(Error=
-                f"Failed to modify quantity of part ({partID}) in warehouse ({warehouseID})"
-                ), 500
+        # Validate and record the sale, rack quantity and budget in one round-trip
+        result = OutgoingTransactionDAO().postOutgoingTransaction(unit_sale_price=unitSalePrice,
+                                                                  cid=customerID,
+                                                                  tdate=transactionDate,
+                                                                  part_amount=partAmount,
+                                                                  pid=partID,
+                                                                  uid=userID,
+                                                                  wid=warehouseID)
+        if not result: return jsonify(Error="Failed to add transaction"), 500
+        error_code, error_message, otid = result
+        if error_code: return jsonify(Error=error_message), self.POSTING_ERROR_STATUS.get(error_code, 400)
 
         data["otid"] = otid
         return jsonify(Result=data), 201
@@ -74,13 +48,22 @@ class OutgoingTransactionHandler(ValidatableTransaction):
         """
         Returns all outgoing transactions.
         """
+        response = parse_page(TRANSACTION_KEY, TRANSACTION_FILTERS)
+        if response.isValid(): page = response.value
+        else: return response.value
+        response = requested_stream_format()
+        if response.isValid(): stream_format = response.value
+        else: return response.value
+
         dao = OutgoingTransactionDAO()
-        dbtuples = dao.getAllOutgoingTransaction()
-        if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDict(tup))
-            return jsonify(Result=result)
+        if stream_format:
+            rows = dao.getAllOutgoingTransaction(stream=True, **page.arguments())
+            if rows is None: return jsonify(Error="Failed to load transactions"), 500
+            return stream_response(rows, self.mapToDict, stream_format, envelope="Result")
+        dbtuples = dao.getAllOutgoingTransaction(**page.arguments())
+        if dbtuples is not None:
+            result = self.mapToDict.many(dbtuples)
+            return page.respond(jsonify(Result=result), dbtuples, key=lambda tup: (tup[1], tup[5]))
         else:
             return jsonify(Error="Failed to load transactions"), 500
     
@@ -106,13 +89,15 @@ class OutgoingTransactionHandler(ValidatableTransaction):
             transactionDate, partAmount, unitSalePrice, partID, warehouseID, customerID, userID = response.value
         else: return response.value
 
-        response = self._validate_user_in_warehouse(userID, warehouseID)
+        response = self._load_facts(dict(uid=userID, wid=warehouseID, pid=partID))
+        if response.isValid(): facts = response.value
+        else: return response.value
+
+        response = self._validate_user_in_warehouse(facts, userID, warehouseID)
         if not response.isValid(): return response.value
 
-        # Get the rid for the warehouse and part
-        stored_in_DAO = StoredInDAO()
-        rackID = stored_in_DAO.get_rack_with_pid_wid(wid=warehouseID, pid=partID)
-        if not rackID:
+        # The rid for the warehouse and part
+        if not facts["partRack"]:
             return jsonify(Error=f"No rack assigned to warehouse ({warehouseID}) and part ({partID})"), 400
 
         dao = OutgoingTransactionDAO()
@@ -133,31 +118,7 @@ class OutgoingTransactionHandler(ValidatableTransaction):
         Checks whether the data is valid.
         Returns the data if the response is valid.
         """
-        try:
-            transactionDate = data["transactionDate"]
-            partAmount = data["partAmount"]
-            unitSalePrice = data["unitSalePrice"]
-            partID = data["partID"]
-            warehouseID = data["warehouseID"]
-            customerID = data["customerID"]
-            userID = data["userID"]
-        except KeyError as e:
-            return InvalidResponse(jsonify(Error={"Unexpected parameter names": e.args}), 400)
-        # Verify nulls
-        if not (transactionDate and partAmount and unitSalePrice and partID
-                and warehouseID and customerID and userID):
-            return InvalidResponse(jsonify(Error="Attributes cannot contain null fields."), 400)
-        # Verify types
-        for attr in (partID, warehouseID, customerID, userID, partAmount):
-            if not isinstance(attr, int):
-                return InvalidResponse(jsonify(Error=f"Invalid attritube for type 'int' ({attr})"), 400)
-        if not isinstance(unitSalePrice, float) and not isinstance(unitSalePrice, int):
-            return InvalidResponse(jsonify(Error=f"Invalid type for unitBuyPrice ({unitSalePrice})"), 400)
-        if not isinstance(transactionDate, str):
-            return InvalidResponse(jsonify(Error=f"Invalid type for transaction date ({transactionDate})"), 400)
-        # Verify values are valid
-        if unitSalePrice < 0:
-            return InvalidResponse(jsonify(Error="unitSalePrice must be a positive number"), 400)
-        if partAmount < 0:
-            return InvalidResponse(jsonify(Error="partAmount must be a positive number"), 400)
-        return ValidResponse(transactionDate, partAmount, unitSalePrice, partID, warehouseID, customerID, userID)
+        response = OUTGOING_TRANSACTION.validate(data)
+        if not response.isValid(): return response
+        return ValidResponse(data["transactionDate"], data["partAmount"], data["unitSalePrice"], data["partID"],
+                             data["warehouseID"], data["customerID"], data["userID"])
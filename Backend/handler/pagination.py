@@ -0,0 +1,90 @@
+from datetime import date
+from urllib.parse import urlencode
+from flask import jsonify, request
+from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse
+
+MAX_PAGE_SIZE = 1000
+
+# Query string filters accepted by the transaction list routes: (parameter, type, DAO argument)
+TRANSACTION_FILTERS = (("from", date, "start"), ("to", date, "end"),
+                       ("wid", int, "wid"), ("pid", int, "pid"), ("uid", int, "uid"))
+# Keyset of the transaction list routes: newest first, ties broken by tid
+TRANSACTION_KEY = (date, int)
+# Keyset of the entity list routes: their id
+ENTITY_KEY = (int,)
+
+
+class Page:
+    """
+    Keyset pagination and filters requested through the query string:
+    ?limit=<rows>&after=<cursor>&<filter>=<value>...
+    Without `limit` every matching row is returned, as the list routes always did.
+    The cursor of the next page is sent back in a `Link: <...>; rel="next"` header
+    so the body of each route keeps its shape.
+    """
+    def __init__(self, limit: int | None, after: tuple | None, filters: dict):
+        self.limit = limit
+        self.after = after
+        self.filters = filters  # DAO argument -> value
+
+
+    def arguments(self) -> dict:
+        """Keyword arguments for the DAO's list method."""
+        return {"limit": self.limit, "after": self.after, **self.filters}
+
+
+    def respond(self, response, rows: list, key: callable):
+        """
+        Adds the link to the next page to the response when the page is full.
+        `key` extracts the keyset values from a row returned by the DAO.
+        """
+        if self.limit and len(rows) == self.limit:
+            after = ",".join(str(value) for value in key(rows[-1]))
+            args = request.args.to_dict()
+            args["after"] = after
+            response.headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+        return response
+
+
+def _parse(value: str, kind: type):
+    return date.fromisoformat(value) if kind is date else int(value)
+
+
+def parse_page(key_types: tuple, filters: tuple = ()) -> ValidationResponse:
+    """
+    Reads `limit`, `after` and the given filters from the query string.
+    Returns the Page if the response is valid.
+    """
+    args = request.args
+    limit = args.get("limit", type=int)  # None if missing or not an integer
+    if "limit" in args and (limit is None or not 0 < limit <= MAX_PAGE_SIZE):
+        return InvalidResponse(jsonify(Error=f"limit must be an integer between 1 and {MAX_PAGE_SIZE}"), 400)
+
+    after = None
+    if "after" in args:
+        values = args["after"].split(",")
+        try:
+            if len(values) != len(key_types): raise ValueError
+            after = tuple(_parse(value, kind) for value, kind in zip(values, key_types))
+        except ValueError:
+            return InvalidResponse(jsonify(Error=f"Invalid cursor ({args['after']})"), 400)
+
+    response = parse_filters(filters)
+    if response.isValid(): return ValidResponse(Page(limit, after, response.value))
+    return response
+
+
+def parse_filters(filters: tuple) -> ValidationResponse:
+    """
+    Reads the given (parameter, type, DAO argument) filters from the query string.
+    Returns the DAO arguments of the filters present if the response is valid.
+    """
+    args = request.args
+    values = {}
+    for name, kind, argument in filters:
+        if name not in args: continue
+        try:
+            values[argument] = _parse(args[name], kind)
+        except ValueError:
+            return InvalidResponse(jsonify(Error=f"Invalid value for {name} ({args[name]})"), 400)
+    return ValidResponse(values)
@@ -1,5 +1,7 @@
 from flask import jsonify
 from Backend.DAOs.parts import PartDAO
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.serialization import RowMapper
 
 
 class PartHandler:
@@ -16,41 +18,23 @@ class PartHandler:
         result.append({'id': 4, 'name': 'clavo','color': 'gray'})
         return jsonify(result)
 
-    def mapToDict(self, tup):
-        # this is kind of getting hardcoded, because we have to know the order in which we want the query
-        # tuples are every record, so this just maps the records into dictionaries
-        # if the query changes, we have to change mapToDict. We have to have a constructor for each class
-        my_dict = {}
-        my_dict['id'] = tup[0]
-        my_dict['Name'] = tup[1]
-        my_dict['Color'] = tup[2]
-        my_dict['Material'] = tup[3]
-        my_dict['msrp'] = tup[4]
-        return my_dict
+    mapToDict = RowMapper("id", "Name", "Color", "Material", "msrp")
     
-    def mapToDictAllParts(self, tup):
-        # this is kind of getting hardcoded, because we have to know the order in which we want the query
-        # tuples are every record, so this just maps the records into dictionaries
-        # if the query changes, we have to change mapToDict. We have to have a constructor for each class
-        my_dict = {}
-        my_dict['id'] = tup[0]
-        my_dict['Name'] = tup[1]
-        my_dict['Color'] = tup[2]
-        my_dict['Material'] = tup[3]
-        my_dict['msrp'] = tup[4]
-        my_dict['Part Quantity'] = tup[5]
-        return my_dict
+    mapToDictAllParts = RowMapper("id", "Name", "Color", "Material", "msrp", "Part Quantity")
 
     def getAllParts(self):
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
         dao = PartDAO()
         # data access object: design pattern that captures, in an object, the query to be sent to the DB
-        dbtuples = dao.getAllParts()  # this should return an array of Tuples
+        dbtuples = dao.getAllParts(**page.arguments())  # this should return an array of Tuples
+        if dbtuples is None:
+            return jsonify(Error="Internal Server Error: Failed to load parts"), 500
 
-        result = []
-        # loop thru each tuple and turn them into a dictionary (serialization)
-        for tup in dbtuples:
-            result.append(self.mapToDict(tup))
-        return jsonify(result)
+        # turn each tuple into a dictionary (serialization)
+        result = self.mapToDict.many(dbtuples)
+        return page.respond(jsonify(result), dbtuples, key=lambda tup: (tup[0],))
 
     def searchByID(self, pid):
         dao = PartDAO()
@@ -3,23 +3,23 @@ from Backend.DAOs.parts import PartDAO
 from Backend.DAOs.warehouse_dao import WarehouseDAO
 from Backend.DAOs.stored_in import StoredInDAO
 from flask import jsonify
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.serialization import RowMapper
 
 
 class RackHandler:
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict['id'] = tup[0]
-        my_dict['Name'] = tup[1]
-        my_dict['Capacity'] = tup[2]
-        return my_dict
+    mapToDict = RowMapper("id", "Name", "Capacity")
 
     def getAllRacks(self):
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
         dao = RackDAO()
-        tups = dao.getAllRacks()
-        res = []
-        for tup in tups:
-            res.append(self.mapToDict(tup))
-        return jsonify(res)
+        tups = dao.getAllRacks(**page.arguments())
+        if tups is None:
+            return jsonify(Error="Internal Server Error: Failed to load racks"), 500
+        res = self.mapToDict.many(tups)
+        return page.respond(jsonify(res), tups, key=lambda tup: (tup[0],))
 
     def addRack(self, data):
         if len(data) != 2:
@@ -0,0 +1,108 @@
+from datetime import date
+import fastjsonschema
+from flask import jsonify
+from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse
+
+MAX_INT = 2**31 - 1  # INTEGER columns
+
+
+def _is_date(value: str) -> bool:
+    try:
+        date.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _id() -> dict:
+    return {"type": "integer", "exclusiveMinimum": 0, "maximum": MAX_INT}
+
+
+def _price() -> dict:
+    return {"type": "number", "exclusiveMinimum": 0}
+
+
+def _transaction(**properties) -> dict:
+    return {
+        "type": "object",
+        "properties": {"transactionDate": {"type": "string", "format": "date"}, "partAmount": _id(), **properties},
+        "required": ["transactionDate", "partAmount", *properties]
+    }
+
+
+class PayloadSchema:
+    """
+    The JSON Schema of a route's payload, compiled once at import into a validator for a single payload and one
+    for an array of them. Every violation is reported as {"Error": "<attribute> must ..."} with a 400.
+    JSON Schema also accepts integral numbers like 1.0 as integers, so the integer attributes of a valid payload are
+    converted to int in place before they reach an INTEGER column.
+    """
+    def __init__(self, schema: dict):
+        self.schema = schema
+        self._integers = tuple(attribute for attribute, property in schema.get("properties", {}).items()
+                               if property.get("type") == "integer")
+        formats = {"date": _is_date}
+        self._one = fastjsonschema.compile(schema, formats=formats)
+        self._many = fastjsonschema.compile({"type": "array", "items": schema}, formats=formats)
+
+    @staticmethod
+    def _message(error: fastjsonschema.JsonSchemaValueException, subject: str) -> str:
+        # "data.partAmount must be ..." -> "partAmount must be ...", "data must ..." -> "<subject> must ..."
+        attribute = error.name.partition(".")[2] or subject
+        return attribute + error.message[len(error.name):]
+
+    def _to_int(self, data: dict) -> dict:
+        for attribute in self._integers:
+            if attribute in data: data[attribute] = int(data[attribute])
+        return data
+
+    def validate(self, data) -> ValidationResponse:
+        """
+        Checks a single payload.
+        Returns the payload if the response is valid.
+        """
+        try:
+            return ValidResponse(self._to_int(self._one(data)))
+        except fastjsonschema.JsonSchemaValueException as e:
+            return InvalidResponse(jsonify(Error=self._message(e, "Request body")), 400)
+
+    def errors(self, rows: list) -> dict:
+        """
+        Checks an array of payloads in one call; the rows are only checked one at a time to find out which are
+        invalid when some are.
+        Returns the error of each invalid row by its index.
+        """
+        try:
+            self._many(rows)
+            for row in rows: self._to_int(row)
+            return {}
+        except fastjsonschema.JsonSchemaValueException:
+            pass
+        errors = {}
+        for row_no, row in enumerate(rows):
+            try:
+                self._to_int(self._one(row))
+            except fastjsonschema.JsonSchemaValueException as e:
+                errors[row_no] = self._message(e, "Row")
+        return errors
+
+
+INCOMING_TRANSACTION = PayloadSchema(_transaction(unitBuyPrice=_price(), partID=_id(), warehouseID=_id(),
+                                                  rackID=_id(), supplierID=_id(), userID=_id()))
+
+OUTGOING_TRANSACTION = PayloadSchema(_transaction(unitSalePrice=_price(), partID=_id(), warehouseID=_id(),
+                                                  customerID=_id(), userID=_id()))
+
+TRANSFER_TRANSACTION = PayloadSchema(_transaction(partID=_id(), warehouseID=_id(), userID=_id(),
+                                                  toWarehouse=_id(), userRequester=_id(), toRack=_id()))
+
+WAREHOUSE = PayloadSchema({
+    "type": "object",
+    "properties": {
+        **{key: {"type": "string", "minLength": 1}
+           for key in ("wname", "wcountry", "wregion", "wcity", "wstreet", "wzipcode")},
+        "wbudget": _price()
+    },
+    "required": ["wname", "wcountry", "wregion", "wcity", "wstreet", "wzipcode", "wbudget"],
+    "additionalProperties": False
+})
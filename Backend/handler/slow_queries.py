@@ -0,0 +1,34 @@
+from flask import jsonify, request
+from Backend.DAOs import slow_queries
+from Backend.dbconfig import slow_query_config
+
+
+class SlowQueryHandler:
+    def mapToDict(self, entry):
+        my_dict = {}
+        my_dict['id'] = entry['id']
+        my_dict['Duration (ms)'] = entry['duration_ms']
+        my_dict['Statement'] = entry['statement']
+        my_dict['Parameters'] = entry['parameters']
+        my_dict['Path'] = entry['path']
+        my_dict['Has Plan'] = entry['plan'] is not None
+        return my_dict
+
+    def getSlowQueries(self):
+        limit = request.args.get("limit", default=min(50, slow_query_config["ring_size"]), type=int)
+        if limit is None or not 0 < limit <= slow_query_config["ring_size"]:
+            return jsonify(Error=f"limit must be an integer between 1 and {slow_query_config['ring_size']}"), 400
+        res = []
+        for entry_id in slow_queries.entry_ids()[:limit]:
+            entry = slow_queries.get_entry(entry_id)
+            if entry is not None:  # may have been rotated out meanwhile
+                res.append(self.mapToDict(entry))
+        return jsonify(Threshold=slow_query_config["threshold_ms"], Result=res)
+
+    def getSlowQueryById(self, qid):
+        entry = slow_queries.get_entry(qid)
+        if entry is None:
+            return jsonify(Error="Slow query not found"), 404
+        res = self.mapToDict(entry)
+        res['Plan'] = entry['plan']
+        return jsonify(res)
@@ -0,0 +1,51 @@
+from typing import Callable, Iterable
+from flask import Response, current_app, jsonify, request, stream_with_context
+from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse
+
+# Streaming formats accepted in ?stream=<format>, and their mimetype
+STREAM_FORMATS = {"json": "application/json", "ndjson": "application/x-ndjson"}
+# Encoded rows sent per chunk of the response
+ROWS_PER_CHUNK = 500
+
+
+def requested_stream_format() -> ValidationResponse:
+    """
+    Reads the streaming format asked for through ?stream=json|ndjson, or an `Accept: application/x-ndjson` header.
+    Returns the format, or None for a regular response, if the response is valid.
+    """
+    fmt = request.args.get("stream")
+    if fmt is None:
+        if request.accept_mimetypes.best == STREAM_FORMATS["ndjson"]: fmt = "ndjson"
+        else: return ValidResponse(None)
+    if fmt not in STREAM_FORMATS:
+        return InvalidResponse(jsonify(Error=f"Invalid stream format ({fmt}). Expected one of {list(STREAM_FORMATS)}"), 400)
+    return ValidResponse(fmt)
+
+
+def stream_response(rows: Iterable, mapper: Callable, fmt: str, envelope: str = None) -> Response:
+    """
+    Builds a chunked response that maps and encodes the rows as they are fetched, so memory stays
+    constant no matter how many rows there are.
+    As a JSON array, the rows are wrapped in {envelope: [...]} when an envelope is given, matching the
+    body of the non-streaming route; as NDJSON, each row is a line of its own.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        if fmt == "json": yield f'{{"{envelope}": [' if envelope else "["
+        chunk = []
+        separator = ""
+        for row in rows:
+            if fmt == "ndjson":
+                chunk.append(dumps(mapper(row)) + "\n")
+            else:
+                chunk.append(separator + dumps(mapper(row)))
+                separator = ","
+            if len(chunk) == ROWS_PER_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+        if chunk: yield "".join(chunk)
+        if fmt == "json": yield "]}" if envelope else "]"
+
+    # The request context (and with it the unit of work's connection) stays open until the stream ends
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt])
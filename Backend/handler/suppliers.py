@@ -1,19 +1,11 @@
 from flask import jsonify
 from Backend.DAOs.suppliers import SupplierDAO
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.serialization import RowMapper
 
 
 class SupplierHandler:
-    @staticmethod
-    def mapToDict(tup):
-        my_dict = {}
-        my_dict['id'] = tup[0]
-        my_dict['name'] = tup[1]
-        my_dict['country'] = tup[2]
-        my_dict['city'] = tup[3]
-        my_dict['street'] = tup[4]
-        my_dict['zipcode'] = tup[5]
-        my_dict['phone'] = tup[6]
-        return my_dict
+    mapToDict = RowMapper("id", "name", "country", "city", "street", "zipcode", "phone")
 
 
     @staticmethod
@@ -34,14 +26,16 @@ class SupplierHandler:
         return {}
 
     def getAllSuppliers(self):
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
         dao = SupplierDAO()
 
-        tups = dao.getAllSuppliers()
-        res = []
-
-        for tup in tups:
-            res.append(self.mapToDict(tup))
-        return jsonify(res)
+        tups = dao.getAllSuppliers(**page.arguments())
+        if tups is None:
+            return jsonify(Error="Internal Server Error: Failed to load suppliers"), 500
+        res = self.mapToDict.many(tups)
+        return page.respond(jsonify(res), tups, key=lambda tup: (tup[0],))
 
     def insertSupplier(self, data):
         if len(data) != 6:
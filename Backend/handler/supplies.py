@@ -1,35 +1,14 @@
 from flask import jsonify
 from Backend.DAOs.supplies import SuppliesDao
 from Backend.DAOs.suppliers import SupplierDAO
+from Backend.handler.serialization import RowMapper
 
 
 class SuppliesHandler:
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict['sid'] = tup[0]
-        my_dict['pid'] = tup[1]
-        my_dict['stock'] = tup[2]
-        return my_dict
+    mapToDict = RowMapper("sid", "pid", "stock")
 
-    def mapPartsSupplied(self, tup):
-        """Builds dictionary that contains all the information of parts being supplied.
-
-        Args:
-            tup (tuple): A record, given as a tuple, from the natural join of parts and supplies tables.
-
-        Returns:
-            dict: A dictionary that contains all information mapped to the correct keys, later to be transformed into
-            JSON format.
-        """
-        my_dict = {}
-        my_dict['pid'] = tup[0]
-        my_dict['Part Name'] = tup[1]
-        my_dict['Part Color'] = tup[2]
-        my_dict['Part Material'] = tup[3]
-        my_dict['MSRP'] = tup[4]
-        my_dict['sid'] = tup[5]
-        my_dict['stock'] = tup[6]
-        return my_dict
+    # The natural join of parts and supplies of a supplier's parts
+    mapPartsSupplied = RowMapper("pid", "Part Name", "Part Color", "Part Material", "MSRP", "sid", "stock")
 
     def getPartsSupplied(self, sid):
         """ Returns all information for parts that are being supplied by a given supplier.
@@ -53,8 +32,5 @@ class SuppliesHandler:
         if not tups:
             return jsonify(Error=f"No parts are being supplied by supplier {sid}."), 404
 
-        res = []
-
-        for tup in tups:
-            res.append(self.mapPartsSupplied(tup))
+        res = self.mapPartsSupplied.many(tups)
         return jsonify(res), 200
@@ -1,28 +1,31 @@
 from Backend.DAOs.transaction import TransactionDAO
+from Backend.handler.pagination import parse_page, TRANSACTION_KEY, TRANSACTION_FILTERS
+from Backend.handler.streaming import requested_stream_format, stream_response
 from flask import jsonify
+from Backend.handler.serialization import RowMapper
 
 
 class TransactionHandler:    
-    def mapToDictWithType(self, tup):
-        my_dict = {}
-        my_dict["tid"] = tup[0]
-        my_dict["tdate"] = tup[1]
-        my_dict["part_amount"] = tup[2]
-        my_dict["pid"] = tup[3]
-        my_dict["uid"] = tup[4]
-        my_dict["wid"] = tup[5]
-        my_dict["type"] = tup[6]
-        return my_dict
+    mapToDictWithType = RowMapper("tid", "tdate", "part_amount", "pid", "uid", "wid", "type")
 
 
     def getAllTransactions(self):
+        response = parse_page(TRANSACTION_KEY, TRANSACTION_FILTERS)
+        if response.isValid(): page = response.value
+        else: return response.value
+        response = requested_stream_format()
+        if response.isValid(): stream_format = response.value
+        else: return response.value
+
         dao = TransactionDAO()
-        dbtuples = dao.getAllTransactions()
-        if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDictWithType(tup))
-            return jsonify(Result=result)
+        if stream_format:
+            rows = dao.getAllTransactions(stream=True, **page.arguments())
+            if rows is None: return jsonify("Internal Server Error: Failed to load transactions"), 500
+            return stream_response(rows, self.mapToDictWithType, stream_format, envelope="Result")
+        dbtuples = dao.getAllTransactions(**page.arguments())
+        if dbtuples is not None:
+            result = self.mapToDictWithType.many(dbtuples)
+            return page.respond(jsonify(Result=result), dbtuples, key=lambda tup: (tup[1], tup[0]))
         else:
             return jsonify("Internal Server Error: Failed to load transactions"), 500
     
@@ -31,9 +34,7 @@ class TransactionHandler:
         dao = TransactionDAO()
         dbtuples = dao.getTransactionByID(tid)
         if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDictWithType(tup))
+            result = self.mapToDictWithType.many(dbtuples)
             return jsonify(Result=result)
         else:
             return jsonify("Failed to find matching transaction"), 404
@@ -54,9 +55,7 @@ class TransactionHandler:
         dao = TransactionDAO()
         dbtuples = dao.getTransactionsByWarehouse(wid)
         if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDictWithType(tup))
+            result = self.mapToDictWithType.many(dbtuples)
             return jsonify(Result=result)
         else:
             return jsonify(f"Failed to find transactions for warehouse {wid}"), 404
@@ -1,34 +1,56 @@
 from Backend.DAOs.transferTransaction import TransferTransactionDAO
-from Backend.DAOs.warehouse_dao import WarehouseDAO
-from Backend.DAOs.parts import PartDAO
-from Backend.DAOs.user_dao import UserDAO
-from Backend.DAOs.stored_in import StoredInDAO
-from Backend.DAOs.racks import RackDAO
-from Backend.handler.validation import ValidResponse, InvalidResponse, ValidationResponse, ValidatableTransaction
+from Backend.handler.pagination import parse_page, TRANSACTION_KEY, TRANSACTION_FILTERS
+from Backend.handler.streaming import requested_stream_format, stream_response
+from Backend.handler.validation import ValidResponse, ValidationResponse, ValidatableTransaction, Rule, check_rules
+from Backend.handler.schemas import TRANSFER_TRANSACTION
 from flask import jsonify
+from Backend.handler.serialization import RowMapper
 
 
 class TransferTransactionHandler(ValidatableTransaction):
+    # HTTP status for each error code returned by post_transfer_transaction()
+    POSTING_ERROR_STATUS = {
+        "NO_SOURCE_RACK": 400,
+        "NOT_ENOUGH_STOCK": 400,
+        "RACK_NOT_FOUND": 500,
+        "RACK_IN_USE": 400,
+        "PART_IN_OTHER_RACK": 400
+    }
+
+    # Checked against the facts of the sender's and the receiver's side of every transfer, in order
+    RULES = (
+        Rule(lambda f: f["sender"]["userExists"], "Invalid Tranfer. The user who sent the transfer does not exist."),
+        Rule(lambda f: f["receiver"]["userExists"],
+             "Invalid Transfer. The user who requested the transfer does not exist."),
+        Rule(lambda f: f["sender"]["partExists"], "Invalid Transfer. The part does not exist."),
+        Rule(lambda f: f["sender"]["warehouseExists"],
+             "Invalid Transfer. The warehouse who sent the transfer does not exist."),
+        Rule(lambda f: f["receiver"]["warehouseExists"],
+             "Invalid Transfer. The warehouse that requested the warehouse does not exist."),
+        Rule(lambda f: f["sender"]["userWarehouse"] == f["warehouseID"],
+             "Invalid Transfer. The user who sent the transfer does not work in the "
+             "warehouse that will be sending the transfer."),
+        Rule(lambda f: f["receiver"]["userWarehouse"] == f["toWarehouse"],
+             "Invalid Transfer. The user who requested the transfer does not work in the "
+             "warehouse that will be receiving the transfer.")
+    )
+    # Checked after RULES when a transfer is modified; posted transfers get them from post_transfer_transaction()
+    RACK_RULES = (
+        Rule(lambda f: f["sender"]["partRack"],
+             "There is no rack for source warehouse ({warehouseID}) and part ({partID})"),
+        Rule(lambda f: f["receiver"]["rackCapacity"], "Rack {toRack} does not exist", 500),
+        Rule(lambda f: f["receiver"]["rackWarehouse"] is None
+             or (f["receiver"]["rackWarehouse"] == f["toWarehouse"] and f["receiver"]["rackPart"] == f["partID"]),
+             "Rack ({toRack}) not assigned to warehouse ({toWarehouse}) and part ({partID})"),
+        Rule(lambda f: not f["receiver"]["partRack"] or f["receiver"]["partRack"] == f["toRack"],
+             "Warehouse ({warehouseID}) and part ({partID}) assigned to rack {receiver[partRack]}, not {toRack}")
+    )
+
     def __init__(self):
         self.transferTransactionDAO = TransferTransactionDAO()
-        self.warehouse_dao = WarehouseDAO()
-        self.user_dao = UserDAO()
-        self.part_dao = PartDAO()
-        self.stored_in_dao = StoredInDAO()
-        self.rack_dao = RackDAO()
     
-    def mapToDict(self, tup):
-        my_dict = {}
-        my_dict["transferID"] = tup[0]
-        my_dict["transactionDate"] = tup[1]
-        my_dict["partAmount"] = tup[2]
-        my_dict["toWarehouse"] = tup[3]
-        my_dict["userRequester"] = tup[4]
-        my_dict["transactionID"] = tup[5]
-        my_dict["partID"] = tup[6]
-        my_dict["userID"] = tup[7]
-        my_dict["warehouseID"] = tup[8]
-        return my_dict
+    mapToDict = RowMapper("transferID", "transactionDate", "partAmount", "toWarehouse", "userRequester",
+                          "transactionID", "partID", "userID", "warehouseID")
     
 
     def addTransferTransaction(self, data):
@@ -40,55 +62,39 @@ class TransferTransactionHandler(ValidatableTransaction):
             transactionDate, partAmount, toWarehouse, userRequester, partID, warehouseID, userID, toRack = response.value
         else: return response.value
 
-        sender_rackID = self.stored_in_dao.get_rack_with_pid_wid(partID, warehouseID)
-        if not sender_rackID:
-            return jsonify(Error=f"There is no rack for source warehouse ({warehouseID}) and part ({partID})"), 400
-
-        response = self._validate_enough_quantity_in_warehouse(warehouseID, partID, sender_rackID, partAmount)
-        if response.isValid(): sender_parts_total = response.value
-        else: return response.value
-
-        response = self._validate_rack_exists(rackID=toRack)
-        if not response.isValid(): return response.value
-
-        response = self._validate_rack_is_not_in_use_for_different_part(toRack, toWarehouse, partID)
-        if not response.isValid(): return response.value
-
-        rid = StoredInDAO().get_rack_with_pid_wid(pid=partID, wid=toWarehouse)
-        if rid and rid != toRack:
-            return jsonify(Error=f"Warehouse ({warehouseID}) and part ({partID}) assigned to rack {rid}, not {toRack}"), 400
-
-        # Update part quantity in destination
-        to_warehouse_total = self.stored_in_dao.get_quantity(wid=toWarehouse, pid=partID, rid=toRack)
-        flag = self.stored_in_dao.modify_quantity(toWarehouse, partID, toRack, to_warehouse_total + partAmount)
-        if not flag: return jsonify(Error="Failed to modify destination quantity"), 500
-
-        # Update part quantity of the sender warehouse
-        flag = self.stored_in_dao.modify_quantity(warehouseID, partID, sender_rackID, sender_parts_total - partAmount)
-        if not flag: return jsonify(Error="Failed to modify source quantity"), 500
-
-        transferid = self.transferTransactionDAO.addTransferTransaction(
-                                                    to_warehouse=toWarehouse,
-                                                    user_requester=userRequester,
-                                                    tdate=transactionDate,
-                                                    part_amount=partAmount,
-                                                    pid=partID,
-                                                    uid=userID,
-                                                    wid=warehouseID)
-        
-        if not transferid: return jsonify(Error="Failed to add transfer transaction"), 500
+        # Move the parts between racks and record the transfer in one round-trip
+        result = self.transferTransactionDAO.postTransferTransaction(to_warehouse=toWarehouse,
+                                                                     user_requester=userRequester,
+                                                                     to_rack=toRack,
+                                                                     tdate=transactionDate,
+                                                                     part_amount=partAmount,
+                                                                     pid=partID,
+                                                                     uid=userID,
+                                                                     wid=warehouseID)
+        if not result: return jsonify(Error="Failed to add transfer transaction"), 500
+        error_code, error_message, transferid = result
+        if error_code: return jsonify(Error=error_message), self.POSTING_ERROR_STATUS.get(error_code, 400)
         data["transferid"] = transferid
         return jsonify(Result=data), 201
 
     
     def getAllTransferTransaction(self):
+        response = parse_page(TRANSACTION_KEY, TRANSACTION_FILTERS)
+        if response.isValid(): page = response.value
+        else: return response.value
+        response = requested_stream_format()
+        if response.isValid(): stream_format = response.value
+        else: return response.value
+
         dao = TransferTransactionDAO()
-        dbtuples = dao.getAllTransferTransaction()
-        if dbtuples:
-            result = []
-            for tup in dbtuples:
-                result.append(self.mapToDict(tup))
-            return jsonify(Result=result)
+        if stream_format:
+            rows = dao.getAllTransferTransaction(stream=True, **page.arguments())
+            if rows is None: return jsonify(Error="Failed to load transfer transaction"), 500
+            return stream_response(rows, self.mapToDict, stream_format, envelope="Result")
+        dbtuples = dao.getAllTransferTransaction(**page.arguments())
+        if dbtuples is not None:
+            result = self.mapToDict.many(dbtuples)
+            return page.respond(jsonify(Result=result), dbtuples, key=lambda tup: (tup[1], tup[5]))
         else:
             return jsonify(Error="Failed to load transfer transaction"), 500
     
@@ -107,30 +113,11 @@ class TransferTransactionHandler(ValidatableTransaction):
         Modifies the given transfer transaction.
         Performs basic validation but does not update other tables.
         """
-        response = self._validate_data(data)
-        if response.isValid():
-            transactionDate, partAmount, toWarehouse, userRequester, partID, warehouseID, userID, toRack = response.value
-        else: return response.value
-
-        response = self._validate_data(data)
+        response = self._validate_data(data, self.RACK_RULES)
         if response.isValid():
             transactionDate, partAmount, toWarehouse, userRequester, partID, warehouseID, userID, toRack = response.value
         else: return response.value
 
-        sender_rackID = self.stored_in_dao.get_rack_with_pid_wid(partID, warehouseID)
-        if not sender_rackID:
-            return jsonify(Error=f"There is no rack for source warehouse ({warehouseID}) and part ({partID})"), 400
-
-        response = self._validate_rack_exists(rackID=toRack)
-        if not response.isValid(): return response.value
-
-        response = self._validate_rack_is_not_in_use_for_different_part(toRack, toWarehouse, partID)
-        if not response.isValid(): return response.value
-
-        rid = StoredInDAO().get_rack_with_pid_wid(pid=partID, wid=toWarehouse)
-        if rid and rid != toRack:
-            return jsonify(Error=f"Warehouse ({warehouseID}) and part ({partID}) assigned to rack {rid}, not {toRack}"), 400
-
         dao = TransferTransactionDAO()
         count = dao.modifyTransferTransactionById(to_warehouse=toWarehouse,
                                                   user_requester=userRequester,
@@ -145,47 +132,22 @@ class TransferTransactionHandler(ValidatableTransaction):
         
 
 
-    def _validate_data(self, data) -> ValidationResponse:
+    def _validate_data(self, data, rules: tuple = ()) -> ValidationResponse:
         """
-        Checks whether the data is valid.
+        Checks whether the data is valid: its schema, then RULES and the given rules against the facts of both
+        sides of the transfer, loaded in one query.
         Returns the data if the response is valid.
         """
-        try:
-            transactionDate = data["transactionDate"]
-            partAmount = data["partAmount"]
-            toWarehouse = data["toWarehouse"]
-            userRequester = data["userRequester"]
-            partID = data["partID"]
-            warehouseID = data["warehouseID"]
-            userID = data["userID"]
-            toRack = data["toRack"]
-        except KeyError as e:
-            return InvalidResponse(jsonify(Error={"Invalid argument names!": e.args}), 400)
-        
-        # Check that all fields are integers.
-        for key in data:
-                if key != "transactionDate" and not isinstance(data[key],int):
-                    return InvalidResponse(jsonify(Error='{} has to be a integer.'.format(key)), 400)
-        
-        # Verify types
-        if not isinstance(data["transactionDate"],str):
-            return InvalidResponse(jsonify(Error='{} has to be a string.'.format("transactionDate")), 400)
-        elif partAmount <= 0:
-            return InvalidResponse(jsonify(Error="partAmount must be a positive number greater than 0"), 400)
-        elif not self.user_dao.getUserByID(userID):
-            return InvalidResponse(jsonify(Error="Invalid Tranfer. The user who sent the transfer does not exist."), 400)
-        elif not self.user_dao.getUserByID(userRequester):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The user who requested the transfer does not exist."), 400)
-        elif not self.part_dao.searchByID(partID):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The part does not exist."), 400)
-        elif not self.warehouse_dao.getWarehouseByID(warehouseID):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The warehouse who sent the transfer does not exist."), 400)
-        elif not self.warehouse_dao.getWarehouseByID(toWarehouse):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The warehouse that requested the warehouse does not exist."), 400)
-        elif not self.warehouse_dao.worksIn(warehouseID, userID):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The user who sent the transfer does not work in the "
-                           "warehouse that will be sending the transfer."), 400)
-        elif not self.warehouse_dao.worksIn(toWarehouse, userRequester):
-            return InvalidResponse(jsonify(Error="Invalid Transfer. The user who requested the transfer does not work in the "
-                           "warehouse that will be receiving the transfer."), 400)
+        response = TRANSFER_TRANSACTION.validate(data)
+        if not response.isValid(): return response
+        transactionDate, partAmount, toWarehouse, userRequester, partID, warehouseID, userID, toRack = (
+            data[key] for key in ("transactionDate", "partAmount", "toWarehouse", "userRequester", "partID",
+                                  "warehouseID", "userID", "toRack"))
+
+        response = self._load_facts(dict(uid=userID, wid=warehouseID, pid=partID),
+                                    dict(uid=userRequester, wid=toWarehouse, pid=partID, rid=toRack))
+        if response.isValid(): sender, receiver = response.value
+        else: return response
+        response = check_rules(self.RULES + rules, {**data, "sender": sender, "receiver": receiver})
+        if not response.isValid(): return response
         return ValidResponse(transactionDate, partAmount, toWarehouse, userRequester, partID, warehouseID, userID, toRack)
\ No newline at end of file
@@ -1,6 +1,8 @@
 from flask import jsonify
 from Backend.DAOs.user_dao import UserDAO
 from Backend.DAOs.warehouse_dao import WarehouseDAO
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.serialization import RowMapper
 
 
 class UserHandler:
@@ -17,29 +19,8 @@ class UserHandler:
         self.userDAO = UserDAO()
         self.warehouseDAO = WarehouseDAO()
 
-    def build_user_dict(self, row: tuple) -> dict:
-        """Builds dictionary that contains
-        all the information from a user.
-
-        Args:
-            row (tuple): A record, given as a tuple, from the
-        Users table in the database.
-
-        Returns:
-            dict: A dictionary that contains all the information mapped to
-        the correct keys. This is so that later the dictionary can be
-        transformed into JSON format.
-        """
-        user_dict = {}
-        user_dict['uid'] = row[0]
-        user_dict['ufname'] = row[1]
-        user_dict['ulname'] = row[2]
-        user_dict['username'] = row[3]
-        user_dict['uemail'] = row[4]
-        user_dict['upassword'] = row[5]
-        user_dict['wid'] = row[6]
-
-        return user_dict
+    # Maps a record of the Users table to the keys of its JSON
+    build_user_dict = RowMapper("uid", "ufname", "ulname", "username", "uemail", "upassword", "wid")
 
     def getAllUsers(self) -> object:
         """Returns all users from the Users Table in the database.
@@ -47,11 +28,15 @@ class UserHandler:
         Return: JSON object that contains all the users from the Users Table that were found in the database.
         """
 
-        all_users_tuples = self.userDAO.getAllUsers()
-        all_users_result = []
-        for record in all_users_tuples:
-            all_users_result.append(self.build_user_dict(record))
-        return jsonify(Users=all_users_result)
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
+
+        all_users_tuples = self.userDAO.getAllUsers(**page.arguments())
+        if all_users_tuples is None:
+            return jsonify(Error="Internal Server Error: Failed to load users"), 500
+        all_users_result = self.build_user_dict.many(all_users_tuples)
+        return page.respond(jsonify(Users=all_users_result), all_users_tuples, key=lambda record: (record[0],))
 
     @staticmethod
     def username_exists(username, uid=None, dao=UserDAO()):
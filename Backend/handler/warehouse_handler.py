@@ -1,7 +1,11 @@
+from datetime import date
 from typing import Iterable
 from flask import jsonify
 from Backend.DAOs.warehouse_dao import WarehouseDAO
 from Backend.handler.parts import PartHandler
+from Backend.handler.pagination import parse_page, ENTITY_KEY
+from Backend.handler.schemas import WAREHOUSE
+from Backend.handler.serialization import RowMapper
 
 
 class WarehouseHandler:
@@ -12,43 +16,18 @@ class WarehouseHandler:
         self.warehouseDAO = WarehouseDAO()
         self.parts_handler = PartHandler()
 
-    def build_warehouse_dict(self, row: tuple) -> dict:
-        """Builds dictionary that contains
-        all the information from a warehouse.
-
-        Args:
-            row (tuple): A record, given as a tuple, from the
-        Warehouses table in the database.
-
-        Returns:
-            dict: A dictionary that contains all the information mapped to
-        the correct keys. This is so that later the dictionary can be
-        transformed into JSON format.
-        """
-        warehouse_dict = {}
-        warehouse_dict['wid'] = row[0]
-        warehouse_dict['wname'] = row[1]
-        warehouse_dict['wcountry'] = row[2]
-        warehouse_dict['wregion'] = row[3]
-        warehouse_dict['wcity'] = row[4]
-        warehouse_dict['wstreet'] = row[5]
-        warehouse_dict['wzipcode'] = row[6]
-        warehouse_dict['wbudget'] = row[7]
-        return warehouse_dict
+    # Maps a record of the Warehouses table to the keys of its JSON
+    build_warehouse_dict = RowMapper("wid", "wname", "wcountry", "wregion", "wcity", "wstreet", "wzipcode", "wbudget")
 
     @staticmethod
     def _build_statistics_dict(results: Iterable, dict_name: str, dict_val_names: tuple) -> dict:
         """Constructs a dictionary for the local/global statistics based on the results
         returned from a query, the name of the dict, and the name of each value in the dict."""
-        values = []
-        for res in results:
-            mapped_values = {}
-            if len(res) != len(dict_val_names):
-                raise ValueError(f"There are more row names than value names! Error building '{dict_name}' dictionary.")
-            for i in range(len(res)):
-                mapped_values[dict_val_names[i]] = res[i]
-            values.append(mapped_values)
-        return {dict_name: values}
+        results = list(results)
+        # Every row of a query has the same columns, checking the first is enough
+        if results and len(results[0]) != len(dict_val_names):
+            raise ValueError(f"There are more row names than value names! Error building '{dict_name}' dictionary.")
+        return {dict_name: RowMapper(*dict_val_names).many(results)}
 
     def getAllWarehouses(self):
         """Returns all warehouses from the Warehouses Table in the database.
@@ -56,11 +35,16 @@ class WarehouseHandler:
         Return: JSON object that contains all the warehouses from the Warehouses Table that were found in the database.
         """
 
-        all_warehouses_tuples = self.warehouseDAO.getAllWarehouses()
-        all_warehouses_result = []
-        for record in all_warehouses_tuples:
-            all_warehouses_result.append(self.build_warehouse_dict(record))
-        return jsonify(Warehouses=all_warehouses_result)
+        response = parse_page(ENTITY_KEY)
+        if response.isValid(): page = response.value
+        else: return response.value
+
+        all_warehouses_tuples = self.warehouseDAO.getAllWarehouses(**page.arguments())
+        if all_warehouses_tuples is None:
+            return jsonify(Error="Internal Server Error: Failed to load warehouses"), 500
+        all_warehouses_result = self.build_warehouse_dict.many(all_warehouses_tuples)
+        return page.respond(jsonify(Warehouses=all_warehouses_result), all_warehouses_tuples,
+                            key=lambda record: (record[0],))
 
     def insertWarehouse(self, data) -> object:
         """Insert a new warehouse in the Warehouses Table in the database.
@@ -69,40 +53,13 @@ class WarehouseHandler:
         argument: Data to be sent to the DAO.
         Return: JSON object that contains the warehouse ID that was inserted.
         """
-        # Check that we received the expect quantity of data.
-        if len(data) != 7:
-            return jsonify(Error='Missing data to insert a warehouse.'), 400
-
-        # Handle that the keys are valid.
-        try:
-            warehouse_name = data['wname']
-            warehouse_country = data['wcountry']
-            warehouse_region = data['wregion']
-            warehouse_city = data['wcity']
-            warehouse_street = data['wstreet']
-            warehouse_zipcode = data['wzipcode']
-            warehouse_budget = data['wbudget']
-        except KeyError:
-            return jsonify(
-                Error='Unexpected or Incorrect attribute in post request. Check that the fields of the request are correct'), 400
-
-        # Check that there are no empty attributes and return which noe failed to the client.
-        for key in data:
-            if not data[key]:
-                return jsonify(Error='Missing ' + key + ' attribute'), 400
-
-        # Check that all fields except budget are strings.
-        for key in data:
-            if key != 'wbudget' and not isinstance(data[key], str):
-                return jsonify(Error='{} has to be a string.'.format(key)), 400
-
-        # Check that budget is a double.
-        if not isinstance(warehouse_budget, float):
-            return jsonify(Error='Field {} has to be a double'.format(warehouse_budget)), 400
-
-        # Budget can not be a negative value or zero.
-        elif warehouse_budget <= 0:
-            return jsonify(Error='Budget can not be a value less or equal to 0'), 400
+        # Check the attributes, their types and values against the warehouse schema.
+        response = WAREHOUSE.validate(data)
+        if not response.isValid():
+            return response.value
+        warehouse_name, warehouse_country, warehouse_region, warehouse_city, warehouse_street, warehouse_zipcode, \
+            warehouse_budget = (data[key] for key in ('wname', 'wcountry', 'wregion', 'wcity', 'wstreet', 'wzipcode',
+                                                      'wbudget'))
 
         warehouse_with_name_and_city_exists = self.warehouseDAO.name_city_combo_exists(wname=warehouse_name,
                                                                                        wcity=warehouse_city)
@@ -151,39 +108,13 @@ class WarehouseHandler:
         Returns:
             ID of the user that was updated in JSON format.
         """
-        # Check that we received the expect quantity of data.
-        if len(data) != 7:
-            return jsonify(Error='Incorrect amount of data has been sent.'), 400
-
-        # Handle that the keys are valid.
-        try:
-            warehouse_name = data['wname']
-            warehouse_country = data['wcountry']
-            warehouse_region = data['wregion']
-            warehouse_city = data['wcity']
-            warehouse_street = data['wstreet']
-            warehouse_zipcode = data['wzipcode']
-            warehouse_budget = data['wbudget']
-        except KeyError:
-            return jsonify(Error='Unexpected or Incorrect attribute in post request'), 400
-
-        # Check that there are no empty attributes and return which noe failed to the client.
-        for key in data:
-            if not data[key]:
-                return jsonify(Error='Missing ' + key + ' attribute'), 400
-
-        # Check that all fields except budget are strings.
-        for key in data:
-            if key != 'wbudget' and not isinstance(data[key], str):
-                return jsonify(Error='{} has to be a string.'.format(key)), 400
-
-        # Check that budget is a double.
-        if not isinstance(warehouse_budget, float):
-            return jsonify(Error='Field {} has to be a double'.format(warehouse_budget)), 400
-
-        # Budget can not be a negative value or zero.
-        elif warehouse_budget <= 0:
-            return jsonify(Error='Budget can not be a value less or equal to 0'), 400
+        # Check the attributes, their types and values against the warehouse schema.
+        response = WAREHOUSE.validate(data)
+        if not response.isValid():
+            return response.value
+        warehouse_name, warehouse_country, warehouse_region, warehouse_city, warehouse_street, warehouse_zipcode, \
+            warehouse_budget = (data[key] for key in ('wname', 'wcountry', 'wregion', 'wcity', 'wstreet', 'wzipcode',
+                                                      'wbudget'))
 
         warehouse_with_name_and_city_exists = self.warehouseDAO.name_city_combo_exists(wname=warehouse_name,
                                                                                        wcity=warehouse_city)
@@ -321,17 +252,44 @@ class WarehouseHandler:
             response['user_permissions'] = True
         return response
 
-    def getYearlyProfit(self, wid: int, data: object) -> object:
-        """Part of the local statistics. Specifies warehouse's profit by year."""
+    @staticmethod
+    def _parse_month(value) -> tuple | None:
+        """Parses a 'YYYY-MM' or 'YYYY-MM-DD' string into a (year, month) tuple, or returns None if it's invalid."""
+        try:
+            year, month = (int(part) for part in value.split("-")[:2])
+            date(year, month, 1)
+        except (AttributeError, ValueError, TypeError):
+            return None
+        return year, month
+
+    def getProfit(self, wid: int, data: object) -> object:
+        """Part of the local statistics. Specifies warehouse's profit by year, or by month
+        with {"granularity": "month"}, optionally between the "from" and "to" months ('YYYY-MM')."""
         # Verify if the user can access this resource
         user_perms = self._validate_user(data, wid)
         if user_perms['error']:
             return user_perms['error']
 
         elif user_perms['user_permissions']:
-            profit_results = self.warehouseDAO.get_profit_yearly(wid)
+            granularity = data.get('granularity', 'year')
+            if granularity not in ('year', 'month'):
+                return jsonify(Error=f"Invalid granularity '{granularity}'. Expected 'year' or 'month'."), 400
+            bounds = {}
+            for name in ('from', 'to'):
+                if data.get(name) is None: continue
+                bounds[name] = self._parse_month(data[name])
+                if bounds[name] is None:
+                    return jsonify(Error=f"Invalid argument! Expected 'YYYY-MM' for '{name}' but received {data[name]}."), 400
+
+            monthly = granularity == 'month'
+            profit_results = self.warehouseDAO.get_profit(wid, monthly=monthly,
+                                                          start=bounds.get('from'), end=bounds.get('to'))
             if not profit_results:
                 return jsonify(Error='No results were returned.'), 404
+            elif monthly:
+                rows = ("Year", "Month", "Warehouse", "Net Profit")
+                profit_results = self._build_statistics_dict(profit_results, "Monthly Profit", rows)
+                return jsonify(profit_results), 200
             else:
                 rows = ("Year", "Warehouse", "Net Profit")
                 profit_results = self._build_statistics_dict(profit_results, "Yearly Profit", rows)
@@ -451,9 +409,7 @@ class WarehouseHandler:
             if not all_parts:
                 return jsonify(Error='No parts were found in the warehouse.'), 404
             else:
-                result = []
-                for tup in all_parts:
-                    result.append(self.parts_handler.mapToDictAllParts(tup)) 
+                result = self.parts_handler.mapToDictAllParts.many(all_parts)
                 return jsonify(WarehouseParts=result), 200
 
     # Voila
@@ -0,0 +1,222 @@
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+import requests
+
+COLLECTION = Path(__file__).parent.parent / "Documents" / "Heroku.postman_collection.json"
+# Paginated lists are read a page at a time, like a dashboard would
+LIST_PAGE = "limit=50"
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+_LIST_ROUTES = re.compile(r"^/sqlytes/(part|customer|rack|supplier|user|warehouse|incoming|outgoing|exchange|transaction)$")
+_TRANSACTION_ROUTES = re.compile(r"^/sqlytes/(incoming|outgoing|exchange)$")
+
+
+@dataclass
+class Call:
+    """One request of the Postman collection."""
+    name: str
+    method: str
+    path: str
+    body: dict | None = None
+
+    @property
+    def route(self) -> str:
+        """The path with its ids replaced, so calls to the same route are reported together."""
+        return f"{self.method} {_ID_SEGMENT.sub('/<id>', self.path.split('?')[0])}"
+
+    @property
+    def category(self) -> str:
+        path = self.path.split("?")[0]
+        if self.method == "DELETE": return "delete"
+        if self.method == "GET":
+            if path.startswith(("/sqlytes/most/", "/sqlytes/least/")): return "global_stats"
+            return "list" if _LIST_ROUTES.match(path) else "detail"
+        if path.startswith("/sqlytes/warehouse/"): return "local_stats"  # POSTed, but read-only
+        if self.method == "POST" and _TRANSACTION_ROUTES.match(path): return "transaction_write"
+        return "entity_write"
+
+
+# Weight of every category of calls per scenario. Deletes are never replayed: they only succeed once.
+SCENARIOS = {
+    "dashboard": {"list": 4, "detail": 3, "global_stats": 2, "local_stats": 3},
+    "scanner": {"transaction_write": 1},
+    "mixed": {"list": 3, "detail": 3, "global_stats": 1, "local_stats": 2, "transaction_write": 2, "entity_write": 1},
+}
+# Scanner clients post this many transactions back to back, then pause like a handheld between pallets
+SCANNER_BURST = 20
+SCANNER_PAUSE = 0.5
+
+
+def load_collection(path: Path = COLLECTION) -> list:
+    """Reads every request of a Postman (v2.1) collection, keeping the path and JSON body only."""
+    calls = []
+
+    def walk(items):
+        for item in items:
+            if "item" in item:
+                walk(item["item"])
+                continue
+            request = item["request"]
+            url = request["url"]["raw"] if isinstance(request["url"], dict) else request["url"]
+            parts = urlsplit(url)
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            if request["method"] == "GET" and _LIST_ROUTES.match(parts.path) and not parts.query:
+                path += f"?{LIST_PAGE}"
+            raw = request.get("body", {}).get("raw", "").strip()
+            calls.append(Call(item["name"], request["method"], path, json.loads(raw) if raw else None))
+
+    with open(path) as file:
+        walk(json.load(file)["item"])
+    return calls
+
+
+def weighted_calls(calls: list, scenario: str) -> tuple:
+    """Returns the calls of the scenario and their weights; a category's weight is shared by its calls."""
+    weights = SCENARIOS[scenario]
+    chosen = [call for call in calls if call.category in weights]
+    per_category = {category: sum(call.category == category for call in chosen) for category in weights}
+    return chosen, [weights[call.category] / per_category[call.category] for call in chosen]
+
+
+@dataclass
+class RouteStats:
+    latencies: list = field(default_factory=list)
+    statuses: dict = field(default_factory=dict)
+    failures: int = 0  # connection errors and timeouts
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered: return 0.0
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _client(base_url: str, scenario: str, calls: list, weights: list, deadline: float, seed: int,
+            results: dict, lock: threading.Lock):
+    rng = random.Random(seed)
+    session = requests.Session()
+    sent = 0
+    while time.perf_counter() < deadline:
+        call = rng.choices(calls, weights)[0]
+        started = time.perf_counter()
+        status = None
+        try:
+            response = session.request(call.method, base_url + call.path, json=call.body, timeout=30)
+            response.content  # include the body transfer in the latency
+            status = response.status_code
+        except requests.RequestException:
+            pass
+        elapsed = time.perf_counter() - started
+        with lock:
+            stats = results.setdefault(call.route, RouteStats())
+            stats.latencies.append(elapsed)
+            if status is None:
+                stats.failures += 1
+            else:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        sent += 1
+        if scenario == "scanner" and sent % SCANNER_BURST == 0:
+            time.sleep(SCANNER_PAUSE)
+    session.close()
+
+
+def _build() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(base_url: str, scenario: str, clients: int, duration: float, seed: int = 0,
+        collection: Path = COLLECTION) -> dict:
+    """
+    Replays the collection's calls of the scenario from `clients` concurrent clients for `duration` seconds.
+    Returns the report: throughput overall and, per route, the request count, the latency percentiles in
+    milliseconds, the statuses and the error rate (5xx responses and failed connections).
+    """
+    calls, weights = weighted_calls(load_collection(collection), scenario)
+    results = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    threads = [threading.Thread(target=_client, args=(base_url.rstrip("/"), scenario, calls, weights, deadline,
+                                                      seed + n, results, lock))
+               for n in range(clients)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    total = errors = 0
+    for route, stats in sorted(results.items()):
+        ordered = sorted(stats.latencies)
+        count = len(ordered)
+        route_errors = stats.failures + sum(n for status, n in stats.statuses.items() if status >= 500)
+        total += count
+        errors += route_errors
+        routes[route] = {
+            "requests": count,
+            "throughput": round(count / elapsed, 2),
+            "p50_ms": round(_percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+            "statuses": {str(status): n for status, n in sorted(stats.statuses.items())},
+            "failures": stats.failures,
+            "error_rate": round(route_errors / count, 4)
+        }
+    return {
+        "build": _build(),
+        "scenario": scenario,
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "throughput": round(total / elapsed, 2),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "routes": routes
+    }
+
+
+class GunicornServer:
+    """Serves main:app with gunicorn and the repo's gunicorn.conf.py for the duration of a load test."""
+    def __init__(self, port: int, workers: int):
+        self.url = f"http://127.0.0.1:{port}"
+        self.command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                        "--workers", str(workers), "main:app"]
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, cwd=Path(__file__).parent.parent,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.perf_counter() + 30
+        while time.perf_counter() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self.process.returncode}")
+            try:
+                requests.get(f"{self.url}/sqlytes", timeout=1)
+                return self
+            except requests.RequestException:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError("gunicorn did not start within 30s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def default_workers() -> int:
+    return 2 * (os.cpu_count() or 1) + 1
@@ -0,0 +1,93 @@
+import os
+import time
+from functools import wraps
+from flask import Flask, Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+                               generate_latest, multiprocess)
+from Backend.DAOs import connection_pool
+
+# Under gunicorn every worker writes its samples to files in PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py)
+# and /metrics aggregates them, whichever worker serves the scrape. Without it the metrics are per process.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+QUERY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0)
+
+REQUEST_LATENCY = Histogram("sqlytes_request_duration_seconds", "Time to handle a request, including streamed bodies",
+                            ["method", "route", "status"])
+REQUESTS_IN_PROGRESS = Gauge("sqlytes_requests_in_progress", "Requests being handled",
+                             multiprocess_mode="livesum")
+DAO_LATENCY = Histogram("sqlytes_dao_duration_seconds", "Time spent in a DAO method", ["dao", "method"],
+                        buckets=QUERY_BUCKETS)
+CACHE_LOOKUPS = Counter("sqlytes_cache_lookups_total", "Cached entity lookups, by table and result (hit, miss, bypass)",
+                        ["table", "result"])
+DB_ERRORS = Counter("sqlytes_db_errors_total", "Statements that failed, by SQLSTATE", ["sqlstate", "error"])
+POOL_CONNECTIONS = Gauge("sqlytes_db_pool_connections", "Open pooled connections", ["state"],
+                         multiprocess_mode="livesum")
+POOL_MAX_CONNECTIONS = Gauge("sqlytes_db_pool_max_connections", "Connections the pools may open",
+                             multiprocess_mode="livesum")
+POOL_CHECKOUT_TIMEOUTS = Gauge("sqlytes_db_pool_checkout_timeouts", "Checkouts that timed out in the live workers",
+                               multiprocess_mode="livesum")
+
+
+def timed_dao_method(dao: str, method: str, function):
+    """Wraps a DAO method so its latency is observed under its class and method name."""
+    histogram = DAO_LATENCY.labels(dao, method)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+    return wrapper
+
+
+def record_db_error(error):
+    """Counts a failed statement. `error` is the psycopg2 error it raised."""
+    DB_ERRORS.labels(error.pgcode or "unknown", type(error).__name__).inc()
+
+
+def _update_pool_gauges():
+    stats = connection_pool.get_pool().stats()
+    POOL_CONNECTIONS.labels("in_use").set(stats["in_use"])
+    POOL_CONNECTIONS.labels("idle").set(stats["idle"])
+    POOL_MAX_CONNECTIONS.set(stats["max_connections"])
+    POOL_CHECKOUT_TIMEOUTS.set(stats["timeouts"])
+
+
+def _registry():
+    if not MULTIPROCESS: return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def init_app(app: Flask):
+    """Registers the request hooks that time every route and the /metrics endpoint that exposes the metrics."""
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def _record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    # Observed at teardown so streamed responses are timed until their last row is sent
+    @app.teardown_request
+    def _observe_request(exc):
+        started = g.pop("metrics_started", None)
+        if started is None: return
+        REQUESTS_IN_PROGRESS.dec()
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        status = g.pop("metrics_status", 500)
+        REQUEST_LATENCY.labels(request.method, route, str(status)).observe(time.perf_counter() - started)
+        _update_pool_gauges()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        _update_pool_gauges()
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,109 @@
+import re
+from pathlib import Path
+from Backend.DAOs.connection_pool import get_pool
+
+MIGRATIONS_DIR = Path(__file__).parent / "sql_data" / "migrations"
+# First line of a migration that can't run inside a transaction (e.g. CREATE INDEX CONCURRENTLY).
+# Its statements run one by one in autocommit mode.
+NO_TRANSACTION = "-- migrate:no-transaction"
+# Key of the advisory lock that keeps two processes from migrating at the same time
+LOCK_KEY = 7366110
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+
+class Migration:
+    """A numbered SQL file in sql_data/migrations, e.g. 0001_query_indexes.sql."""
+    FILE_NAME = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+    def __init__(self, path: Path):
+        match = self.FILE_NAME.match(path.name)
+        self.version = int(match.group(1))
+        self.name = match.group(2)
+        self.sql = path.read_text()
+        self.transactional = not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self) -> list:
+        """Splits the migration into statements. Only used for migrations without dollar-quoted bodies."""
+        lines = [line for line in self.sql.splitlines() if not line.lstrip().startswith("--")]
+        return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+
+def available_migrations() -> list:
+    """Returns every migration file, ordered by version."""
+    migrations = [Migration(path) for path in MIGRATIONS_DIR.glob("*.sql") if Migration.FILE_NAME.match(path.name)]
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return sorted(migrations, key=lambda migration: migration.version)
+
+
+def applied_versions(conn) -> set:
+    with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_VERSION_TABLE)
+        cursor.execute("SELECT version FROM schema_version;")
+        return {row[0] for row in cursor}
+
+
+def migrate(log=print) -> list:
+    """
+    Applies the pending migrations in version order and records each one in schema_version.
+    Transactional migrations are applied atomically with their version row.
+    Returns the migrations that were applied.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    applied = []
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s);", (LOCK_KEY,))
+        try:
+            done = applied_versions(conn)
+            for migration in available_migrations():
+                if migration.version in done: continue
+                log(f"Applying migration {migration.version:04d} {migration.name}")
+                if migration.transactional:
+                    conn.autocommit = False
+                    with conn.cursor() as cursor:
+                        cursor.execute(migration.sql)
+                        cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s);",
+                                       (migration.version, migration.name))
+                    conn.commit()
+                    conn.autocommit = True
+                else:
+                    with conn.cursor() as cursor:
+                        for statement in migration.statements():
+                            cursor.execute(statement)
+                        cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s);",
+                                       (migration.version, migration.name))
+                applied.append(migration)
+        finally:
+            if not conn.autocommit:
+                conn.rollback()
+                conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s);", (LOCK_KEY,))
+    finally:
+        if not conn.closed:
+            conn.autocommit = False
+        pool.putconn(conn)
+    return applied
+
+
+def status() -> list:
+    """Returns (version, name, applied) for every migration file."""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        done = applied_versions(conn)
+        conn.commit()
+    finally:
+        pool.putconn(conn)
+    return [(migration.version, migration.name, migration.version in done) for migration in available_migrations()]
@@ -0,0 +1,118 @@
+import json
+import psycopg2
+import psycopg2.extensions
+from Backend.DAOs.connection_pool import get_pool
+from Backend.DAOs.transaction import TransactionDAO
+from Backend.DAOs.incomingTransaction import IncomingTransactionDAO
+from Backend.DAOs.outgoingTransaction import OutgoingTransactionDAO
+from Backend.DAOs.transferTransaction import TransferTransactionDAO
+from Backend.DAOs.parts import PartDAO
+from Backend.DAOs.suppliers import SupplierDAO
+from Backend.DAOs.racks import RackDAO
+from Backend.DAOs.user_dao import UserDAO
+from Backend.DAOs.warehouse_dao import WarehouseDAO
+
+# Tables that grow with every transaction and must never be read sequentially by a request
+LARGE_TABLES = ("transactions", "incoming_transaction", "outgoing_transaction", "transfer")
+
+# DAO calls whose query plans are checked: (description, dao class, method, kwargs).
+# Full listings without a limit read everything by design and are left out.
+CHECKED_CALLS = (
+    ("Transactions page", TransactionDAO, "getAllTransactions", {"limit": 50}),
+    ("Transactions next page", TransactionDAO, "getAllTransactions", {"limit": 50, "after": ("2022-01-01", 1)}),
+    ("Transactions by warehouse", TransactionDAO, "getAllTransactions", {"limit": 50, "wid": 1}),
+    ("Transactions by user", TransactionDAO, "getAllTransactions", {"limit": 50, "uid": 1}),
+    ("Transactions by part", TransactionDAO, "getAllTransactions", {"limit": 50, "pid": 1}),
+    ("Transaction by id", TransactionDAO, "getTransactionByID", {"tid": 1}),
+    ("Transactions of a warehouse", TransactionDAO, "getTransactionsByWarehouse", {"wid": 1}),
+    ("Incoming page by warehouse", IncomingTransactionDAO, "getAllIncomingTransaction", {"limit": 50, "wid": 1}),
+    ("Incoming by id", IncomingTransactionDAO, "getIncomingTransactionById", {"itid": 1}),
+    ("Outgoing page by warehouse", OutgoingTransactionDAO, "getAllOutgoingTransaction", {"limit": 50, "wid": 1}),
+    ("Outgoing by id", OutgoingTransactionDAO, "getOutgoingTransactionById", {"otid": 1}),
+    ("Transfers page by warehouse", TransferTransactionDAO, "getAllTransferTransaction", {"limit": 50, "wid": 1}),
+    ("Transfer by id", TransferTransactionDAO, "getTransferTransactionById", {"transferid": 1}),
+    ("Part in transactions", PartDAO, "inTransaction", {"pid": 1}),
+    ("Supplier in transactions", SupplierDAO, "inTransaction", {"sid": 1}),
+    ("Rack in incoming transactions", RackDAO, "in_incoming_transaction", {"rid": 1}),
+    ("User has transactions", UserDAO, "userHasTransactions", {"uid": 1}),
+    ("User has transfers", UserDAO, "userHasTransfers", {"user_requester": 1}),
+    ("Works in", WarehouseDAO, "worksIn", {"wid": 1, "uid": 1}),
+    ("Most user exchanges", WarehouseDAO, "get_most_user_exchanges", {"wid": 1}),
+    ("Least daily cost", WarehouseDAO, "get_least_daily_cost", {"wid": 1}),
+    ("Most suppliers", WarehouseDAO, "get_most_suppliers", {"wid": 1}),
+    ("Profit", WarehouseDAO, "get_profit", {"wid": 1, "monthly": True}),
+)
+
+
+class ExplainCursor(psycopg2.extensions.cursor):
+    """
+    Plans every query instead of running it and keeps the plans on the connection, and the errors of the queries
+    that could not be planned, since the DAOs swallow them.
+    """
+    def execute(self, query, vars=None):
+        try:
+            super().execute(f"EXPLAIN (FORMAT JSON) {query}", vars)
+        except psycopg2.Error as e:
+            self.connection.errors.append((query, e.pgerror or str(e)))
+            raise
+        plan = self.fetchone()[0]
+        self.connection.plans.append((query, plan if isinstance(plan, list) else json.loads(plan)))
+
+
+class ExplainConnection(psycopg2.extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.plans = []
+        self.errors = []
+        self.cursor_factory = ExplainCursor
+
+
+def _sequential_scans(node: dict) -> list:
+    """Returns the relations read by Seq Scan nodes anywhere in the plan."""
+    scans = [node["Relation Name"]] if node.get("Node Type") == "Seq Scan" else []
+    for child in node.get("Plans", ()):
+        scans.extend(_sequential_scans(child))
+    return scans
+
+
+def check_query_plans(planner_defaults: bool = False) -> list:
+    """
+    Plans each of the CHECKED_CALLS against the configured database without running them.
+    Unless `planner_defaults` is set, sequential scans are disabled so a Seq Scan in a plan means there is
+    no index the query could use, whatever the size of the data; with the planner defaults the check is only
+    meaningful on a database seeded with production-like volumes.
+    The connection is in autocommit mode, so a query that fails to plan doesn't abort the transaction of the
+    calls after it.
+    Returns (description, query, failure) for every planned query, and for every call that planned nothing,
+    where failure is None or why the check failed.
+    """
+    conn = psycopg2.connect(get_pool().dsn, connection_factory=ExplainConnection)
+    conn.autocommit = True  # EXPLAIN without ANALYZE changes nothing
+    results = []
+    try:
+        if not planner_defaults:
+            with psycopg2.extensions.cursor(conn) as cursor:
+                cursor.execute("SET enable_seqscan = off;")
+        for description, dao_class, method, kwargs in CHECKED_CALLS:
+            dao = dao_class()
+            dao._conn = conn  # outside of a request the DAO uses its own connection
+            conn.plans = []
+            conn.errors = []
+            try:
+                getattr(dao, method)(**kwargs)
+            except (IndexError, TypeError):
+                # The DAO read the plan as its result and failed to unpack it; anything else is a real error
+                if not conn.plans: raise
+            finally:
+                dao._conn = None
+            for query, error in conn.errors:
+                results.append((description, " ".join(query.split()), f"could not be planned: {error.strip()}"))
+            for query, plan in conn.plans:
+                scans = [table for table in _sequential_scans(plan[0]["Plan"]) if table in LARGE_TABLES]
+                results.append((description, " ".join(query.split()),
+                                f"sequential scan on {', '.join(scans)}" if scans else None))
+            if not conn.plans and not conn.errors:
+                results.append((description, "", "no query was planned"))
+    finally:
+        conn.close()
+    return results
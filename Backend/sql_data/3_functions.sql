@@ -0,0 +1,258 @@
+-- Server-side transaction posting.
+-- Row locks are always taken in the same order (supplies, racks, stored_in by rid, warehouse)
+-- so concurrent postings can block each other but never deadlock.
+-- Quantities, stock and budgets are updated with deltas on the locked rows, never written back as absolute values.
+
+-- Validates and records an incoming transaction in a single round-trip.
+-- On success error_code is NULL and new_itid holds the new incoming transaction id.
+-- On failure nothing is written and error_code/error_message describe the first failed check.
+CREATE OR REPLACE FUNCTION post_incoming_transaction(
+    p_tdate DATE,
+    p_part_amount INTEGER,
+    p_unit_buy_price DOUBLE PRECISION,
+    p_pid INTEGER,
+    p_wid INTEGER,
+    p_rid INTEGER,
+    p_sid INTEGER,
+    p_uid INTEGER,
+    OUT error_code TEXT,
+    OUT error_message TEXT,
+    OUT new_itid INTEGER
+) AS $$
+DECLARE
+    v_cost DOUBLE PRECISION := p_unit_buy_price * p_part_amount;
+    v_stock INTEGER;
+    v_capacity INTEGER;
+    v_rack_wid INTEGER;
+    v_rack_pid INTEGER;
+    v_current INTEGER;
+    v_assigned_rid INTEGER;
+    v_budget DOUBLE PRECISION;
+    v_user_wid INTEGER;
+    v_tid INTEGER;
+BEGIN
+    SELECT stock INTO v_stock FROM supplies WHERE pid = p_pid AND sid = p_sid FOR UPDATE;
+    SELECT rcapacity INTO v_capacity FROM racks WHERE rid = p_rid FOR UPDATE;
+    PERFORM 1 FROM stored_in WHERE rid = p_rid OR (wid = p_wid AND pid = p_pid) ORDER BY rid FOR UPDATE;
+    SELECT wid, pid, parts_qty INTO v_rack_wid, v_rack_pid, v_current FROM stored_in WHERE rid = p_rid;
+    SELECT rid INTO v_assigned_rid FROM stored_in WHERE wid = p_wid AND pid = p_pid;
+    SELECT wbudget INTO v_budget FROM warehouse WHERE wid = p_wid FOR UPDATE;
+    SELECT wid INTO v_user_wid FROM users WHERE uid = p_uid;
+
+    -- Checks run in the same order the handler used to run them, so the same error wins.
+    IF COALESCE(v_stock, 0) = 0 THEN
+        error_code := 'PART_NOT_SUPPLIED';
+        error_message := format('Part %s not supplied by supplier %s', p_pid, p_sid);
+        RETURN;
+    ELSIF v_stock < p_part_amount THEN
+        error_code := 'NOT_ENOUGH_STOCK';
+        error_message := format('Not enough stock (%s) for requested amount (%s)', v_stock, p_part_amount);
+        RETURN;
+    END IF;
+
+    IF COALESCE(v_budget, 0) = 0 THEN
+        error_code := 'WAREHOUSE_NOT_FOUND';
+        error_message := format('Warehouse %s not found', p_wid);
+        RETURN;
+    ELSIF v_budget < v_cost THEN
+        error_code := 'NOT_ENOUGH_BUDGET';
+        error_message := format('Warehouse budget ($%s) not enough to buy %s unit(s) at $%s per unit.',
+                                v_budget, p_part_amount, p_unit_buy_price);
+        RETURN;
+    END IF;
+
+    IF v_user_wid IS NULL THEN
+        error_code := 'USER_NOT_FOUND';
+        error_message := format('Internal server error: Failed to get user with id %s', p_uid);
+        RETURN;
+    ELSIF v_user_wid <> p_wid THEN
+        error_code := 'USER_NOT_IN_WAREHOUSE';
+        error_message := format('User (%s) works at warehouse %s, not %s', p_uid, v_user_wid, p_wid);
+        RETURN;
+    END IF;
+
+    IF COALESCE(v_capacity, 0) = 0 THEN
+        error_code := 'RACK_NOT_FOUND';
+        error_message := format('Rack %s does not exist', p_rid);
+        RETURN;
+    END IF;
+
+    IF v_rack_wid IS NOT NULL AND NOT (v_rack_wid = p_wid AND v_rack_pid = p_pid) THEN
+        error_code := 'RACK_IN_USE';
+        error_message := format('Rack (%s) not assigned to warehouse (%s) and part (%s)', p_rid, p_wid, p_pid);
+        RETURN;
+    END IF;
+
+    IF v_assigned_rid IS NOT NULL AND v_assigned_rid <> p_rid THEN
+        error_code := 'PART_IN_OTHER_RACK';
+        error_message := format('Warehouse (%s) and part (%s) assigned to rack %s, not %s',
+                                p_wid, p_pid, v_assigned_rid, p_rid);
+        RETURN;
+    END IF;
+
+    v_current := COALESCE(v_current, 0);
+    IF p_part_amount > v_capacity - v_current THEN
+        error_code := 'RACK_FULL';
+        error_message := format('Too many parts (%s). Rack (%s) can hold %s more parts.',
+                                p_part_amount, p_rid, GREATEST(v_capacity - v_current, 0));
+        RETURN;
+    END IF;
+
+    INSERT INTO transactions (tdate, part_amount, pid, uid, wid)
+    VALUES (p_tdate, p_part_amount, p_pid, p_uid, p_wid)
+    RETURNING tid INTO v_tid;
+
+    INSERT INTO incoming_transaction (unit_buy_price, sid, rid, tid)
+    VALUES (p_unit_buy_price, p_sid, p_rid, v_tid)
+    RETURNING itid INTO new_itid;
+
+    IF v_stock = p_part_amount THEN
+        DELETE FROM supplies WHERE pid = p_pid AND sid = p_sid;
+    ELSE
+        UPDATE supplies SET stock = stock - p_part_amount WHERE pid = p_pid AND sid = p_sid;
+    END IF;
+
+    UPDATE warehouse SET wbudget = wbudget - v_cost WHERE wid = p_wid;
+
+    INSERT INTO stored_in (wid, pid, rid, parts_qty)
+    VALUES (p_wid, p_pid, p_rid, p_part_amount)
+    ON CONFLICT (wid, pid) DO UPDATE SET parts_qty = stored_in.parts_qty + EXCLUDED.parts_qty;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Validates and records an outgoing transaction (a sale) in a single round-trip.
+-- On success error_code is NULL and new_otid holds the new outgoing transaction id.
+CREATE OR REPLACE FUNCTION post_outgoing_transaction(
+    p_tdate DATE,
+    p_part_amount INTEGER,
+    p_unit_sale_price DOUBLE PRECISION,
+    p_pid INTEGER,
+    p_wid INTEGER,
+    p_cid INTEGER,
+    p_uid INTEGER,
+    OUT error_code TEXT,
+    OUT error_message TEXT,
+    OUT new_otid INTEGER
+) AS $$
+DECLARE
+    v_rid INTEGER;
+    v_quantity INTEGER;
+    v_user_wid INTEGER;
+    v_tid INTEGER;
+BEGIN
+    SELECT rid, parts_qty INTO v_rid, v_quantity FROM stored_in WHERE wid = p_wid AND pid = p_pid FOR UPDATE;
+    SELECT wid INTO v_user_wid FROM users WHERE uid = p_uid;
+
+    IF v_user_wid IS NULL THEN
+        error_code := 'USER_NOT_FOUND';
+        error_message := format('Internal server error: Failed to get user with id %s', p_uid);
+        RETURN;
+    ELSIF v_user_wid <> p_wid THEN
+        error_code := 'USER_NOT_IN_WAREHOUSE';
+        error_message := format('User (%s) works at warehouse %s, not %s', p_uid, v_user_wid, p_wid);
+        RETURN;
+    END IF;
+
+    IF v_rid IS NULL THEN
+        error_code := 'NO_RACK';
+        error_message := format('No rack assigned to warehouse (%s) and part (%s)', p_wid, p_pid);
+        RETURN;
+    ELSIF v_quantity < p_part_amount THEN
+        error_code := 'NOT_ENOUGH_STOCK';
+        error_message := format('Not enough stock (%s) in warehouse (%s)', v_quantity, p_wid);
+        RETURN;
+    END IF;
+
+    INSERT INTO transactions (tdate, part_amount, pid, uid, wid)
+    VALUES (p_tdate, p_part_amount, p_pid, p_uid, p_wid)
+    RETURNING tid INTO v_tid;
+
+    INSERT INTO outgoing_transaction (unit_sale_price, cid, tid)
+    VALUES (p_unit_sale_price, p_cid, v_tid)
+    RETURNING otid INTO new_otid;
+
+    UPDATE stored_in SET parts_qty = parts_qty - p_part_amount WHERE wid = p_wid AND pid = p_pid;
+    UPDATE warehouse SET wbudget = wbudget + p_part_amount * p_unit_sale_price WHERE wid = p_wid;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Moves parts from the sender warehouse's rack to the given rack of the receiving warehouse
+-- and records the transfer in a single round-trip.
+-- Users, part and warehouses are validated by the caller; this checks and updates the racks.
+-- On success error_code is NULL and new_transferid holds the new transfer id.
+CREATE OR REPLACE FUNCTION post_transfer_transaction(
+    p_tdate DATE,
+    p_part_amount INTEGER,
+    p_pid INTEGER,
+    p_wid INTEGER,
+    p_uid INTEGER,
+    p_to_wid INTEGER,
+    p_user_requester INTEGER,
+    p_to_rid INTEGER,
+    OUT error_code TEXT,
+    OUT error_message TEXT,
+    OUT new_transferid INTEGER
+) AS $$
+DECLARE
+    v_capacity INTEGER;
+    v_source_rid INTEGER;
+    v_source_quantity INTEGER;
+    v_rack_wid INTEGER;
+    v_rack_pid INTEGER;
+    v_assigned_rid INTEGER;
+    v_tid INTEGER;
+BEGIN
+    SELECT rcapacity INTO v_capacity FROM racks WHERE rid = p_to_rid FOR UPDATE;
+    PERFORM 1 FROM stored_in
+    WHERE (wid = p_wid AND pid = p_pid) OR rid = p_to_rid OR (wid = p_to_wid AND pid = p_pid)
+    ORDER BY rid FOR UPDATE;
+    SELECT rid, parts_qty INTO v_source_rid, v_source_quantity FROM stored_in WHERE wid = p_wid AND pid = p_pid;
+    SELECT wid, pid INTO v_rack_wid, v_rack_pid FROM stored_in WHERE rid = p_to_rid;
+    SELECT rid INTO v_assigned_rid FROM stored_in WHERE wid = p_to_wid AND pid = p_pid;
+
+    IF v_source_rid IS NULL THEN
+        error_code := 'NO_SOURCE_RACK';
+        error_message := format('There is no rack for source warehouse (%s) and part (%s)', p_wid, p_pid);
+        RETURN;
+    ELSIF v_source_quantity < p_part_amount THEN
+        error_code := 'NOT_ENOUGH_STOCK';
+        error_message := format('Not enough stock (%s) in warehouse (%s)', v_source_quantity, p_wid);
+        RETURN;
+    END IF;
+
+    IF COALESCE(v_capacity, 0) = 0 THEN
+        error_code := 'RACK_NOT_FOUND';
+        error_message := format('Rack %s does not exist', p_to_rid);
+        RETURN;
+    END IF;
+
+    IF v_rack_wid IS NOT NULL AND NOT (v_rack_wid = p_to_wid AND v_rack_pid = p_pid) THEN
+        error_code := 'RACK_IN_USE';
+        error_message := format('Rack (%s) not assigned to warehouse (%s) and part (%s)', p_to_rid, p_to_wid, p_pid);
+        RETURN;
+    END IF;
+
+    IF v_assigned_rid IS NOT NULL AND v_assigned_rid <> p_to_rid THEN
+        error_code := 'PART_IN_OTHER_RACK';
+        error_message := format('Warehouse (%s) and part (%s) assigned to rack %s, not %s',
+                                p_wid, p_pid, v_assigned_rid, p_to_rid);
+        RETURN;
+    END IF;
+
+    UPDATE stored_in SET parts_qty = parts_qty - p_part_amount WHERE wid = p_wid AND pid = p_pid;
+
+    INSERT INTO stored_in (wid, pid, rid, parts_qty)
+    VALUES (p_to_wid, p_pid, p_to_rid, p_part_amount)
+    ON CONFLICT (wid, pid) DO UPDATE SET parts_qty = stored_in.parts_qty + EXCLUDED.parts_qty;
+
+    INSERT INTO transactions (tdate, part_amount, pid, uid, wid)
+    VALUES (p_tdate, p_part_amount, p_pid, p_uid, p_wid)
+    RETURNING tid INTO v_tid;
+
+    INSERT INTO transfer (to_warehouse, user_requester, tid)
+    VALUES (p_to_wid, p_user_requester, v_tid)
+    RETURNING transferid INTO new_transferid;
+END;
+$$ LANGUAGE plpgsql;
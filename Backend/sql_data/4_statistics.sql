@@ -0,0 +1,237 @@
+-- Rollups behind the global statistics.
+-- The counters are kept current by statement-level triggers on the tables they summarize, so the
+-- statistics routes read a handful of rows through an index instead of aggregating every transaction.
+-- rebuild_statistics() recomputes them from scratch (it runs once at the end of this script).
+
+-- Counters are upserted in key order so concurrent statements lock their rows in the same order.
+-- Rack counts have a table of their own: they change with stored_in, which transfers write after the transaction,
+-- and sharing rows with the transaction counters would let two opposite transfers lock them in opposite orders.
+CREATE TABLE IF NOT EXISTS warehouse_stats (
+    wid INTEGER PRIMARY KEY REFERENCES warehouse(wid) ON DELETE CASCADE,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    incoming_count INTEGER NOT NULL DEFAULT 0,
+    outgoing_count INTEGER NOT NULL DEFAULT 0,
+    transfer_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS warehouse_rack_stats (
+    wid INTEGER PRIMARY KEY REFERENCES warehouse(wid) ON DELETE CASCADE,
+    rack_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    uid INTEGER PRIMARY KEY REFERENCES users(uid) ON DELETE CASCADE,
+    transaction_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- One index per ranking so each top-k query is a short index scan
+CREATE INDEX IF NOT EXISTS warehouse_rack_stats_rack_count_idx ON warehouse_rack_stats (rack_count);
+CREATE INDEX IF NOT EXISTS warehouse_stats_transaction_count_idx ON warehouse_stats (transaction_count);
+CREATE INDEX IF NOT EXISTS warehouse_stats_incoming_count_idx ON warehouse_stats (incoming_count);
+CREATE INDEX IF NOT EXISTS warehouse_stats_outgoing_count_idx ON warehouse_stats (outgoing_count);
+CREATE INDEX IF NOT EXISTS warehouse_stats_transfer_count_idx ON warehouse_stats (transfer_count);
+CREATE INDEX IF NOT EXISTS user_stats_transaction_count_idx ON user_stats (transaction_count);
+
+
+-- Recomputes every counter from the base tables.
+CREATE OR REPLACE FUNCTION rebuild_statistics() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE warehouse_stats, warehouse_rack_stats, user_stats IN EXCLUSIVE MODE;
+    DELETE FROM warehouse_stats;
+    DELETE FROM warehouse_rack_stats;
+    DELETE FROM user_stats;
+
+    INSERT INTO warehouse_stats (wid, transaction_count, incoming_count, outgoing_count, transfer_count)
+    SELECT w.wid, COUNT(t.tid), COUNT(it.tid), COUNT(ot.tid), COUNT(tr.tid)
+    FROM warehouse AS w
+    LEFT JOIN transactions AS t ON t.wid = w.wid
+    LEFT JOIN incoming_transaction AS it ON it.tid = t.tid
+    LEFT JOIN outgoing_transaction AS ot ON ot.tid = t.tid
+    LEFT JOIN transfer AS tr ON tr.tid = t.tid
+    GROUP BY w.wid;
+
+    INSERT INTO warehouse_rack_stats (wid, rack_count)
+    SELECT w.wid, COUNT(s.rid)
+    FROM warehouse AS w
+    LEFT JOIN stored_in AS s ON s.wid = w.wid
+    GROUP BY w.wid;
+
+    INSERT INTO user_stats (uid, transaction_count)
+    SELECT u.uid, COUNT(t.tid)
+    FROM users AS u
+    LEFT JOIN transactions AS t ON t.uid = u.uid
+    GROUP BY u.uid;
+END;
+$$;
+
+
+-- transactions: counts each transaction for its warehouse and user.
+-- Subtype rows are inserted after and deleted before their transaction, so inserts and deletes only change
+-- the transaction counters; when an update moves a transaction to another warehouse, its subtype counter moves too.
+CREATE OR REPLACE FUNCTION stats_on_transactions() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO warehouse_stats AS s (wid, transaction_count)
+        SELECT wid, COUNT(*) FROM new_rows GROUP BY wid ORDER BY wid
+        ON CONFLICT (wid) DO UPDATE SET transaction_count = s.transaction_count + EXCLUDED.transaction_count;
+
+        INSERT INTO user_stats AS s (uid, transaction_count)
+        SELECT uid, COUNT(*) FROM new_rows GROUP BY uid ORDER BY uid
+        ON CONFLICT (uid) DO UPDATE SET transaction_count = s.transaction_count + EXCLUDED.transaction_count;
+
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO warehouse_stats AS s (wid, transaction_count)
+        SELECT wid, -COUNT(*) FROM old_rows GROUP BY wid ORDER BY wid
+        ON CONFLICT (wid) DO UPDATE SET transaction_count = s.transaction_count + EXCLUDED.transaction_count;
+
+        INSERT INTO user_stats AS s (uid, transaction_count)
+        SELECT uid, -COUNT(*) FROM old_rows GROUP BY uid ORDER BY uid
+        ON CONFLICT (uid) DO UPDATE SET transaction_count = s.transaction_count + EXCLUDED.transaction_count;
+
+    ELSE
+        -- Only the rows whose warehouse or user changed move between counters
+        WITH moved AS (
+            SELECT wid, tid, -1 AS delta FROM (SELECT wid, tid FROM old_rows EXCEPT SELECT wid, tid FROM new_rows) AS o
+            UNION ALL
+            SELECT wid, tid, 1 AS delta FROM (SELECT wid, tid FROM new_rows EXCEPT SELECT wid, tid FROM old_rows) AS n
+        )
+        INSERT INTO warehouse_stats AS s (wid, transaction_count, incoming_count, outgoing_count, transfer_count)
+        SELECT m.wid, SUM(m.delta),
+               COALESCE(SUM(m.delta) FILTER (WHERE it.tid IS NOT NULL), 0),
+               COALESCE(SUM(m.delta) FILTER (WHERE ot.tid IS NOT NULL), 0),
+               COALESCE(SUM(m.delta) FILTER (WHERE tr.tid IS NOT NULL), 0)
+        FROM moved AS m
+        LEFT JOIN incoming_transaction AS it ON it.tid = m.tid
+        LEFT JOIN outgoing_transaction AS ot ON ot.tid = m.tid
+        LEFT JOIN transfer AS tr ON tr.tid = m.tid
+        GROUP BY m.wid ORDER BY m.wid
+        ON CONFLICT (wid) DO UPDATE
+        SET transaction_count = s.transaction_count + EXCLUDED.transaction_count,
+            incoming_count = s.incoming_count + EXCLUDED.incoming_count,
+            outgoing_count = s.outgoing_count + EXCLUDED.outgoing_count,
+            transfer_count = s.transfer_count + EXCLUDED.transfer_count;
+
+        WITH moved AS (
+            SELECT uid, -1 AS delta FROM (SELECT uid, tid FROM old_rows EXCEPT SELECT uid, tid FROM new_rows) AS o
+            UNION ALL
+            SELECT uid, 1 AS delta FROM (SELECT uid, tid FROM new_rows EXCEPT SELECT uid, tid FROM old_rows) AS n
+        )
+        INSERT INTO user_stats AS s (uid, transaction_count)
+        SELECT uid, SUM(delta) FROM moved GROUP BY uid ORDER BY uid
+        ON CONFLICT (uid) DO UPDATE SET transaction_count = s.transaction_count + EXCLUDED.transaction_count;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+
+-- incoming_transaction, outgoing_transaction and transfer: TG_ARGV[0] is the warehouse_stats counter of the table.
+-- The counter belongs to the warehouse of the subtype row's transaction; updates only matter if they change the tid.
+CREATE OR REPLACE FUNCTION stats_on_transaction_subtype() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_changes TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_changes := 'SELECT tid, 1 AS delta FROM new_rows';
+    ELSIF TG_OP = 'DELETE' THEN
+        v_changes := 'SELECT tid, -1 AS delta FROM old_rows';
+    ELSE
+        v_changes := '(SELECT tid, -1 AS delta FROM (SELECT tid FROM old_rows EXCEPT SELECT tid FROM new_rows) AS o)
+                      UNION ALL
+                      (SELECT tid, 1 AS delta FROM (SELECT tid FROM new_rows EXCEPT SELECT tid FROM old_rows) AS n)';
+    END IF;
+    EXECUTE format(
+        'INSERT INTO warehouse_stats AS s (wid, %1$I)
+         SELECT t.wid, SUM(c.delta) FROM (%2$s) AS c JOIN transactions AS t ON t.tid = c.tid
+         GROUP BY t.wid ORDER BY t.wid
+         ON CONFLICT (wid) DO UPDATE SET %1$I = s.%1$I + EXCLUDED.%1$I', TG_ARGV[0], v_changes);
+    RETURN NULL;
+END;
+$$;
+
+
+-- stored_in: one row per rack assigned to a warehouse. Quantity updates don't change the counters.
+CREATE OR REPLACE FUNCTION stats_on_stored_in() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO warehouse_rack_stats AS s (wid, rack_count)
+        SELECT wid, COUNT(*) FROM new_rows GROUP BY wid ORDER BY wid
+        ON CONFLICT (wid) DO UPDATE SET rack_count = s.rack_count + EXCLUDED.rack_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO warehouse_rack_stats AS s (wid, rack_count)
+        SELECT wid, -COUNT(*) FROM old_rows GROUP BY wid ORDER BY wid
+        ON CONFLICT (wid) DO UPDATE SET rack_count = s.rack_count + EXCLUDED.rack_count;
+    ELSE
+        WITH moved AS (
+            SELECT wid, -1 AS delta FROM (SELECT wid, rid FROM old_rows EXCEPT SELECT wid, rid FROM new_rows) AS o
+            UNION ALL
+            SELECT wid, 1 AS delta FROM (SELECT wid, rid FROM new_rows EXCEPT SELECT wid, rid FROM old_rows) AS n
+        )
+        INSERT INTO warehouse_rack_stats AS s (wid, rack_count)
+        SELECT wid, SUM(delta) FROM moved GROUP BY wid ORDER BY wid
+        ON CONFLICT (wid) DO UPDATE SET rack_count = s.rack_count + EXCLUDED.rack_count;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+
+-- Transition tables can only be declared for triggers on a single event, hence one trigger per event.
+DROP TRIGGER IF EXISTS transactions_stats_insert ON transactions;
+DROP TRIGGER IF EXISTS transactions_stats_update ON transactions;
+DROP TRIGGER IF EXISTS transactions_stats_delete ON transactions;
+CREATE TRIGGER transactions_stats_insert AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transactions();
+CREATE TRIGGER transactions_stats_update AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transactions();
+CREATE TRIGGER transactions_stats_delete AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transactions();
+
+DROP TRIGGER IF EXISTS incoming_stats_insert ON incoming_transaction;
+DROP TRIGGER IF EXISTS incoming_stats_update ON incoming_transaction;
+DROP TRIGGER IF EXISTS incoming_stats_delete ON incoming_transaction;
+CREATE TRIGGER incoming_stats_insert AFTER INSERT ON incoming_transaction
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('incoming_count');
+CREATE TRIGGER incoming_stats_update AFTER UPDATE ON incoming_transaction
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('incoming_count');
+CREATE TRIGGER incoming_stats_delete AFTER DELETE ON incoming_transaction
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('incoming_count');
+
+DROP TRIGGER IF EXISTS outgoing_stats_insert ON outgoing_transaction;
+DROP TRIGGER IF EXISTS outgoing_stats_update ON outgoing_transaction;
+DROP TRIGGER IF EXISTS outgoing_stats_delete ON outgoing_transaction;
+CREATE TRIGGER outgoing_stats_insert AFTER INSERT ON outgoing_transaction
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('outgoing_count');
+CREATE TRIGGER outgoing_stats_update AFTER UPDATE ON outgoing_transaction
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('outgoing_count');
+CREATE TRIGGER outgoing_stats_delete AFTER DELETE ON outgoing_transaction
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('outgoing_count');
+
+DROP TRIGGER IF EXISTS transfer_stats_insert ON transfer;
+DROP TRIGGER IF EXISTS transfer_stats_update ON transfer;
+DROP TRIGGER IF EXISTS transfer_stats_delete ON transfer;
+CREATE TRIGGER transfer_stats_insert AFTER INSERT ON transfer
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('transfer_count');
+CREATE TRIGGER transfer_stats_update AFTER UPDATE ON transfer
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('transfer_count');
+CREATE TRIGGER transfer_stats_delete AFTER DELETE ON transfer
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_transaction_subtype('transfer_count');
+
+DROP TRIGGER IF EXISTS stored_in_stats_insert ON stored_in;
+DROP TRIGGER IF EXISTS stored_in_stats_update ON stored_in;
+DROP TRIGGER IF EXISTS stored_in_stats_delete ON stored_in;
+CREATE TRIGGER stored_in_stats_insert AFTER INSERT ON stored_in
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_stored_in();
+CREATE TRIGGER stored_in_stats_update AFTER UPDATE ON stored_in
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_stored_in();
+CREATE TRIGGER stored_in_stats_delete AFTER DELETE ON stored_in
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION stats_on_stored_in();
+
+SELECT rebuild_statistics();
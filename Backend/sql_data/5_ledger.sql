@@ -0,0 +1,127 @@
+-- Per-warehouse monthly ledger behind the profit statistics.
+-- earnings are the outgoing transactions' sales and costs the incoming transactions' purchases, both
+-- bucketed by the warehouse and month of the transaction. Statement-level triggers on the subtype tables,
+-- and on transactions for changes to the date, warehouse or amount, keep every bucket current.
+-- rebuild_ledger() recomputes it from scratch (it runs once at the end of this script).
+
+CREATE TABLE IF NOT EXISTS warehouse_ledger (
+    wid INTEGER REFERENCES warehouse(wid) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+    earnings DOUBLE PRECISION NOT NULL DEFAULT 0,
+    costs DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (wid, year, month)
+);
+
+
+-- Recomputes every bucket from the base tables.
+CREATE OR REPLACE FUNCTION rebuild_ledger() RETURNS VOID
+LANGUAGE plpgsql AS $$
+BEGIN
+    LOCK TABLE warehouse_ledger IN EXCLUSIVE MODE;
+    DELETE FROM warehouse_ledger;
+
+    INSERT INTO warehouse_ledger (wid, year, month, earnings, costs)
+    SELECT t.wid, EXTRACT(YEAR FROM t.tdate)::INTEGER, EXTRACT(MONTH FROM t.tdate)::INTEGER,
+           COALESCE(SUM(ot.unit_sale_price * t.part_amount), 0),
+           COALESCE(SUM(it.unit_buy_price * t.part_amount), 0)
+    FROM transactions AS t
+    LEFT JOIN outgoing_transaction AS ot ON ot.tid = t.tid
+    LEFT JOIN incoming_transaction AS it ON it.tid = t.tid
+    WHERE ot.tid IS NOT NULL OR it.tid IS NOT NULL
+    GROUP BY 1, 2, 3;
+END;
+$$;
+
+
+-- incoming_transaction and outgoing_transaction: TG_ARGV[0] is the ledger column ('costs' or 'earnings')
+-- and TG_ARGV[1] the unit price column of the table. Updates take the old amounts out and put the new ones in.
+-- Buckets are upserted in key order so concurrent statements lock them in the same order.
+CREATE OR REPLACE FUNCTION ledger_on_transaction_subtype() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_changes TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        v_changes := format('SELECT tid, %1$I AS price FROM new_rows', TG_ARGV[1]);
+    ELSIF TG_OP = 'DELETE' THEN
+        v_changes := format('SELECT tid, -%1$I AS price FROM old_rows', TG_ARGV[1]);
+    ELSE
+        v_changes := format('SELECT tid, -%1$I AS price FROM old_rows UNION ALL SELECT tid, %1$I FROM new_rows',
+                            TG_ARGV[1]);
+    END IF;
+    EXECUTE format(
+        'INSERT INTO warehouse_ledger AS l (wid, year, month, %1$I)
+         SELECT t.wid, EXTRACT(YEAR FROM t.tdate)::INTEGER, EXTRACT(MONTH FROM t.tdate)::INTEGER,
+                SUM(c.price * t.part_amount)
+         FROM (%2$s) AS c JOIN transactions AS t ON t.tid = c.tid
+         GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+         ON CONFLICT (wid, year, month) DO UPDATE SET %1$I = l.%1$I + EXCLUDED.%1$I', TG_ARGV[0], v_changes);
+    RETURN NULL;
+END;
+$$;
+
+
+-- transactions: moves the amounts of updated transactions to their new bucket.
+-- Subtype rows are inserted after and deleted before their transaction, so inserts and deletes are
+-- accounted for by the subtype triggers.
+CREATE OR REPLACE FUNCTION ledger_on_transactions() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    WITH changed AS (
+        SELECT o.wid, o.tdate, -o.part_amount AS part_amount, o.tid
+        FROM old_rows AS o JOIN new_rows AS n ON n.tid = o.tid
+        WHERE (o.wid, o.tdate, o.part_amount) IS DISTINCT FROM (n.wid, n.tdate, n.part_amount)
+        UNION ALL
+        SELECT n.wid, n.tdate, n.part_amount, n.tid
+        FROM old_rows AS o JOIN new_rows AS n ON n.tid = o.tid
+        WHERE (o.wid, o.tdate, o.part_amount) IS DISTINCT FROM (n.wid, n.tdate, n.part_amount)
+    )
+    INSERT INTO warehouse_ledger AS l (wid, year, month, earnings, costs)
+    SELECT c.wid, EXTRACT(YEAR FROM c.tdate)::INTEGER, EXTRACT(MONTH FROM c.tdate)::INTEGER,
+           COALESCE(SUM(ot.unit_sale_price * c.part_amount), 0),
+           COALESCE(SUM(it.unit_buy_price * c.part_amount), 0)
+    FROM changed AS c
+    LEFT JOIN outgoing_transaction AS ot ON ot.tid = c.tid
+    LEFT JOIN incoming_transaction AS it ON it.tid = c.tid
+    WHERE ot.tid IS NOT NULL OR it.tid IS NOT NULL
+    GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+    ON CONFLICT (wid, year, month) DO UPDATE
+    SET earnings = l.earnings + EXCLUDED.earnings,
+        costs = l.costs + EXCLUDED.costs;
+    RETURN NULL;
+END;
+$$;
+
+
+DROP TRIGGER IF EXISTS transactions_ledger_update ON transactions;
+CREATE TRIGGER transactions_ledger_update AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transactions();
+
+DROP TRIGGER IF EXISTS incoming_ledger_insert ON incoming_transaction;
+DROP TRIGGER IF EXISTS incoming_ledger_update ON incoming_transaction;
+DROP TRIGGER IF EXISTS incoming_ledger_delete ON incoming_transaction;
+CREATE TRIGGER incoming_ledger_insert AFTER INSERT ON incoming_transaction
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('costs', 'unit_buy_price');
+CREATE TRIGGER incoming_ledger_update AFTER UPDATE ON incoming_transaction
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('costs', 'unit_buy_price');
+CREATE TRIGGER incoming_ledger_delete AFTER DELETE ON incoming_transaction
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('costs', 'unit_buy_price');
+
+DROP TRIGGER IF EXISTS outgoing_ledger_insert ON outgoing_transaction;
+DROP TRIGGER IF EXISTS outgoing_ledger_update ON outgoing_transaction;
+DROP TRIGGER IF EXISTS outgoing_ledger_delete ON outgoing_transaction;
+CREATE TRIGGER outgoing_ledger_insert AFTER INSERT ON outgoing_transaction
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('earnings', 'unit_sale_price');
+CREATE TRIGGER outgoing_ledger_update AFTER UPDATE ON outgoing_transaction
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('earnings', 'unit_sale_price');
+CREATE TRIGGER outgoing_ledger_delete AFTER DELETE ON outgoing_transaction
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION ledger_on_transaction_subtype('earnings', 'unit_sale_price');
+
+SELECT rebuild_ledger();
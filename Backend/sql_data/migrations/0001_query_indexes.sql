@@ -0,0 +1,33 @@
+-- migrate:no-transaction
+-- Indexes for the filters and joins the DAOs run; 1_schema.sql only declares primary keys and uniques.
+-- Built CONCURRENTLY so a live database keeps taking writes, which is why this migration runs outside a
+-- transaction. If a build fails, drop the INVALID index it leaves behind before running the migration again.
+
+-- Transaction lists: keyset pages by (tdate, tid), alone or filtered by warehouse, user or part
+-- (DAO._getPage, transaction_filters). The wid index also serves the local statistics and worksIn checks.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_tdate_tid_idx ON transactions (tdate, tid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_wid_tdate_tid_idx ON transactions (wid, tdate, tid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_uid_tdate_tid_idx ON transactions (uid, tdate, tid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transactions_pid_tdate_tid_idx ON transactions (pid, tdate, tid);
+
+-- Transfers received by a warehouse (getTransactionsByWarehouse) or requested by a user
+-- (userHasTransfers, get_most_user_exchanges)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transfer_to_warehouse_idx ON transfer (to_warehouse);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS transfer_user_requester_idx ON transfer (user_requester);
+
+-- Incoming transactions by supplier (SupplierDAO.inTransaction) and rack (RackDAO.in_incoming_transaction)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS incoming_transaction_sid_idx ON incoming_transaction (sid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS incoming_transaction_rid_idx ON incoming_transaction (rid);
+
+-- Outgoing transactions by customer (foreign key checks when a customer is deleted)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS outgoing_transaction_cid_idx ON outgoing_transaction (cid);
+
+-- worksIn (uid, wid) as an index-only lookup, and the users of a warehouse
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_uid_wid_idx ON users (uid, wid);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_wid_idx ON users (wid);
+
+-- Suppliers of a part (PartDAO.inStock); the primary key starts with sid
+CREATE INDEX CONCURRENTLY IF NOT EXISTS supplies_pid_idx ON supplies (pid);
+
+-- Warehouses storing a part (PartDAO.beingStored); the primary key starts with wid
+CREATE INDEX CONCURRENTLY IF NOT EXISTS stored_in_pid_idx ON stored_in (pid);
@@ -0,0 +1,54 @@
+-- Notifications behind the part, rack, warehouse and user caches (Backend/DAOs/cache.py).
+-- Every change to one of those rows is sent on the entity_changes channel as '<table>:<id>' once its transaction
+-- commits ('<table>:*' for a TRUNCATE), so each API worker drops its copy. The id column is the trigger's argument.
+CREATE OR REPLACE FUNCTION notify_entity_change() RETURNS trigger AS $$
+DECLARE
+    old_id TEXT;
+    new_id TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('entity_changes', TG_TABLE_NAME || ':*');
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        old_id := to_jsonb(OLD) ->> TG_ARGV[0];
+        PERFORM pg_notify('entity_changes', TG_TABLE_NAME || ':' || old_id);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_id := to_jsonb(NEW) ->> TG_ARGV[0];
+        IF new_id IS DISTINCT FROM old_id THEN
+            PERFORM pg_notify('entity_changes', TG_TABLE_NAME || ':' || new_id);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS parts_notify_change ON parts;
+CREATE TRIGGER parts_notify_change AFTER INSERT OR UPDATE OR DELETE ON parts
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change('pid');
+DROP TRIGGER IF EXISTS parts_notify_truncate ON parts;
+CREATE TRIGGER parts_notify_truncate AFTER TRUNCATE ON parts
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_entity_change('pid');
+
+DROP TRIGGER IF EXISTS racks_notify_change ON racks;
+CREATE TRIGGER racks_notify_change AFTER INSERT OR UPDATE OR DELETE ON racks
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change('rid');
+DROP TRIGGER IF EXISTS racks_notify_truncate ON racks;
+CREATE TRIGGER racks_notify_truncate AFTER TRUNCATE ON racks
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_entity_change('rid');
+
+-- Also fires on the budget updates of every posted transaction; pg_notify sends repeated payloads once per commit
+DROP TRIGGER IF EXISTS warehouse_notify_change ON warehouse;
+CREATE TRIGGER warehouse_notify_change AFTER INSERT OR UPDATE OR DELETE ON warehouse
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change('wid');
+DROP TRIGGER IF EXISTS warehouse_notify_truncate ON warehouse;
+CREATE TRIGGER warehouse_notify_truncate AFTER TRUNCATE ON warehouse
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_entity_change('wid');
+
+DROP TRIGGER IF EXISTS users_notify_change ON users;
+CREATE TRIGGER users_notify_change AFTER INSERT OR UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_entity_change('uid');
+DROP TRIGGER IF EXISTS users_notify_truncate ON users;
+CREATE TRIGGER users_notify_truncate AFTER TRUNCATE ON users
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_entity_change('uid');
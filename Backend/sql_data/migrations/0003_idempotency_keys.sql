@@ -0,0 +1,12 @@
+-- Responses of the transaction POSTs sent with an Idempotency-Key header (Backend/handler/idempotency.py), replayed
+-- when a client retries with the same key. A key is claimed in the same transaction as the posting, so a failed
+-- posting leaves nothing behind and the retry runs again. Rows past expires_at are reclaimed by the next request
+-- with their key, and deleted by: flask --app main purge-idempotency-keys
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint BYTEA NOT NULL,  -- SHA-256 of the route and the request body
+    status SMALLINT,
+    body BYTEA,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_expires_at_idx ON idempotency_keys (expires_at);
@@ -0,0 +1,19 @@
+import os
+import shutil
+import tempfile
+
+# Prometheus multiprocess mode: the workers share their samples through files in this directory.
+# It has to be set before the app (and prometheus_client) is imported, and emptied at every start.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "sqlytes-prometheus"))
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+
+
+def child_exit(server, worker):
+    # Drops the live gauges (in-flight requests, pool connections) of the worker that exited
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
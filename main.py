@@ -1,6 +1,13 @@
+import json
+import click
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from Backend import dbconfig as config
+from Backend.DAOs.connection_pool import get_pool
+from Backend.DAOs import cache, unit_of_work, instrumentation
+from Backend.DAOs.warehouse_dao import WarehouseDAO
+from Backend import datagen, loadtest, metrics, migrations, query_plans
+from Backend.benchmarks import database, micro
 # Import handlers
 from Backend.handler.outgoingTransaction import OutgoingTransactionHandler
 from Backend.handler.parts import PartHandler
@@ -13,12 +20,23 @@ from Backend.handler.incomingTransaction import IncomingTransactionHandler
 from Backend.handler.transferTransaction import TransferTransactionHandler
 from Backend.handler.supplies import SuppliesHandler
 from Backend.handler.transaction import TransactionHandler
+from Backend.handler.bulkTransaction import BulkTransactionHandler
+from Backend.handler.slow_queries import SlowQueryHandler
+from Backend.handler.serialization import FastJSONProvider
+from Backend.handler.export import ExportHandler
+from Backend.handler.batch import BatchHandler
+from Backend.handler.idempotency import idempotent
+from Backend.DAOs.idempotency import IdempotencyDAO
 
 
 # App initialization
 app = Flask(__name__)
 app.config.from_object(config)
+app.json = FastJSONProvider(app)  # orjson when installed
 CORS(app)
+metrics.init_app(app)  # /metrics, registered first so it times the other hooks too
+unit_of_work.init_app(app)  # one connection and one transaction per request
+instrumentation.init_app(app)  # query counts and timings per request
 
 
 @app.route('/')  # default route handler
@@ -27,6 +45,50 @@ def greeting():
     return 'Hello, this is the SQLytes API!'
 
 
+# Hits and misses of the part, rack, warehouse and user caches of this worker
+@app.route('/sqlytes/cache', methods=['GET'])
+def cacheStatistics():
+    if request.method == "GET":
+        return jsonify(cache.stats())
+    else:
+        return jsonify('Not supported'), 405
+
+
+# Connection pool counters for this worker, used to size the pool under load
+@app.route('/sqlytes/pool', methods=['GET'])
+def poolStatistics():
+    if request.method == "GET":
+        return jsonify(get_pool().stats())
+    else:
+        return jsonify('Not supported'), 405
+
+
+# Slow query log, newest first (?limit=n), and one slow query with its captured plan
+@app.route('/sqlytes/admin/slow-queries', methods=['GET'])
+def slowQueries():
+    if request.method == "GET":
+        return SlowQueryHandler().getSlowQueries()
+    else:
+        return jsonify('Not supported'), 405
+
+
+@app.route('/sqlytes/admin/slow-queries/<string:qid>', methods=['GET'])
+def slowQueryById(qid):
+    if request.method == "GET":
+        return SlowQueryHandler().getSlowQueryById(qid)
+    else:
+        return jsonify('Not supported'), 405
+
+
+# Whole datasets for analytics clients: ?format=csv|arrow|parquet (or the Accept header) plus the list filters
+@app.route('/sqlytes/export/<string:dataset>', methods=['GET'])
+def exportDataset(dataset):
+    if request.method == "GET":
+        return ExportHandler().getExport(dataset)
+    else:
+        return jsonify('Not supported'), 405
+
+
 # route to get all parts or add a part
 @app.route('/sqlytes/part', methods=['GET', 'POST'])
 def getAllParts():
@@ -185,6 +247,7 @@ def getWarehouseById(wid: int):
 
 
 @app.route("/sqlytes/incoming", methods=["POST", "GET"])
+@idempotent  # POSTs with an Idempotency-Key header are safe to retry
 def allIncomingTransactions():
     try:
         if request.method == "POST":
@@ -216,6 +279,7 @@ def incomingTransactionById(itid):
 
 
 @app.route("/sqlytes/outgoing", methods=["POST", "GET"])
+@idempotent  # POSTs with an Idempotency-Key header are safe to retry
 def allOutgoingTransactions():
     try:
         if request.method == "POST":
@@ -249,6 +313,7 @@ def outgoingTransactionById(otid):
 
 
 @app.route("/sqlytes/exchange", methods=["POST", "GET"])
+@idempotent  # POSTs with an Idempotency-Key header are safe to retry
 def allTransferTransactions():
     try:
         if request.method == "POST":
@@ -280,6 +345,34 @@ def transferTransactionById(transferid):
 
     
 
+# Bulk ingestion of incoming, outgoing or exchange transactions, as a JSON array or NDJSON
+@app.route("/sqlytes/bulk/<string:kind>", methods=["POST"])
+def bulkTransactions(kind):
+    try:
+        if request.method == "POST":
+            handler = BulkTransactionHandler()
+            if request.mimetype in handler.NDJSON_MIMETYPES:
+                rows = handler.parseNDJSON(request.stream)
+            else:
+                rows = request.get_json(silent=True)
+            return handler.addTransactions(kind, rows)
+        else:
+            return jsonify(Error="Not supported"), 405
+    except Exception as e:
+        print(e)
+        return jsonify(Error="An unkown error occurred"), 500
+
+
+
+# Several requests to the routes above in one call, on one connection, optionally as one transaction
+@app.route("/sqlytes/batch", methods=["POST"])
+def batchRequests():
+    if request.method == "POST":
+        return BatchHandler().runBatch(request.get_json(silent=True))
+    else:
+        return jsonify(Error="Not supported"), 405
+
+
 @app.route("/sqlytes/transaction", methods=["GET", "PUT"])
 def allTransactions():
     try:
@@ -355,7 +448,7 @@ def warehouseMostCityTransactions():
 @app.route("/sqlytes/warehouse/<int:wid>/profit", methods=["POST"])
 def warehouseProfit(wid):
     if request.method == "POST":
-        return WarehouseHandler().getYearlyProfit(wid, request.json)
+        return WarehouseHandler().getProfit(wid, request.json)
     else:
         return jsonify("Not Supported"), 405
 
@@ -418,5 +511,159 @@ def userWorksInWarehouse(wid, uid):
         return jsonify("Not Supported"), 405
 
 
+# Recomputes the warehouse ledgers behind the profit statistics: flask --app main rebuild-ledger
+@app.cli.command("rebuild-ledger")
+def rebuildLedger():
+    if WarehouseDAO().rebuild_ledger() is None:
+        raise SystemExit("Failed to rebuild the warehouse ledger")
+    print("Warehouse ledger rebuilt")
+
+
+# Deletes the expired Idempotency-Key responses: flask --app main purge-idempotency-keys
+@app.cli.command("purge-idempotency-keys")
+def purgeIdempotencyKeys():
+    purged = IdempotencyDAO().purgeExpired()
+    if purged is None:
+        raise SystemExit("Failed to purge the idempotency keys")
+    print(f"Purged {purged} expired idempotency key(s)")
+
+
+# Applies the pending migrations in Backend/sql_data/migrations: flask --app main migrate [--status]
+@app.cli.command("migrate")
+@click.option("--status", "show_status", is_flag=True, help="List the migrations and whether they were applied.")
+def migrate(show_status):
+    if show_status:
+        for version, name, applied in migrations.status():
+            print(f"{version:04d} {name}: {'applied' if applied else 'pending'}")
+        return
+    applied = migrations.migrate()
+    print(f"Applied {len(applied)} migration(s)" if applied else "The database is up to date")
+
+
+# Fails if a DAO query would read a large table sequentially: flask --app main check-query-plans
+@app.cli.command("check-query-plans")
+@click.option("--planner-defaults", is_flag=True, help="Keep sequential scans enabled (for production-sized data).")
+def checkQueryPlans(planner_defaults):
+    failures = 0
+    for description, query, failure in query_plans.check_query_plans(planner_defaults):
+        if failure:
+            failures += 1
+            print(f"FAIL {description}: {failure}\n     {query}")
+        else:
+            print(f"ok   {description}")
+    if failures:
+        raise SystemExit(f"{failures} quer{'y' if failures == 1 else 'ies'} failed the check")
+
+
+
+# Loads a synthetic dataset for load and capacity tests: flask --app main generate-data --transactions 10000000
+@app.cli.command("generate-data")
+@click.option("--warehouses", default=datagen.Scale.warehouses, show_default=True)
+@click.option("--racks-per-warehouse", default=datagen.Scale.racks_per_warehouse, show_default=True)
+@click.option("--parts", default=datagen.Scale.parts, show_default=True)
+@click.option("--suppliers", default=datagen.Scale.suppliers, show_default=True)
+@click.option("--customers", default=datagen.Scale.customers, show_default=True)
+@click.option("--users-per-warehouse", default=datagen.Scale.users_per_warehouse, show_default=True)
+@click.option("--transactions", default=datagen.Scale.transactions, show_default=True)
+@click.option("--days", default=datagen.Scale.days, show_default=True, help="Days of history from 2019-01-01.")
+@click.option("--mix", default=datagen.Scale.mix, type=(float, float, float), show_default=True,
+              help="Share of incoming, outgoing and transfer transactions.")
+@click.option("--seed", default=datagen.Scale.seed, show_default=True)
+@click.option("--workers", default=None, type=int, help="Loading processes (default: one per CPU).")
+def generateData(workers, **scale):
+    try:
+        rows = datagen.generate(datagen.Scale(**scale), workers)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    for table, count in rows.items():
+        print(f"{table}: {count}")
+
+
+
+# Replays the Postman collection as weighted scenarios and reports latencies as JSON:
+# flask --app main load-test --scenario mixed --clients 32 --duration 60 --serve --output report.json
+@app.cli.command("load-test")
+@click.option("--scenario", type=click.Choice(sorted(loadtest.SCENARIOS)), default="mixed", show_default=True)
+@click.option("--clients", default=16, show_default=True, help="Concurrent clients.")
+@click.option("--duration", default=60.0, show_default=True, help="Seconds to run.")
+@click.option("--url", default="http://127.0.0.1:8000", show_default=True, help="Server to test.")
+@click.option("--serve", is_flag=True, help="Start main:app under gunicorn on a local port instead of using --url.")
+@click.option("--workers", default=loadtest.default_workers(), show_default=True, help="gunicorn workers with --serve.")
+@click.option("--seed", default=0, show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the report to this file instead of stdout.")
+def loadTest(scenario, clients, duration, url, serve, workers, seed, output):
+    if serve:
+        with loadtest.GunicornServer(port=8765, workers=workers) as server:
+            report = loadtest.run(server.url, scenario, clients, duration, seed)
+    else:
+        report = loadtest.run(url, scenario, clients, duration, seed)
+    report = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+
+# Times handler serialization and the DAO row loop on stub cursors, compared with a saved baseline:
+# flask --app main benchmark [--save-baseline]
+@app.cli.command("benchmark")
+@click.option("--sizes", default=",".join(map(str, micro.SIZES)), show_default=True, help="Row counts to run.")
+@click.option("--repeat", default=3, show_default=True, help="Runs per benchmark; the best one is kept.")
+@click.option("--only", default=None, help="Only run the benchmarks whose name starts with this.")
+@click.option("--baseline", "baseline_path", type=click.Path(dir_okay=False), default=str(micro.BASELINE),
+              show_default=True)
+@click.option("--threshold", default=0.1, show_default=True, help="Slowdown over the baseline that fails (0.1 = 10%).")
+@click.option("--save-baseline", is_flag=True, help="Store the results as the new baseline instead of comparing.")
+def benchmark(sizes, repeat, only, baseline_path, threshold, save_baseline):
+    try:
+        sizes = tuple(int(size) for size in sizes.split(","))
+    except ValueError:
+        raise click.BadParameter("sizes must be comma separated integers")
+    report = micro.run(sizes, repeat, only)
+    if save_baseline:
+        micro.save_baseline(report, baseline_path)
+        print(f"Baseline saved to {baseline_path}")
+        return
+    baseline = micro.load_baseline(baseline_path)
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return
+    regressions = micro.compare(report, baseline, threshold)
+    for name, size, before, seconds, change in regressions:
+        print(f"REGRESSION {name} ({size} rows): {before * 1000:.2f} ms -> {seconds * 1000:.2f} ms (+{change:.0%})")
+    if regressions:
+        raise SystemExit(f"{len(regressions)} benchmark(s) more than {threshold:.0%} slower than the baseline")
+    print(f"No benchmark more than {threshold:.0%} slower than the baseline")
+
+
+# Times the statistics queries and posting paths on a disposable Postgres loaded at several synthetic scales:
+# flask --app main benchmark-db [--sizes 10000,100000] [--output report.json]
+@app.cli.command("benchmark-db")
+@click.option("--sizes", default=",".join(map(str, database.SIZES)), show_default=True,
+              help="Numbers of transactions to load, one database each.")
+@click.option("--repeat", default=5, show_default=True, help="Timed runs per query, after one warm-up run.")
+@click.option("--workers", default=None, type=int, help="Processes generating the data. Defaults to the CPU count.")
+@click.option("--pg-bin", default=None, help="Directory with initdb and pg_ctl, if they are not found on their own.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Write the JSON report here.")
+def benchmarkDatabase(sizes, repeat, workers, pg_bin, output):
+    try:
+        sizes = tuple(int(size) for size in sizes.split(","))
+    except ValueError:
+        raise click.BadParameter("sizes must be comma separated integers")
+    try:
+        report = database.run(sizes, repeat, workers, pg_bin)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    for name, exponent in sorted(report["scaling"].items(), key=lambda item: -item[1]):
+        shape = "flat" if exponent < 0.3 else "linear" if exponent < 1.2 else "superlinear"
+        print(f"{name:<28} time ~ n^{exponent:<5} {shape}")
+    if output:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {output}")
+
+
 if __name__ == '__main__':
     app.run()
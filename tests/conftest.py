@@ -0,0 +1,53 @@
+from datetime import date
+import psycopg2
+import pytest
+from Backend import migrations
+from Backend.DAOs.connection_pool import configure_pool
+from Backend.benchmarks.database import DisposablePostgres, find_pg_bin
+
+
+@pytest.fixture(scope="session")
+def postgres():
+    """A throwaway PostgreSQL cluster; the tests using it are skipped where no server binaries are installed."""
+    try:
+        find_pg_bin()
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    with DisposablePostgres(log=lambda message: None) as server:
+        yield server
+
+
+@pytest.fixture
+def database(postgres):
+    """
+    A database with the schema and a small inventory: warehouses 1 and 2 with users 1 and 2, part 1 stored in
+    rack 1 of warehouse 1 and supplied by supplier 1, and customer 1. The migrations are applied and the pool is
+    connected to it.
+    """
+    dsn = postgres.create_database("sqlytes_test")
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO warehouse VALUES (1, 'W1', 'PR', 'North', 'San Juan', 'Calle 1', '00901', 1000),
+                                         (2, 'W2', 'PR', 'West', 'Mayaguez', 'Calle 2', '00680', 1000);
+            INSERT INTO users VALUES (1, 'Ana', 'Rivera', 'ana', 'ana@example.com', 'secret', 1),
+                                     (2, 'Luis', 'Torres', 'luis', 'luis@example.com', 'secret', 2);
+            INSERT INTO supplier VALUES (1, 'Supplier', 'PR', 'Ponce', 'Calle 3', '00716', '787-000-0000');
+            INSERT INTO parts VALUES (1, 'Bolt', 'Gray', 'Steel', 1);
+            INSERT INTO supplies VALUES (1, 1, 10);
+            INSERT INTO racks VALUES (1, 'Rack 1', 100), (2, 'Rack 2', 100);
+            INSERT INTO stored_in VALUES (1, 1, 1, 10);
+            INSERT INTO customer VALUES (1, 'Eva', 'Colon', '00901', '787-111-1111');
+            """)
+    conn.commit()
+    conn.close()
+    configure_pool(dsn)
+    migrations.migrate(log=lambda message: None)
+    yield dsn
+    configure_pool(postgres.dsn())  # closes the pooled connections to the test database
+    postgres.drop_database("sqlytes_test")
+
+
+@pytest.fixture
+def today():
+    return date.today()
@@ -0,0 +1,46 @@
+from Backend.DAOs.bulkTransaction import BulkTransactionDAO
+
+INCOMING = ("tdate", "part_amount", "unit_price", "pid", "wid", "rid", "sid", "uid")
+OUTGOING = ("tdate", "part_amount", "unit_price", "pid", "wid", "cid", "uid")
+EXCHANGE = ("tdate", "part_amount", "pid", "wid", "uid", "to_wid", "user_requester", "to_rid")
+
+
+def post(kind, columns, rows):
+    dao = BulkTransactionDAO()
+    try:
+        return {row_no: error for row_no, error, new_id in dao.postTransactions(kind, columns, rows)}
+    finally:
+        dao.release()
+
+
+def test_rejected_incoming_row_does_not_use_up_stock(database, today):
+    # The first row asks for the whole supplier stock but its user works at another warehouse
+    errors = post("incoming", INCOMING, [(0, today, 10, 1.0, 1, 1, 1, 1, 2),
+                                         (1, today, 5, 1.0, 1, 1, 1, 1, 1)])
+    assert errors == {0: "User (2) works at warehouse 2, not 1", 1: None}
+
+
+def test_rejected_incoming_row_does_not_use_up_budget(database, today):
+    errors = post("incoming", INCOMING, [(0, today, 1, 1000.0, 1, 1, 1, 1, 99),
+                                         (1, today, 1, 600.0, 1, 1, 1, 1, 1)])
+    assert errors == {0: "Internal server error: Failed to get user with id 99", 1: None}
+
+
+def test_rejected_outgoing_row_does_not_use_up_stock(database, today):
+    errors = post("outgoing", OUTGOING, [(0, today, 10, 2.0, 1, 1, 99, 1),
+                                         (1, today, 5, 2.0, 1, 1, 1, 1)])
+    assert errors == {0: "Customer 99 does not exist", 1: None}
+
+
+def test_rejected_transfer_row_does_not_claim_a_rack(database, today):
+    # The first row would assign the empty rack 2 to warehouse 1, but its requester does not work at warehouse 1
+    errors = post("exchange", EXCHANGE, [(0, today, 1, 1, 1, 1, 1, 1, 2),
+                                         (1, today, 1, 1, 1, 1, 2, 2, 2)])
+    assert errors[0].startswith("Invalid Transfer. The user who requested the transfer does not work")
+    assert errors[1] is None
+
+
+def test_running_totals_still_apply_to_valid_rows(database, today):
+    errors = post("outgoing", OUTGOING, [(0, today, 6, 2.0, 1, 1, 1, 1),
+                                         (1, today, 6, 2.0, 1, 1, 1, 1)])
+    assert errors == {0: None, 1: "Not enough stock (4) in warehouse (1)"}
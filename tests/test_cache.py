@@ -0,0 +1,14 @@
+import psycopg2
+from Backend.DAOs.cache import _Listener
+
+
+def test_listener_requires_the_notify_triggers(database):
+    conn = psycopg2.connect(database)
+    conn.autocommit = True
+    try:
+        assert _Listener._unnotified_tables(conn) == []
+        with conn.cursor() as cursor:
+            cursor.execute("DROP TRIGGER users_notify_change ON users;")
+        assert _Listener._unnotified_tables(conn) == ["users"]
+    finally:
+        conn.close()
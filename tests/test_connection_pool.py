@@ -0,0 +1,44 @@
+import psycopg2.extensions
+import pytest
+from Backend.DAOs import connection_pool
+from Backend.DAOs.DAO import DAO
+
+
+class FakeConnection:
+    def __init__(self, dsn, **kwargs):
+        self.dsn = dsn
+        self.closed = 0
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """Pools of fake connections; the process-wide one is restored afterwards."""
+    monkeypatch.setattr(connection_pool.psycopg2, "connect", FakeConnection)
+    monkeypatch.setattr(connection_pool, "_pool", None)
+    yield connection_pool.configure_pool
+
+
+def test_connections_returned_to_a_closed_pool_are_closed(pools):
+    pool = pools("dbname=old")
+    conn = pool.getconn()
+    pool.closeall()
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.stats()["size"] == 0 and pool.stats()["idle"] == 0
+
+
+def test_dao_returns_its_connection_to_the_pool_it_borrowed_from(pools):
+    pools("dbname=old")
+    dao = DAO()
+    conn = dao.conn
+    new = pools("dbname=new")
+    dao.release()
+    assert conn.closed
+    assert new.stats()["idle"] == 0
+    assert DAO().conn.dsn == "dbname=new"
@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from main import app
+from Backend.DAOs import unit_of_work
+from Backend.DAOs.idempotency import IdempotencyDAO
+
+
+@contextmanager
+def request():
+    """A request of its own, with its own unit of work, even inside another one."""
+    with app.app_context(), app.test_request_context():
+        yield
+
+
+def test_retry_while_key_is_held_fails_fast(database):
+    with request():
+        assert IdempotencyDAO().claim("key", b"body", 60) == (True, None, None, None)
+        with request():
+            assert IdempotencyDAO().claim("key", b"body", 60) == (False, None, None, None)
+
+
+def test_retry_after_commit_gets_stored_response(database):
+    with request():
+        dao = IdempotencyDAO()
+        assert dao.claim("key", b"body", 60) == (True, None, None, None)
+        assert dao.record("key", 201, b'{"Result": 1}') is not None
+        unit_of_work.current().commit()
+    with request():
+        claimed, fingerprint, status, body = IdempotencyDAO().claim("key", b"body", 60)
+        assert (claimed, bytes(fingerprint), status, bytes(body)) == (False, b"body", 201, b'{"Result": 1}')
+
+
+def test_rolled_back_claim_is_claimed_again(database):
+    with request():
+        assert IdempotencyDAO().claim("key", b"body", 60) == (True, None, None, None)
+    with request():
+        assert IdempotencyDAO().claim("key", b"body", 60) == (True, None, None, None)
+
+
+def test_expired_key_is_claimed_again(database):
+    with request():
+        dao = IdempotencyDAO()
+        dao.claim("key", b"old", 0)
+        dao.record("key", 201, b"{}")
+        unit_of_work.current().commit()
+    with request():
+        assert IdempotencyDAO().claim("key", b"new", 60) == (True, None, None, None)
@@ -0,0 +1,19 @@
+from Backend import query_plans
+
+
+def test_dao_queries_use_indexes(database):
+    results = query_plans.check_query_plans()
+    assert {description for description, query, failure in results} == \
+        {description for description, *_ in query_plans.CHECKED_CALLS}
+    assert [(description, query, failure) for description, query, failure in results if failure] == []
+
+
+def test_queries_that_fail_to_plan_are_reported(database, monkeypatch):
+    monkeypatch.setattr(query_plans, "CHECKED_CALLS", (
+        ("Missing table", query_plans.TransactionDAO, "_generic_retrieval_query", {"query": "SELECT * FROM missing"}),
+        ("Transaction by id", query_plans.TransactionDAO, "getTransactionByID", {"tid": 1}),
+    ))
+    failures = {description: failure for description, query, failure in query_plans.check_query_plans()}
+    assert failures["Missing table"].startswith("could not be planned: ERROR:  relation \"missing\" does not exist")
+    # The failed query doesn't keep the next calls from being planned
+    assert failures["Transaction by id"] is None
@@ -0,0 +1,64 @@
+import pytest
+from main import app
+from Backend.handler.bulkTransaction import BulkTransactionHandler
+from Backend.handler.incomingTransaction import IncomingTransactionHandler
+from Backend.handler.outgoingTransaction import OutgoingTransactionHandler
+from Backend.handler.schemas import TRANSFER_TRANSACTION
+
+INCOMING = {"transactionDate": "2024-01-02", "partAmount": 2, "unitBuyPrice": 1.5, "partID": 1, "warehouseID": 1,
+            "rackID": 1, "supplierID": 1, "userID": 1}
+OUTGOING = {"transactionDate": "2024-01-02", "partAmount": 2, "unitSalePrice": 1.5, "partID": 1, "warehouseID": 1,
+            "customerID": 1, "userID": 1}
+TRANSFER = {"transactionDate": "2024-01-02", "partAmount": 2, "partID": 1, "warehouseID": 1, "userID": 1,
+            "toWarehouse": 2, "userRequester": 2, "toRack": 2}
+
+
+@pytest.fixture
+def context():
+    with app.test_request_context():
+        yield
+
+
+@pytest.mark.parametrize("handler, payload", [(IncomingTransactionHandler, INCOMING),
+                                              (OutgoingTransactionHandler, OUTGOING)])
+def test_integral_floats_are_converted_to_int(context, handler, payload):
+    data = {**payload, "partAmount": 2.0, "partID": 1.0}
+    response = handler()._validate_data(data)
+    assert response.isValid()
+    transactionDate, partAmount, price, partID, *_ = response.value
+    assert (partAmount, partID) == (2, 1)
+    assert type(partAmount) is int and type(partID) is int
+
+
+def test_transfer_integral_floats_are_converted_to_int(context):
+    data = {**TRANSFER, "toRack": 2.0, "userRequester": 2.0}
+    response = TRANSFER_TRANSACTION.validate(data)
+    assert response.isValid()
+    assert type(data["toRack"]) is int and type(data["userRequester"]) is int
+
+
+@pytest.mark.parametrize("handler, payload", [(IncomingTransactionHandler, INCOMING),
+                                              (OutgoingTransactionHandler, OUTGOING)])
+@pytest.mark.parametrize("value", [True, 1.5])
+def test_non_integral_ids_are_rejected(context, handler, payload, value):
+    response = handler()._validate_data({**payload, "partID": value})
+    assert not response.isValid()
+    body, status = response.value
+    assert status == 400
+    assert body.get_json() == {"Error": "partID must be integer"}
+
+
+@pytest.mark.parametrize("path, payload", [("/sqlytes/incoming/1", INCOMING), ("/sqlytes/outgoing/1", OUTGOING),
+                                           ("/sqlytes/exchange/1", TRANSFER)])
+def test_modify_rejects_boolean_ids_with_400(path, payload):
+    response = app.test_client().put(path, json={**payload, "partID": True})
+    assert response.status_code == 400
+    assert response.get_json() == {"Error": "partID must be integer"}
+
+
+def test_bulk_rows_are_staged_with_int_ids(context):
+    rows = [{**INCOMING, "partID": 1.0, "rackID": 3.0}, {**INCOMING, "partID": True}]
+    errors = BulkTransactionHandler.SCHEMAS["incoming"].errors(rows)
+    assert errors == {1: "partID must be integer"}
+    values = BulkTransactionHandler._values(BulkTransactionHandler.FIELDS["incoming"], rows[0])
+    assert [type(value) for value in values[3:]] == [int] * 5
@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask import jsonify
+from flask.json.provider import DefaultJSONProvider
+from main import app
+from Backend.handler import serialization
+
+ROW = {"Transaction Date": date(2020, 1, 2), "at": datetime(2020, 1, 2, 3, 4, 5), "cost": Decimal("1.50"), "id": 1}
+
+
+@pytest.fixture
+def provider():
+    original = app.json.iso_dates
+    yield app.json
+    app.json.iso_dates = original
+
+
+def test_encodes_like_flask(provider):
+    with app.test_request_context():
+        assert jsonify(ROW).get_json() == DefaultJSONProvider(app).loads(DefaultJSONProvider(app).dumps(ROW))
+        assert provider.dumps(ROW) == DefaultJSONProvider(app).dumps(ROW, separators=(",", ":"))
+
+
+def test_dates_parse_as_rfc_822(provider):
+    with app.test_request_context():
+        encoded = jsonify(ROW).get_json()["Transaction Date"]
+    # How Frontend/sqlytes_inventory.ipynb reads them
+    assert datetime.strptime(encoded, "%a, %d %b %Y %H:%M:%S %Z") == datetime(2020, 1, 2)
+
+
+def test_iso_dates_are_opt_in(provider):
+    provider.iso_dates = True
+    with app.test_request_context():
+        encoded = jsonify(ROW).get_json()
+    assert (encoded["Transaction Date"], encoded["at"]) == ("2020-01-02", "2020-01-02T03:04:05")
+
+
+def test_standard_encoder_matches(provider, monkeypatch):
+    monkeypatch.setattr(serialization, "orjson", None)
+    with app.test_request_context():
+        assert jsonify(ROW).get_json()["Transaction Date"] == "Thu, 02 Jan 2020 00:00:00 GMT"
+        provider.iso_dates = True
+        assert jsonify(ROW).get_json()["Transaction Date"] == "2020-01-02"